@@ -0,0 +1,214 @@
+import io
+import os
+import sys
+import json
+import time
+import tempfile
+import statistics
+import subprocess
+import bytecode
+import int as interpreter
+from lex import lex
+from syn import compile_tokens
+
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data")
+LIBRARY = os.path.join(DATA, "lib.jg")
+ENGINES = ["-loop", "-threaded", "-jit"]
+DEFAULT_REPEAT = 5
+DEFAULT_TOLERANCE = 10 # percent
+# The baseline runs are compared with unless another is given, saved with the default settings. Its
+# times are from the machine it was saved on, so save one of your own (-save=) to compare on another.
+DEFAULT_BASELINE = os.path.join(DATA, "bench", "baseline.json")
+
+# The workloads in data/bench: the name of the program and its input for a scale. Each ends by
+# itself; while loops aren't among them, as a while loop's condition is only worked out when it
+# starts, so it keeps going until something fails.
+WORKLOADS = [
+	("increase", lambda scale: f"{200 * scale}\n"), # nested increase loops adding up
+	("input", lambda scale: f"{10000 * scale}\n" + "3\n" * (10000 * scale)), # reading ints and printing in an increase loop
+	("branches", lambda scale: f"{10000 * scale}\n"), # ifs, some nested, in an increase loop
+	("objects", lambda scale: f"{5000 * scale}\n"), # making objects and getting and setting attributes
+	("lists", lambda scale: f"{10000 * scale}\n"), # setting and indexing a list
+	("calls", lambda scale: f"{3000 * scale}\n"), # calls six deep, through the casts of lib.jg
+]
+# The settings a baseline has to have been saved with for its times to be compared with a run's.
+SETTINGS = ["engine", "quicken", "fuse", "scale"]
+
+
+# Runs each workload repeat times, each in a new process running int.py's run() on it, and keeps
+# the time the run took, the wall time of the process and its peak RSS. The instructions each
+# workload runs are counted once beforehand, in this process, with nothing quickened or fused.
+class Benchmark:
+	def __init__(self, names = None, repeat = DEFAULT_REPEAT, scale = 1, engine = "-loop", quicken = True, fuse = True):
+		self.workloads = [workload for workload in WORKLOADS if names is None or workload[0] in names]
+		self.repeat = repeat
+		self.scale = scale
+		self.engine = engine
+		self.quicken = quicken
+		self.fuse = fuse
+		self.results = {} # key is the name of a workload, value is a dictionary of its measurements
+
+
+	def run(self, report = None):
+		with tempfile.TemporaryDirectory() as directory:
+			for name, make_input in self.workloads:
+				program = os.path.join(directory, name + ".jgc")
+				input_file = os.path.join(directory, name + ".in")
+				code = compile_tokens(lex([LIBRARY, os.path.join(DATA, "bench", name + ".jg")])).code
+				with open(program, "w") as f:
+					f.write(code)
+				with open(input_file, "w") as f:
+					f.write(make_input(self.scale))
+
+				instructions = Benchmark.count(bytecode.assemble(code.split('\n')), make_input(self.scale))
+				runs = [self.measure(program, input_file) for i in range(self.repeat)]
+				seconds = [run[0] for run in runs]
+				median = statistics.median(seconds)
+				self.results[name] = {"instructions": instructions, "seconds": median,
+					"stdev": statistics.stdev(seconds) if len(seconds) > 1 else 0.0,
+					"instructions_per_second": instructions / median if median > 0 else 0.0,
+					"wall": statistics.median(run[1] for run in runs), "rss": max(run[2] for run in runs)}
+				if report is not None:
+					report(name, self.results[name])
+		return self.results
+
+
+	# Returns the instructions the program runs given the input.
+	def count(assembly, text):
+		interpreter.load(assembly)
+		interpreter.open_streams(io.StringIO(text), io.StringIO())
+		counter = interpreter.DispatchCounter()
+		interpreter.run('-none', '-loop', counter, quicken = False, fuse = False)
+		return counter.count
+
+
+	# Runs the program in a new process. Returns the seconds its run() took, the wall time of
+	# the process and its peak RSS in bytes.
+	def measure(self, program, input_file):
+		args = [sys.executable, os.path.abspath(__file__), "-child", program, input_file, self.engine, str(self.quicken), str(self.fuse)]
+		start = time.perf_counter()
+		process = subprocess.Popen(args, stdout=subprocess.PIPE)
+		out = process.stdout.read()
+		process.stdout.close()
+		pid, wait_status, usage = os.wait4(process.pid, 0)
+		wall = time.perf_counter() - start
+		process.returncode = os.waitstatus_to_exitcode(wait_status)
+		if process.returncode != 0:
+			raise RuntimeError(f"the benchmark process for {program} failed (exit {process.returncode})")
+		result = json.loads(out)
+		if result["status"] != 0:
+			raise RuntimeError(f"{program} ended with status {result['status']}")
+		rss = usage.ru_maxrss * (1 if sys.platform == "darwin" else 1024) # bytes on macOS, KB elsewhere
+		return (result["seconds"], wall, rss)
+
+
+	# Runs the program on the input with its output thrown away, and prints the seconds it took and
+	# the status it ended with as JSON. This is what measure() runs in the new process.
+	def child(program, input_file, engine, quicken, fuse):
+		interpreter.load(bytecode.load(program))
+		interpreter.open_streams(input_file, os.devnull)
+		status = 0
+		start = time.perf_counter()
+		try:
+			interpreter.run('-none', engine, quicken = quicken, fuse = fuse)
+		except EOFError:
+			status = 1
+		seconds = time.perf_counter() - start
+		print(json.dumps({"seconds": seconds, "status": status}))
+
+
+	# Returns the settings the baseline was saved with that differ from this benchmark's, as a
+	# dictionary from the name of each to its (value in the baseline, value here).
+	def differences(self, baseline):
+		return {setting: (baseline.get(setting), getattr(self, setting)) for setting in SETTINGS if baseline.get(setting) != getattr(self, setting)}
+
+
+	# Returns a dictionary from the name of each workload measured in both to how much slower
+	# (positive) or faster (negative) its run is than in the baseline, in percent.
+	def compare(self, baseline):
+		changes = {}
+		for name, result in self.results.items():
+			if name in baseline["workloads"] and baseline["workloads"][name]["seconds"] > 0:
+				changes[name] = 100 * (result["seconds"] / baseline["workloads"][name]["seconds"] - 1)
+		return changes
+
+
+	def save(self, filename):
+		with open(filename, "w") as f:
+			json.dump({"python": sys.version.split()[0], "engine": self.engine, "quicken": self.quicken, "fuse": self.fuse,
+				"scale": self.scale, "repeat": self.repeat, "workloads": self.results}, f, indent="\t")
+
+
+def row(name, result, change = None):
+	variance = 100 * result["stdev"] / result["seconds"] if result["seconds"] > 0 else 0
+	line = (f"{name:<10} {result['instructions']:>11,} {result['seconds']:>9.3f} s {variance:>5.1f}% "
+		f"{result['instructions_per_second'] / 1e6:>8.3f} M/s {result['wall']:>8.3f} s {result['rss'] / 2**20:>7.1f} MB")
+	if change is not None:
+		line += f" {change:>+7.1f}%"
+	return line
+
+
+if __name__ == "__main__":
+	if len(sys.argv) == 7 and sys.argv[1] == "-child":
+		Benchmark.child(sys.argv[2], sys.argv[3], sys.argv[4], sys.argv[5] == "True", sys.argv[6] == "True")
+		sys.exit(0)
+
+	options = ["-repeat=", "-scale=", "-only=", "-baseline=", "-save=", "-tolerance="]
+	flags = [arg for arg in sys.argv[1:] if arg not in ENGINES + ["-no-quicken", "-no-fuse", "-no-baseline"] and not any(arg.startswith(option) for option in options)]
+	if len(flags) > 0:
+		print("Usage: python3 bench.py <optional: engine> <optional: options>")
+		print("Engines:", ENGINES)
+		print("Options: -repeat=<runs> (of each workload, default 5), -scale=<n> (multiplies the sizes of the inputs), -only=<workload,...>, "
+			"-no-quicken, -no-fuse, -baseline=<file.json> (compare with it, default data/bench/baseline.json), -no-baseline, -save=<file.json> (save the results as a baseline), "
+			"-tolerance=<percent> (how much slower than the baseline is a regression, default 10)")
+		print("Workloads:", [workload[0] for workload in WORKLOADS])
+		sys.exit(1)
+
+	engine = ([arg for arg in sys.argv[1:] if arg in ENGINES] + ["-loop"])[0]
+	repeat = DEFAULT_REPEAT
+	scale = 1
+	names = None
+	baseline = None
+	save = None
+	tolerance = DEFAULT_TOLERANCE
+	for arg in sys.argv[1:]:
+		if arg.startswith("-repeat="): repeat = int(arg[len("-repeat="):])
+		elif arg.startswith("-scale="): scale = int(arg[len("-scale="):])
+		elif arg.startswith("-only="): names = arg[len("-only="):].split(",")
+		elif arg.startswith("-baseline="): baseline = arg[len("-baseline="):]
+		elif arg.startswith("-save="): save = arg[len("-save="):]
+		elif arg.startswith("-tolerance="): tolerance = float(arg[len("-tolerance="):])
+
+	benchmark = Benchmark(names, repeat, scale, engine, "-no-quicken" not in sys.argv, "-no-fuse" not in sys.argv)
+	default = baseline is None and "-no-baseline" not in sys.argv and os.path.isfile(DEFAULT_BASELINE)
+	if default:
+		baseline = DEFAULT_BASELINE
+	if baseline is not None:
+		with open(baseline) as f:
+			baseline = json.load(f)
+	# The default baseline is only compared with runs of the settings it was saved with.
+	if default and len(benchmark.differences(baseline)) > 0:
+		print("Not comparing with data/bench/baseline.json, which was saved with other settings")
+		baseline = None
+	if baseline is not None and len(benchmark.differences(baseline)) > 0:
+		print("ERROR: The baseline was saved with different settings:", ", ".join(f"{setting} {saved} (here {value})" for setting, (saved, value) in benchmark.differences(baseline).items()))
+		sys.exit(1)
+	print(f"{'workload':<10} {'instructions':>11} {'run':>11} {'stdev':>6} {'instr/s':>12} {'wall':>10} {'peak RSS':>10}" + (" baseline" if baseline is not None else ""))
+	def report(name, result):
+		change = None
+		if baseline is not None and name in baseline["workloads"]:
+			change = 100 * (result["seconds"] / baseline["workloads"][name]["seconds"] - 1)
+		print(row(name, result, change), flush=True)
+	benchmark.run(report)
+
+	if save is not None:
+		benchmark.save(save)
+	if baseline is not None:
+		regressions = {name: change for name, change in benchmark.compare(baseline).items() if change > tolerance}
+		for name, result in benchmark.results.items():
+			if name in baseline["workloads"] and baseline["workloads"][name]["instructions"] != result["instructions"]:
+				print(f"{name} runs {result['instructions']} instructions, against {baseline['workloads'][name]['instructions']} in the baseline")
+		if len(regressions) > 0:
+			print("Slower than the baseline:", ", ".join(f"{name} ({change:+.1f}%)" for name, change in regressions.items()))
+			sys.exit(1)
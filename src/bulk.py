@@ -0,0 +1,132 @@
+import operator
+from array import array
+
+try:
+	import numpy
+except ImportError: # the pure-Python versions are used instead
+	numpy = None
+
+
+# Lists shorter than this aren't worth handing to NumPy.
+NUMPY_MINIMUM = 256
+
+INT64_MIN = -0x8000000000000000
+INT64_MAX = 0x7FFFFFFFFFFFFFFF
+
+CONDITIONS = {"gt": operator.gt, "lt": operator.lt, "eq": operator.eq, "ge": operator.ge, "le": operator.le, "ne": operator.ne}
+OPERATIONS = {"add": operator.add, "sub": operator.sub}
+
+
+# Raised when the program asks for something of a list it can't be given, eg: the smallest item
+# of an empty list. It's a mistake in the program, so it's reported as one (see int.py).
+class ListError(ValueError):
+	pass
+
+
+# The operations behind the bulk list opcodes. Each takes the items of lists (an array('q') when
+# the list only holds ints, otherwise a Python list) and returns new items, in an array('q') if
+# they all fit in one. Arrays are worked on with NumPy when it's installed and the list is long
+# enough; results that would overflow 64 bits are worked out again in Python, so the answers are
+# the same either way. Items of Python lists are read as ints, the way IADD reads its operands.
+
+
+def fits(value):
+	return INT64_MIN <= value <= INT64_MAX
+
+
+def use_numpy(items):
+	return numpy is not None and type(items) is array and len(items) >= NUMPY_MINIMUM
+
+
+# Returns the items as an int64 NumPy array sharing their memory.
+def view(items):
+	return numpy.frombuffer(items, dtype=numpy.int64) if len(items) > 0 else numpy.zeros(0, dtype=numpy.int64)
+
+
+def from_numpy(values):
+	items = array('q')
+	items.frombytes(values.astype(numpy.int64, copy=False).tobytes())
+	return items
+
+
+# Returns the values in an array('q') if they all fit in one, otherwise in a list.
+def store(values):
+	try:
+		return array('q', values)
+	except OverflowError:
+		return list(values)
+
+
+def numbers(items):
+	return items if type(items) is array else [int(item) for item in items]
+
+
+# Returns the items of a op b, item by item, where b is the items of another list of the same size
+# or an int.
+def elementwise(operation, a, b):
+	op = OPERATIONS[operation]
+	scalar = type(b) is int
+	if not scalar and len(a) != len(b):
+		raise ListError(f"the lists have different sizes ({len(a)} and {len(b)})")
+	if use_numpy(a) and ((scalar and fits(b)) or type(b) is array):
+		x = view(a)
+		y = numpy.int64(b) if scalar else view(b)
+		result = x + y if operation == "add" else x - y
+		# The result overflowed wherever its sign is wrong for the signs of the operands.
+		wrong = ((x ^ result) & (y ^ result)) if operation == "add" else ((x ^ y) & (x ^ result))
+		if not (wrong < 0).any():
+			return from_numpy(result)
+	a = numbers(a)
+	if scalar:
+		return store([op(item, b) for item in a])
+	return store(list(map(op, a, numbers(b))))
+
+
+def total(items):
+	if use_numpy(items):
+		x = view(items)
+		if len(x) * max(abs(int(x.min())), abs(int(x.max()))) <= INT64_MAX: # the sum can't overflow
+			return int(x.sum())
+	return sum(numbers(items))
+
+
+def smallest(items):
+	if len(items) == 0:
+		raise ListError("an empty list has no smallest item")
+	if use_numpy(items):
+		return int(view(items).min())
+	return min(numbers(items))
+
+
+def largest(items):
+	if len(items) == 0:
+		raise ListError("an empty list has no largest item")
+	if use_numpy(items):
+		return int(view(items).max())
+	return max(numbers(items))
+
+
+# Returns size items that are all the value.
+def fill(size, value):
+	if type(value) is int and fits(value):
+		return array('q', [value]) * size
+	return [value] * size
+
+
+# Returns the ints from start up to (not including) end.
+def span(start, end):
+	if numpy is not None and end - start >= NUMPY_MINIMUM and fits(start) and fits(end):
+		return from_numpy(numpy.arange(start, end, dtype=numpy.int64))
+	return store(range(start, end))
+
+
+# Returns the items that compare to the value by the condition (eg: "gt" keeps the ones greater
+# than it), in order.
+def keep(items, condition, value):
+	test = CONDITIONS[condition]
+	if use_numpy(items) and fits(value):
+		x = view(items)
+		return from_numpy(x[test(x, value)]) # the operators compare NumPy arrays item by item
+	if type(items) is array:
+		return array('q', [item for item in items if test(item, value)])
+	return [item for item in items if test(int(item), value)]
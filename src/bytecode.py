@@ -0,0 +1,270 @@
+import sys
+import struct
+from collections import defaultdict
+
+
+# The binary program format (all integers little-endian):
+#   header:       magic, version, operand width, then the number of pool entries, instructions,
+#                 functions, labels and blocks
+#   pool:         (offset, length) per entry, followed by the UTF-8 bytes of every entry
+#   instructions: opcode byte, operand count byte, then one pool index per operand (2 bytes
+#                 each if the pool has fewer than 65536 entries, otherwise 4 bytes each)
+#   functions:    (name index, pc) per function
+#   labels:       (function name index, label name index, pc) per label
+#   blocks:       (head pc, end pc) per block
+MAGIC = b"JGPB"
+VERSION = 1
+HEADER = struct.Struct("<4sHHIIIII")
+POOL_ENTRY = struct.Struct("<II")
+INSTRUCTION = struct.Struct("<BB")
+FUNCTION = struct.Struct("<II")
+LABEL = struct.Struct("<III")
+BLOCK = struct.Struct("<II")
+
+CONDITIONS = ["EQ", "NE", "GT", "LT", "GE", "LE"]
+OPCODES = ["FUNC", "RETURN", "INSERT", "ASSIGN", "COPY", "BR"] + ["BR" + cond for cond in CONDITIONS] + \
+	["IINPUT", "SINPUT", "IADD", "ISUB", "PRINT", "EXCON"] + ["EXCON" + cond for cond in CONDITIONS] + \
+	["OBJECT", "RETRIEVE", "ATTRIBUTE"] + CONDITIONS + ["LIST", "LGET", "LSET", "LAPPEND", "LSIZE"] + \
+	["LADD", "LSUB", "LSUM", "LMIN", "LMAX", "LFILL", "LRANGE", "LFILTER"]
+OPCODE_NUMBERS = {opcode: number for number, opcode in enumerate(OPCODES)}
+
+# These opcodes take the rest of the line as their only operand, even if it contains commas.
+WHOLE_OPERAND = {"RETURN", "BR", "IINPUT", "SINPUT", "PRINT", "EXCON", "OBJECT"} | {"EXCON" + cond for cond in CONDITIONS}
+
+
+# A program split into instructions and the tables describing where its functions, labels and
+# blocks are. Instructions are (opcode, operands) tuples, where operands is a list of strings.
+class Assembly:
+	def __init__(self):
+		self.instructions = []
+		self.functions = {} # key is the name of the function, value is the PC of its first instruction
+		self.labels = defaultdict(dict) # key is the name of the function, value is a dict from label to PC
+		self.blocks = [] # (head, end) tuples: the PC of the FUNC heading a block, and of its last instruction
+
+
+def is_label(line):
+	return len(line) > 1 and line[-1] == ':'
+
+
+# Splits a line of text code into its command and list of operands.
+def split(line):
+	space = line.find(' ')
+	if space == -1: space = len(line)
+
+	command = line[0:space]
+	arguments = line[space+1:]
+	if command in WHOLE_OPERAND:
+		operands = [arguments] if len(arguments) > 0 else []
+	elif command == "FUNC":
+		operands = arguments.split(', ', 1)
+	else:
+		operands = arguments.split(', ')
+	return command, operands
+
+
+# Builds an Assembly a line of text code at a time, so a compiler can hand over its code as it
+# emits it instead of joining it into text to be split again.
+class Assembler:
+	def __init__(self):
+		self.assembly = Assembly()
+		self.block = [] # the heads of the blocks still open
+		self.label_created = False
+		self.label_name = ""
+
+
+	# Returns an Assembler that can be added to without modifying this one.
+	def copy(self):
+		assembler = Assembler()
+		assembler.assembly.instructions = list(self.assembly.instructions)
+		assembler.assembly.functions = dict(self.assembly.functions)
+		for name, labels in self.assembly.labels.items():
+			assembler.assembly.labels[name] = dict(labels)
+		assembler.assembly.blocks = list(self.assembly.blocks)
+		assembler.block = list(self.block)
+		assembler.label_created = self.label_created
+		assembler.label_name = self.label_name
+		return assembler
+
+
+	def add(self, line):
+		assembly = self.assembly
+		if is_label(line):
+			self.label_created = True
+			self.label_name = line[:-1]
+		else:
+			command, operands = split(line)
+			if command in OPCODE_NUMBERS:
+				assembly.instructions.append((command, operands))
+			elif command == "ENTERBLOCK":
+				self.block.append(len(assembly.instructions) - 1) # the index of the head of the block
+			elif command == "EXITBLOCK":
+				assembly.blocks.append((self.block.pop(), len(assembly.instructions) - 1))
+			elif command == "LABEL":
+				assembly.labels[self.label_name][operands[0]] = len(assembly.instructions) - 1
+			elif len(command) > 0:
+				print(f"ERROR: Command '{command}' not recognized")
+
+			if self.label_created and command != 'LABEL':
+				assembly.functions[self.label_name] = len(assembly.instructions) - 1
+				self.label_created = False
+
+
+# Given a list of lines of text code, returns the Assembly they describe.
+def assemble(lines):
+	assembler = Assembler()
+	for line in lines:
+		assembler.add(line)
+	return assembler.assembly
+
+
+# Returns the text code for the assembly, which assembles back into the same Assembly.
+def disassemble(assembly):
+	starts = defaultdict(list) # key is a PC, value is the functions starting there
+	for name, pc in assembly.functions.items():
+		starts[pc].append(name)
+
+	owner = [None] * len(assembly.instructions) # the function each instruction belongs to
+	current = None
+	for pc in range(len(assembly.instructions)):
+		if len(starts[pc]) > 0:
+			current = starts[pc][-1]
+		owner[pc] = current
+
+	after = defaultdict(list) # key is a PC, value is the pseudo-instructions following it
+	leading = defaultdict(list) # key is a function, value is the labels before its first instruction
+	for function, function_labels in assembly.labels.items():
+		for label, pc in function_labels.items():
+			if pc >= 0 and owner[pc] == function:
+				after[pc].append("LABEL " + label)
+			else:
+				leading[function].append("LABEL " + label)
+	for head, end in assembly.blocks:
+		after[head].insert(0, "ENTERBLOCK")
+	for head, end in sorted(assembly.blocks, key=lambda block: -block[0]):
+		after[end].append("EXITBLOCK")
+
+	lines = []
+	for pc, (opcode, operands) in enumerate(assembly.instructions):
+		for name in starts[pc]:
+			lines.append(name + ":")
+			lines.extend(leading[name])
+		if opcode == "FUNC" or opcode not in WHOLE_OPERAND:
+			lines.append(opcode + (" " + ", ".join(operands) if len(operands) > 0 else ""))
+		else:
+			lines.append(opcode + (" " + operands[0] if len(operands) > 0 else ""))
+		lines.extend(after[pc])
+	return "\n".join(lines) + "\n"
+
+
+# Returns the bytes of the binary format of the assembly.
+def encode(assembly):
+	pool = {} # key is the string, value is its index
+	def intern(string):
+		if string not in pool:
+			pool[string] = len(pool)
+		return pool[string]
+
+	for opcode, operands in assembly.instructions:
+		for operand in operands:
+			intern(operand)
+	width = 2 if len(pool) < 0x10000 else 4
+	operand_format = "<" + ("H" if width == 2 else "I")
+
+	code = bytearray()
+	for opcode, operands in assembly.instructions:
+		code += INSTRUCTION.pack(OPCODE_NUMBERS[opcode], len(operands))
+		for operand in operands:
+			code += struct.pack(operand_format, pool[operand])
+
+	tables = bytearray()
+	for name, pc in assembly.functions.items():
+		tables += FUNCTION.pack(intern(name), pc)
+	label_count = 0
+	for function, function_labels in assembly.labels.items():
+		for label, pc in function_labels.items():
+			tables += LABEL.pack(intern(function), intern(label), pc & 0xFFFFFFFF)
+			label_count += 1
+	for head, end in assembly.blocks:
+		tables += BLOCK.pack(head, end)
+
+	strings = bytearray()
+	entries = bytearray()
+	for string in pool: # dicts keep insertion order, which is the index order
+		data = string.encode()
+		entries += POOL_ENTRY.pack(len(strings), len(data))
+		strings += data
+
+	header = HEADER.pack(MAGIC, VERSION, width, len(pool), len(assembly.instructions), len(assembly.functions), label_count, len(assembly.blocks))
+	return bytes(header + entries + strings + code + tables)
+
+
+# Returns the Assembly stored in a buffer holding the binary format. Everything is decoded into
+# new objects, so the buffer isn't needed once it returns.
+def decode(buffer):
+	view = memoryview(buffer)
+	magic, version, width, pool_count, instruction_count, function_count, label_count, block_count = HEADER.unpack_from(view, 0)
+	if magic != MAGIC or version != VERSION:
+		raise ValueError("not a JGPL binary program (or an unsupported version)")
+	offset = HEADER.size
+
+	strings_start = offset + pool_count * POOL_ENTRY.size
+	pool = []
+	for string_offset, length in POOL_ENTRY.iter_unpack(view[offset:strings_start]):
+		start = strings_start + string_offset
+		pool.append(str(view[start:start+length], "utf-8"))
+	offset = strings_start + (string_offset + length if pool_count > 0 else 0)
+
+	assembly = Assembly()
+	unpack_instruction = INSTRUCTION.unpack_from
+	operand_formats = ["<" + ("H" if width == 2 else "I") * count for count in range(256)]
+	for i in range(instruction_count):
+		opcode, count = unpack_instruction(view, offset)
+		offset += INSTRUCTION.size
+		operands = [pool[index] for index in struct.unpack_from(operand_formats[count], view, offset)]
+		offset += count * width
+		assembly.instructions.append((OPCODES[opcode], operands))
+
+	for name, pc in FUNCTION.iter_unpack(view[offset:offset + function_count * FUNCTION.size]):
+		assembly.functions[pool[name]] = pc
+	offset += function_count * FUNCTION.size
+	for function, label, pc in LABEL.iter_unpack(view[offset:offset + label_count * LABEL.size]):
+		assembly.labels[pool[function]][pool[label]] = pc if pc != 0xFFFFFFFF else -1
+	offset += label_count * LABEL.size
+	for head, end in BLOCK.iter_unpack(view[offset:offset + block_count * BLOCK.size]):
+		assembly.blocks.append((head, end))
+	view.release()
+	return assembly
+
+
+def is_binary(filename):
+	with open(filename, "rb") as f:
+		return f.read(len(MAGIC)) == MAGIC
+
+
+# Returns the Assembly stored in a file of either format. A binary file is read whole and decoded
+# from the bytes read.
+def load(filename):
+	if is_binary(filename):
+		with open(filename, "rb") as f:
+			return decode(f.read())
+	else:
+		with open(filename, "r") as f:
+			return assemble(f.read().split('\n'))
+
+
+def write_binary(assembly, filename):
+	with open(filename, "wb") as f:
+		f.write(encode(assembly))
+
+
+if __name__ == "__main__":
+	if len(sys.argv) != 3:
+		print("Usage: python3 bytecode.py <input.jgc/.jgb> <output.jgc/.jgb>")
+		print("Converts text code to the binary format and back, based on the format of the input file.")
+	else:
+		assembly = load(sys.argv[1])
+		if is_binary(sys.argv[1]):
+			with open(sys.argv[2], "w") as f:
+				f.write(disassemble(assembly))
+		else:
+			write_binary(assembly, sys.argv[2])
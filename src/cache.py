@@ -0,0 +1,197 @@
+import os
+import json
+import shutil
+import hashlib
+import contextlib
+
+try:
+	import fcntl
+except ImportError: # eg: on Windows, where builds racing each other may lose a count
+	fcntl = None
+
+
+DEFAULT_DIRECTORY = os.path.join(os.path.expanduser("~"), ".cache", "jgpl")
+DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+
+# Bump whenever the output format changes in a way the toolchain sources alone would not show.
+VERSION = "2"
+TOOLCHAIN = ["lex.py", "syn.py", "cache.py", "bytecode.py", "sourcemap.py"]
+
+
+# Stores the outputs of whole-program compilations, keyed by the hash of everything that went
+# into them. Each entry is a directory holding one file per artifact (eg: "out.jgc"). Entries
+# are touched when read, so the least recently used ones are the oldest and are evicted first
+# once the cache grows past max_size bytes.
+class BuildCache:
+	def __init__(self, directory = DEFAULT_DIRECTORY, max_size = DEFAULT_MAX_SIZE):
+		self.directory = directory
+		self.max_size = max_size
+		os.makedirs(self.directory, exist_ok=True)
+
+
+	# Returns the hash of the toolchain version and the contents of the files, in order. The names
+	# of the inputs, as given and resolved, go into it too, as the source map holds them.
+	def key(self, filenames):
+		digest = hashlib.sha256()
+		digest.update(VERSION.encode())
+		source_directory = os.path.dirname(os.path.abspath(__file__))
+		for filename in TOOLCHAIN + [None] + list(filenames):
+			if filename is None:
+				digest.update(b"\0inputs\0")
+				continue
+			if filename in TOOLCHAIN:
+				filename = os.path.join(source_directory, filename)
+			else:
+				digest.update(filename.encode() + b"\0" + os.path.abspath(filename).encode() + b"\0")
+			with open(filename, "rb") as f:
+				contents = f.read()
+			digest.update(str(len(contents)).encode() + b"\0")
+			digest.update(contents)
+		return digest.hexdigest()
+
+
+	# Returns a dictionary from artifact name to its bytes, or None if the key isn't cached.
+	def get(self, key):
+		entry = os.path.join(self.directory, key)
+		try:
+			artifacts = {}
+			for name in os.listdir(entry):
+				with open(os.path.join(entry, name), "rb") as f:
+					artifacts[name] = f.read()
+			os.utime(entry)
+		except FileNotFoundError:
+			self.count("misses")
+			return None
+		self.count("hits")
+		return artifacts
+
+
+	# Stores a dictionary from artifact name to its contents (str or bytes) under the key. If the
+	# key is stored already (eg: a -binary build of what a text build stored), the artifacts it
+	# doesn't have yet are added to it.
+	def put(self, key, artifacts):
+		entry = os.path.join(self.directory, key)
+		temp = entry + ".tmp" + str(os.getpid())
+		os.makedirs(temp, exist_ok=True)
+		written = 0
+		for name, contents in artifacts.items():
+			data = contents.encode() if isinstance(contents, str) else contents
+			with open(os.path.join(temp, name), "wb") as f:
+				f.write(data)
+			written += len(data)
+		try:
+			os.rename(temp, entry)
+		except OSError: # the entry is there already
+			written = self.add(entry, temp)
+		if self.count("size", written)["size"] > self.max_size:
+			self.evict()
+
+
+	# Moves the artifacts in temp that the entry doesn't have into it, one by one, so a build
+	# reading the entry sees each whole or not at all. Returns the bytes added.
+	def add(self, entry, temp):
+		added = 0
+		for name in os.listdir(temp):
+			if os.path.exists(os.path.join(entry, name)):
+				continue
+			size = os.path.getsize(os.path.join(temp, name))
+			try:
+				os.replace(os.path.join(temp, name), os.path.join(entry, name))
+				added += size
+			except OSError: # the entry was evicted in the meantime
+				break
+		shutil.rmtree(temp, ignore_errors=True)
+		return added
+
+
+	# Returns a (last used, size in bytes, directory) tuple for each entry.
+	def entries(self):
+		entries = []
+		for key in os.listdir(self.directory):
+			entry = os.path.join(self.directory, key)
+			if not os.path.isdir(entry) or ".tmp" in key:
+				continue
+			try:
+				size = sum(os.path.getsize(os.path.join(entry, name)) for name in os.listdir(entry))
+				entries.append((os.path.getmtime(entry), size, entry))
+			except FileNotFoundError: # evicted by another build while being looked at
+				pass
+		return entries
+
+
+	# Removes the least recently used entries until the cache fits in max_size bytes. The size of
+	# the cache is kept in the stats as entries are stored, so this only walks the cache once
+	# that's over max_size, and then corrects it.
+	def evict(self):
+		entries = sorted(self.entries())
+		total = sum(size for mtime, size, entry in entries)
+		evicted = 0
+		for mtime, size, entry in entries:
+			if total <= self.max_size:
+				break
+			shutil.rmtree(entry, ignore_errors=True)
+			total -= size
+			evicted += 1
+		with self.locked():
+			stats = self.stats()
+			stats["size"] = total
+			stats["evictions"] += evicted
+			self.save(stats)
+
+
+	# Adds the amount to the stat. Returns the stats.
+	def count(self, stat, amount = 1):
+		with self.locked():
+			stats = self.stats()
+			stats[stat] += amount
+			self.save(stats)
+		return stats
+
+
+	# Holds a lock on the stats while reading and writing them, so builds running at the same time
+	# don't lose each other's counts.
+	@contextlib.contextmanager
+	def locked(self):
+		if fcntl is None:
+			yield
+			return
+		with open(os.path.join(self.directory, "stats.lock"), "w") as f:
+			fcntl.flock(f, fcntl.LOCK_EX)
+			try:
+				yield
+			finally:
+				fcntl.flock(f, fcntl.LOCK_UN)
+
+
+	# Writes the stats to a file of their own that then replaces stats.json, so a build never reads
+	# half of them.
+	def save(self, stats):
+		filename = os.path.join(self.directory, "stats.json")
+		temp = filename + ".tmp" + str(os.getpid())
+		with open(temp, "w") as f:
+			json.dump(stats, f)
+		os.replace(temp, filename)
+
+
+	# Returns a dictionary holding the hits, misses, evictions and size of the cache.
+	def stats(self):
+		try:
+			with open(os.path.join(self.directory, "stats.json")) as f:
+				stats = json.load(f)
+		except (FileNotFoundError, ValueError):
+			stats = {}
+		for stat in ["hits", "misses", "evictions"]:
+			stats.setdefault(stat, 0)
+		if "size" not in stats: # a new cache, or one from before the size was kept
+			stats["size"] = sum(size for mtime, size, entry in self.entries())
+		return stats
+
+
+	def __str__(self):
+		stats = self.stats()
+		entries = self.entries()
+		size = sum(size for mtime, size, entry in entries)
+		lookups = stats["hits"] + stats["misses"]
+		rate = 100 * stats["hits"] / lookups if lookups > 0 else 0
+		return (f"Build cache {self.directory}: {len(entries)} entries, {size}/{self.max_size} bytes, "
+			f"{stats['hits']} hits, {stats['misses']} misses ({rate:.1f}% hit rate), {stats['evictions']} evictions")
@@ -0,0 +1,43 @@
+import os
+import sys
+import json
+import socket
+from server import DEFAULT_SOCKET
+
+
+# Sends the files to the compile server and returns its reply as a dictionary.
+def request(files, socket_path = DEFAULT_SOCKET):
+	with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+		s.connect(socket_path)
+		s.sendall((json.dumps({"files": [os.path.abspath(f) for f in files]}) + "\n").encode())
+		with s.makefile("r") as f:
+			return json.loads(f.readline())
+
+
+if __name__ == "__main__":
+	args = [arg for arg in sys.argv[1:] if not arg.startswith("-")]
+	flags = [arg for arg in sys.argv[1:] if arg.startswith("-")]
+	if len(args) < 1:
+		print("Usage: python3 client.py <file.jg> <optional: file.jg> <...> <optional: -socket=path> <optional: -code>")
+	else:
+		socket_path = DEFAULT_SOCKET
+		for flag in flags:
+			if flag.startswith("-socket="):
+				socket_path = flag[len("-socket="):]
+
+		reply = request(args, socket_path)
+		if "error" in reply:
+			print("ERROR:", reply["error"])
+			sys.exit(1)
+
+		for error in reply["errors"]:
+			print("ERROR:", error)
+		if "-code" in flags:
+			print(reply["code"])
+
+		f = open("out.jgc", "w")
+		f.write(reply["code"])
+		f.close()
+		f = open("out.jgc.map", "w")
+		f.write(reply["map"])
+		f.close()
@@ -1,32 +1,410 @@
+import io 
+import os 
 import sys 
+import time 
+import atexit 
+import signal 
+import operator 
+import threading 
+import contextlib 
+import asyncio 
+import codecs 
+import concurrent.futures 
+import bulk 
+import bytecode 
+import streams 
+import snapshot 
+import sourcemap 
+from array import array 
 from collections import defaultdict 
 
 
+# The state of the program being run. An Interpreter keeps its own, and puts it in these while it runs. 
 global functions
-global variables 
+global layouts 
+global heap 
 global stack 
 global program 
 global labels 
 global pc
 global blocks 
+global errors 
 global progress_program_counter
+global output 
+global source 
+global quickener 
+global fuser 
+global gc_threshold 
+global quicken_stats 
+global fuse_stats 
+
+
+# The value of a slot that hasn't been assigned in its frame. Reading it reads the variable of the 
+# same name from the callers instead, the way every function used to see one shared set of variables. 
+class Unset: 
+	def __repr__(self): 
+		return "UNSET" 
+
+
+	def __reduce__(self): # so a snapshot's unset slots are still UNSET when it's loaded 
+		return "UNSET" 
+
+
+UNSET = Unset() 
+
+
+# The variables a function refers to by name, each given a slot number when the program is loaded. 
+class Layout: 
+	def __init__(self, name): 
+		self.name = name 
+		self.slots = {} # key is the name of the variable, value is its slot 
+		self.names = [] # the name of the variable in each slot 
+		self.free = [] # frames of this layout that have returned and can be reused 
+
+
+	# Returns the slot of the variable, giving it one if it doesn't have one yet. 
+	def slot(self, name): 
+		slot = self.slots.get(name) 
+		if slot is None: 
+			slot = len(self.names) 
+			self.slots[name] = slot 
+			self.names.append(name) 
+		return slot 
+
+
+	# Returns an empty frame for a call to this function. 
+	def new_frame(self): 
+		if len(self.free) == 0: 
+			return Frame(self) 
+		frame = self.free.pop() 
+		if len(frame.values) != len(self.names): 
+			del frame.values[len(self.names):] 
+			del frame.types[len(self.names):] 
+		frame.values[:] = self.blank_values 
+		frame.types[:] = self.blank_types 
+		frame.extra = None 
+		frame.pending = None 
+		frame.pending_site = -1 
+		return frame 
+
+
+	def release(self, frame): 
+		if len(self.free) < 64: 
+			if len(self.free) == 0: 
+				self.blank_values = [UNSET] * len(self.names) 
+				self.blank_types = ["EMPTY"] * len(self.names) 
+			self.free.append(frame) 
+
+
+# The variables of one call to a function. Values and types are kept in parallel lists indexed by 
+# the slots of the function's layout. Variables whose names are only known at runtime (eg: the 
+# one named by the value of @id) and that no frame has a slot for get one added to the end. 
+class Frame: 
+	def __init__(self, layout): 
+		self.layout = layout 
+		self.values = [UNSET] * len(layout.names) 
+		self.types = ["EMPTY"] * len(layout.names) 
+		self.extra = None # key is the name of a variable added at runtime, value is its slot 
+		self.pending = None # the frame being filled with the arguments of the upcoming call 
+		self.pending_site = -1 # the PC of the FUNC the pending frame is for 
+
+
+	# Returns the slot of the variable with this name, or None if this frame doesn't have it. 
+	def find(self, name): 
+		slot = self.layout.slots.get(name) 
+		if slot is None and self.extra is not None: 
+			slot = self.extra.get(name) 
+		return slot 
+
+
+	# Adds a variable with this name and returns its slot. 
+	def add(self, name): 
+		if self.extra is None: 
+			self.extra = {} 
+		slot = len(self.values) 
+		self.extra[name] = slot 
+		self.values.append(None) 
+		self.types.append("EMPTY") 
+		return slot 
+
+
+	def __str__(self): 
+		names = self.layout.names + (list(self.extra) if self.extra is not None else []) 
+		return self.layout.name + "{" + ", ".join(f"{name}: {self.types[i]}={self.values[i]}" for i, name in enumerate(names)) + "}" 
+
+
+# The attributes objects have, in the order they were given them. Objects given the same attributes 
+# in the same order share a shape, which maps each attribute to its slot in the objects' values. 
+# Giving an object a new attribute moves it to the shape that adds it to its own, and shapes keep 
+# those transitions, so they form a tree starting at the empty shape, which each heap has its own of. 
+class Shape: 
+	def __init__(self, parent = None, name = None): 
+		self.names = parent.names + [name] if parent is not None else [] # the attribute in each slot 
+		self.slots = {name: slot for slot, name in enumerate(self.names)} # key is the attribute, value is its slot 
+		self.transitions = {} # key is an attribute not in this shape, value is the shape adding it 
+
+
+	# Returns the shape of an object of this shape once it has been given the attribute. 
+	def add(self, name): 
+		shape = self.transitions.get(name) 
+		if shape is None: 
+			shape = Shape(self, name) 
+			self.transitions[name] = shape 
+		return shape 
+
+
+	def __repr__(self): 
+		return f"Shape{self.names}" 
+
+
+# An object made by OBJECT: the values of its attributes by slot, and its shape. Being the list of 
+# values itself, rather than holding one, keeps it to about half the size of a dict. 
+class Instance(list): 
+	__slots__ = ("shape",) 
+
+	def __init__(self, shape): 
+		super().__init__() 
+		self.shape = shape # the empty shape of the heap it's on, to start with 
+
+
+	def get(self, name): 
+		return self[self.shape.slots[name]] 
+
+
+	def set(self, name, value): 
+		slot = self.shape.slots.get(name) 
+		if slot is None: 
+			self.shape = self.shape.add(name) 
+			self.append(value) 
+		else: 
+			self[slot] = value 
+
+
+	def __repr__(self): 
+		return repr(dict(zip(self.shape.names, self))) 
+
+
+# A list made by LIST. Lists that have only held ints keep them in an array('q'), which stores 
+# them unboxed and next to each other; storing anything else in one (or an int that doesn't fit in 
+# 64 bits) moves it to a Python list for good. A list made with a size starts out holding 0s. 
+class List: 
+	__slots__ = ("items",) 
+
+	def __init__(self, size = 0): 
+		self.items = array('q', bytes(8 * size)) 
+
+
+	# Indexes past either end are a mistake in the program, whether the items are in an array or a 
+	# list (rather than counting back from the end, as Python would for a negative one). 
+	def get(self, index): 
+		if not 0 <= index < len(self.items): 
+			raise bulk.ListError(f"index {index} is out of range for a list of {len(self.items)} items") 
+		return self.items[index] 
+
+
+	def set(self, index, value): 
+		if not 0 <= index < len(self.items): 
+			raise bulk.ListError(f"index {index} is out of range for a list of {len(self.items)} items") 
+		if type(self.items) is array and not (type(value) is int and List.fits(value)): 
+			self.items = list(self.items) 
+		self.items[index] = value 
+
+
+	def append(self, value): 
+		if type(self.items) is array and not (type(value) is int and List.fits(value)): 
+			self.items = list(self.items) 
+		self.items.append(value) 
+
+
+	# Returns a List holding the items (an array('q') or a list). 
+	def holding(items): 
+		obj = List() 
+		obj.items = items 
+		return obj 
+
+
+	def fits(value): 
+		return bulk.fits(value) 
+
+
+	def __len__(self): 
+		return len(self.items) 
+
+
+	def __repr__(self): 
+		return repr(list(self.items)) 
+
+
+# The frame holding the objects made by OBJECT. Each is an Instance in a variable named after its type 
+# and the count of objects made before it (eg: human_0), and the program refers to it by that name, so any value that is the 
+# name of an object is a reference to it. Objects are reclaimed by mark-sweep: marking starts at the 
+# frames still in use (the one running, its callers, those of blocks being run and the ones being 
+# filled with arguments) and follows the attributes and values of marked objects. A collection runs before 
+# an OBJECT once as many objects have been made since the last one as it left alive (and at least 
+# threshold), so the heap stays within about twice the size of what's reachable. 
+class Heap(Frame): 
+	threshold = 1024 # by default 
+
+	def __init__(self, threshold = None): 
+		super().__init__(Layout("heap")) 
+		self.threshold = threshold if threshold is not None else Heap.threshold 
+		self.shapes = Shape() # the empty shape, which the shapes of the objects made on this heap start at 
+		self.allocated = 0 # the objects made since the last collection 
+		self.limit = self.threshold # the objects that can be made before the next collection 
+		self.created = 0 
+		self.freed = 0 
+		self.collections = 0 
+		self.peak = 0 # the most objects held at once 
+		self.seconds = 0.0 # the time spent collecting 
+
+
+	# Adds the object (an Instance or a List) under this name. 
+	def new_object(self, name, obj): 
+		if self.allocated >= self.limit: 
+			self.collect() 
+		self.values[self.add(name)] = obj 
+		self.allocated += 1 
+		self.created += 1 
+		if len(self.values) > self.peak: 
+			self.peak = len(self.values) 
+
+
+	# Returns the frames whose variables can refer to objects. 
+	def roots(self): 
+		frames = [stack.frame] + [entry[2] for entry in stack.stack] + [block[3] for block in stack.blocks] 
+		for frame in frames: 
+			while frame is not None: 
+				yield frame 
+				frame = frame.pending 
+
+
+	def collect(self): 
+		start = time.perf_counter() 
+		objects = self.extra if self.extra is not None else {} 
+		marked = set() 
+		work = [] 
+		def mark(values): 
+			for value in values: 
+				if type(value) is str and value in objects and value not in marked: 
+					marked.add(value) 
+					work.append(value) 
+
+		for frame in self.roots(): 
+			mark(frame.values) 
+		while len(work) > 0: 
+			obj = self.values[objects[work.pop()]] 
+			if type(obj) is Instance: 
+				mark(obj.shape.names) 
+				mark(obj) 
+			elif type(obj) is List and type(obj.items) is list: # an array only holds ints 
+				mark(obj.items) 
+
+		live = [name for name in objects if name in marked] # in the order they were made 
+		self.values[:] = [self.values[objects[name]] for name in live] 
+		self.types[:] = [self.types[objects[name]] for name in live] 
+		self.freed += len(objects) - len(live) 
+		self.extra = {name: slot for slot, name in enumerate(live)} 
+		self.allocated = 0 
+		self.limit = max(self.threshold, len(live)) 
+		self.collections += 1 
+		self.seconds += time.perf_counter() - start 
+
+
+	# Returns a dictionary holding the live, peak, created and freed objects, the collections run 
+	# and the seconds spent in them. 
+	def stats(self): 
+		return {"live": len(self.values), "peak": self.peak, "created": self.created, "freed": self.freed, 
+			"collections": self.collections, "seconds": self.seconds} 
+
+
+	def summary(self): 
+		stats = self.stats() 
+		return (f"Heap: {stats['live']} objects live (peak {stats['peak']}), {stats['created']} created, " 
+			f"{stats['freed']} freed by {stats['collections']} collections in {stats['seconds']:.4f} s") 
 
 
 class ProgramStack: 
-	def __init__(self): 
-		self.stack = [] # List of (int, str) tuples representing (PC, function name) 
-		self.function = None
+	def __init__(self, frame = None): 
+		self.stack = [] # List of (int, str, Frame) tuples representing (PC, function name, caller's frame) 
+		self.frame = frame # the frame of the code currently running 
+		self.blocks = [] # List of (int, int, str, Frame, int) tuples representing (end of the block, PC of its EXCON, function name, its frame, PC of the FUNC heading it) 
+		self.block_end = None # the PC of the end of the innermost block being run 
 
 
 	# PC: the program counter we left off at. 
 	# Label: the name of the function we are going to. 
-	def push(self, pc, label): 
-		self.stack.append((pc, label))
+	# Frame: the frame of the function we are going to. 
+	def push(self, pc, label, frame): 
+		self.stack.append((pc, label, self.frame))
+		self.frame = frame 
 
 	
 	# Returns the PC of where we left off. 
 	def pop(self):
-		return self.stack.pop()[0]
+		pc, label, self.frame = self.stack.pop() 
+		return pc 
+
+
+	# Starts running the body of the block passed to the current function. The body is code of the 
+	# caller, so the current function comes off the stack until the body is done. Blocks being run 
+	# are kept on their own stack, so a block can be entered again before it's done (eg: by the 
+	# function invoking it from inside its own body, or by recursion). 
+	def enter_block(self, end, pc): 
+		label = self.stack[-1][1] 
+		frame = self.frame 
+		head = self.pop() 
+		self.blocks.append((end, pc, label, frame, head)) 
+		self.block_end = end 
+
+
+	# Finishes the innermost block being run, putting back the function that ran it. Returns the PC 
+	# of the EXCON that ran it. 
+	def end_block(self): 
+		end, pc, label, frame, head = self.blocks.pop() 
+		self.push(head, label, frame) 
+		self.block_end = self.blocks[-1][0] if len(self.blocks) > 0 else None 
+		return pc 
+
+
+	# Returns the value of the variable with this name from the nearest frame that has assigned it, 
+	# searching the current frame first, then the frames of its callers, then the heap. 
+	def read(self, name): 
+		frame = self.frame 
+		slot = frame.layout.slots.get(name) 
+		if slot is None and frame.extra is not None: 
+			slot = frame.extra.get(name) 
+		if slot is not None and frame.values[slot] is not UNSET: 
+			return frame.values[slot] 
+		for i in range(len(self.stack) - 1, -1, -1): 
+			frame = self.stack[i][2] 
+			slot = frame.layout.slots.get(name) 
+			if slot is None and frame.extra is not None: 
+				slot = frame.extra.get(name) 
+			if slot is not None and frame.values[slot] is not UNSET: 
+				return frame.values[slot] 
+		slot = heap.find(name) 
+		return heap.values[slot] if slot is not None else None 
+
+
+	# Returns the frame and slot of the variable with this name, searching the current frame first, 
+	# then the frames of its callers, then the heap. A name that isn't found is created in the 
+	# caller's frame, since a declaration made by a helper (like INSERT @id) belongs to the code 
+	# that called it. 
+	def find(self, name): 
+		frame = self.frame 
+		slot = frame.find(name) 
+		if slot is not None: 
+			return frame, slot 
+		for i in range(len(self.stack) - 1, -1, -1): 
+			frame = self.stack[i][2] 
+			slot = frame.find(name) 
+			if slot is not None: 
+				return frame, slot 
+		slot = heap.find(name) 
+		if slot is not None: 
+			return heap, slot 
+		frame = self.stack[-1][2] if len(self.stack) > 0 else self.frame 
+		return frame, frame.add(name) 
 
 
 	# Returns the name of the function we are currently in. 
@@ -40,29 +418,228 @@ class ProgramStack:
 
 
 class Code:
-	class Variable: 
-		def __init__(self, var_type = "EMPTY", value = None): 
-			self.type = var_type 
-			self.value = value 
+	# Operands are decoded once when the program is loaded, and variables named in the code are 
+	# given a slot in the layout of the function they appear in (Code.layout, while building). 
+	# Leading @s represent indirection: '@x' is the value of x, '@@x' is the value of the variable 
+	# named by the value of x, and so on. value() returns the operand read as a literal or a 
+	# variable's value, and int_value() returns it read as an int. 
+	class Number: 
+		def __init__(self, text, value = None): 
+			self.text = text 
+			self.literal = text if value is None else value 
+			self.number = int(text) 
+
+
+		def value(self): 
+			return self.literal 
+
+
+		def int_value(self): 
+			return self.number 
 
 
 		def __str__(self): 
-			return f"{self.type}={str(self.value)}"
+			return self.text 
 
 
-		def __repr__(self): 
-			return str(self)
+	# A string literal, or the name of a variable when used as a value (eg: ASSIGN id, temp). 
+	class Name: 
+		def __init__(self, text): 
+			self.text = text 
+			self.name = Code.unescape(text) 
+
+
+		def value(self): 
+			return self.name 
+
+
+		def __str__(self): 
+			return self.text 
+
+
+	# A variable named in the code, which lives in a slot of the current frame. 
+	class Local: 
+		def __init__(self, text): 
+			self.text = text 
+			self.name = text 
+			self.slot = Code.layout.slot(text) 
+
+
+		def get(self): 
+			value = stack.frame.values[self.slot] 
+			return value if value is not UNSET else stack.read(self.name) 
+
+
+		def set(self, value): 
+			stack.frame.values[self.slot] = value 
+
+
+		def get_type(self): 
+			return stack.frame.types[self.slot] 
+
+
+		def locate(self): 
+			return stack.frame, self.slot 
+
+
+		def set_type(self, var_type): 
+			stack.frame.types[self.slot] = var_type 
+
+
+		def int_value(self): 
+			value = stack.frame.values[self.slot] 
+			return int(value if value is not UNSET else stack.read(self.name)) 
+
+
+		def __str__(self): 
+			return self.text 
+
+
+	# '@x': the value of the variable x. 
+	class Reference: 
+		def __init__(self, text): 
+			self.text = text 
+			self.name = text[1:] 
+			self.slot = Code.layout.slot(self.name) 
+
+
+		def value(self): 
+			value = stack.frame.values[self.slot] 
+			return value if value is not UNSET else stack.read(self.name) 
+
+
+		def int_value(self): 
+			value = stack.frame.values[self.slot] 
+			if value is UNSET: 
+				value = stack.read(self.name) 
+			if isinstance(value, str) and not value.isnumeric(): 
+				value = stack.read(value) 
+			return int(value) 
+
+
+		def __str__(self): 
+			return self.text 
+
+
+	# '@@x', '@@@x', ...: follows the names stored in the variables, starting at x. 
+	class Indirect: 
+		def __init__(self, text): 
+			self.text = text 
+			self.name = text.lstrip('@') 
+			self.depth = len(text) - len(self.name) 
+			self.slot = Code.layout.slot(self.name) 
+
+
+		def value(self): 
+			value = stack.frame.values[self.slot] 
+			if value is UNSET: 
+				value = stack.read(self.name) 
+			depth = self.depth - 1 
+			while depth > 0 and isinstance(value, str): 
+				value = stack.read(value) 
+				depth -= 1 
+			return value 
+
+
+		def int_value(self): 
+			value = self.value() 
+			if isinstance(value, str) and not value.isnumeric(): 
+				value = stack.read(value) 
+			return int(value) 
+
+
+		def __str__(self): 
+			return self.text 
+
+
+	# A variable whose name is the value of a reference (eg: '@id' names the variable held in id), 
+	# so it can only be found at runtime. 
+	class Dynamic: 
+		def __init__(self, text): 
+			self.text = text 
+			self.source = Code.operand(text) 
+
+
+		def locate(self): 
+			return stack.find(self.source.value()) 
+
+
+		def get(self): 
+			return stack.read(self.source.value()) 
+
+
+		def set(self, value): 
+			frame, slot = stack.find(self.source.value()) 
+			frame.values[slot] = value 
+
+
+		def get_type(self): 
+			frame, slot = stack.find(self.source.value()) 
+			return frame.types[slot] 
+
+
+		def set_type(self, var_type): 
+			frame, slot = stack.find(self.source.value()) 
+			frame.types[slot] = var_type 
+
+
+		def __str__(self): 
+			return self.text 
+
+
+	# Returns the decoded operand for its text, when it is used as a value. 
+	def operand(text): 
+		if len(text) == 0 or text[0] != '@': 
+			return Code.Number(text) if text.isnumeric() else Code.Name(text) 
+		elif len(text) > 1 and text[1] == '@': 
+			return Code.Indirect(text) 
+		else: 
+			return Code.Reference(text) 
+
+
+	# Returns the decoded operand for its text, when it is used as an int. A plain name here means 
+	# the value of that variable. 
+	def int_operand(text): 
+		if len(text) > 0 and text[0] != '@' and not text.isnumeric(): 
+			return Code.Local(text) 
+		return Code.operand(text) 
+
+
+	# Returns the decoded operand for its text, when it names the variable to use. 
+	def variable(text): 
+		if len(text) > 0 and text[0] == '@': 
+			return Code.Dynamic(text) 
+		return Code.Local(text) 
+
+
+	# Returns the text of a string literal with its escape sequences replaced. 
+	def unescape(text): 
+		if '\\' not in text: 
+			return text 
+		out = "" 
+		i = 0 
+		while i < len(text): 
+			if text[i] == '\\' and i + 1 < len(text) and text[i+1] in Code.escapes: 
+				out += Code.escapes[text[i+1]] 
+				i += 2 
+			else: 
+				out += text[i] 
+				i += 1 
+		return out 
+
+
+	escapes = {'n': '\n', 't': '\t', '\\': '\\', '"': '"'} 
 
 
 	class Func: 
-		def __init__(self, args): 
-			comma = args.find(',') 
-			if comma > 0: 
-				self.label = args[:comma]
-				self.var_name = args[comma+2:]
-			else:
-				self.label = args 
-				self.var_name = None 
+		def __init__(self, parts): 
+			self.label = parts[0] 
+			self.var_name = parts[1] if len(parts) > 1 else None 
+			self.result = Code.variable(self.var_name) if self.var_name is not None else None 
+			self.site = -1 # the PC of this instruction 
+			self.layout = None # the layout of the function being called 
+			self.target = None # the PC the call continues at, before the first instruction of the function 
+			self.resume = None # the PC the function returns to 
 	
 
 		def __str__(self): 
@@ -75,17 +652,45 @@ class Code:
 
 		def execute(self):
 			global pc 
-			stack.push(pc, self.label)
-			pc = functions[self.label] - 1
-
+			frame = stack.frame 
+			if frame.pending_site == self.site: 
+				callee = frame.pending 
+				frame.pending = None 
+				frame.pending_site = -1 
+			else: 
+				callee = self.layout.new_frame() 
+			stack.push(pc, self.label, callee)
+			pc = self.target 
+
+
+		def thread(self, engine, pc): 
+			program_stack = stack 
+			label = self.label 
+			site = self.site 
+			layout = self.layout 
+			target = self.target 
+			advance = engine.advance 
+			def op(): 
+				frame = program_stack.frame 
+				if frame.pending_site == site: 
+					callee = frame.pending 
+					frame.pending = None 
+					frame.pending_site = -1 
+				else: 
+					callee = layout.new_frame() 
+				program_stack.push(pc, label, callee) 
+				return advance(target) 
+			return op 
 
 
 	class Return:
-		def __init__(self, args): 
-			if len(args) > 0:  
-				self.var_name = args 
+		def __init__(self, parts): 
+			if len(parts) > 0:  
+				self.var_name = parts[0] 
+				self.source = Code.variable(self.var_name) 
 			else:
 				self.var_name = None 
+				self.source = None 
 
 
 		def __str__(self): 
@@ -98,23 +703,47 @@ class Code:
 
 		def execute(self):
 			global pc 
-			if self.var_name is not None:
-				destination_var = program[stack.last_pc()].var_name 
-				variables[destination_var] = variables[self.var_name] 
-			pc = stack.pop()
+			callee = stack.frame 
+			if self.source is not None:
+				value = self.source.get() 
+				var_type = self.source.get_type() 
+			call = program[stack.pop()]
+			if self.source is not None and call.result is not None: 
+				frame, slot = call.result.locate() 
+				frame.values[slot] = value 
+				frame.types[slot] = var_type 
+			callee.layout.release(callee) 
+			pc = call.resume 
+
+
+		def thread(self, engine, pc): 
+			program_stack = stack 
+			program = engine.program 
+			source = self.source 
+			advance = engine.advance 
+			def op(): 
+				callee = program_stack.frame 
+				if source is not None: 
+					value = source.get() 
+					var_type = source.get_type() 
+				call = program[program_stack.pop()] 
+				if source is not None and call.result is not None: 
+					frame, slot = call.result.locate() 
+					frame.values[slot] = value 
+					frame.types[slot] = var_type 
+				callee.layout.release(callee) 
+				return advance(call.resume) 
+			return op 
 
 
 	class Insert: 
-		def __init__(self, args): 
-			parts = args.split(', ')
-			self.var_name_indirect = parts[0][0] == '@' 
-			self.var_name = parts[0][1:] if self.var_name_indirect else parts[0]
-			self.type_indirect = parts[1][0] == '@'
-			self.type = parts[1][1:] if self.type_indirect else parts[1] 
+		def __init__(self, parts): 
+			self.var_name = Code.variable(parts[0]) 
+			self.type = Code.operand(parts[1]) 
 
 
 		def __str__(self): 
-			return "INSERT " + ('@' if self.var_name_indirect else "") + self.var_name + ", " + ('@' if self.type_indirect else "") + self.type 
+			return f"INSERT {self.var_name}, {self.type}" 
 
 
 		def __repr__(self): 
@@ -122,28 +751,25 @@ class Code:
 
 
 		def execute(self): 
-			if self.var_name_indirect: 
-				var_name = variables[self.var_name].value
-			else:
-				var_name = self.var_name 
+			var_type = self.type.value() 
+			frame, slot = self.var_name.locate() 
+			frame.types[slot] = var_type 
+			frame.values[slot] = None
+			#print(var_name, "is", var_type) 
 
-			if self.type_indirect: 
-				var_type = variables[self.type].value
-			else: 
-				var_type = self.type 
 
-			variables[var_name].type = var_type
-			variables[var_name].value = None
-			#print(var_name, "is", var_type) 
+		def thread(self, engine, pc): 
+			return engine.straight(pc, self.execute) 
 
 
 	class Assign: 
-		def __init__(self, args): 
-			parts = args.split(', ') 
-			self.var_name = parts[0] 
-			self.value = ', '.join(parts[1:])
-			if self.value.isnumeric(): 
-				self.value = int(self.value)
+		def __init__(self, parts): 
+			self.var_name = Code.variable(parts[0]) 
+			value = ', '.join(parts[1:])
+			if value.isnumeric(): 
+				self.value = Code.Number(value, int(value)) 
+			else: 
+				self.value = Code.operand(value) 
 			
 			self.type = parts[2] if len(parts) == 3 else None 
 
@@ -157,20 +783,80 @@ class Code:
 
 
 		def execute(self):
-			var_name = Code.var_at(self.var_name) 
-			value = Code.var_at(self.value) 
-			
-			variables[var_name].value = value
-			if self.type is not None: 
-				variables[var_name].type = self.type 
+			value = self.value.value() 
+			if self.type is None: 
+				self.var_name.set(value) 
+			else: 
+				frame, slot = self.var_name.locate() 
+				frame.values[slot] = value
+				frame.types[slot] = self.type 
+
+
+		def thread(self, engine, pc): 
+			if self.type is not None or not isinstance(self.var_name, Code.Local): 
+				return engine.straight(pc, self.execute) 
+			program_stack = stack 
+			slot = self.var_name.slot 
+			nxt = engine.next(pc) 
+			if isinstance(self.value, Code.Number) or isinstance(self.value, Code.Name): 
+				constant = self.value.value() 
+				def op(): 
+					program_stack.frame.values[slot] = constant 
+					return nxt if nxt is not None else engine.advance(pc) 
+			else: 
+				value = self.value.value 
+				def op(): 
+					program_stack.frame.values[slot] = value() 
+					return nxt if nxt is not None else engine.advance(pc) 
+			return op 
+
+
+	# An ASSIGN directly before a FUNC that stores into a variable of the function being called. 
+	# It passes an argument, so it stores into the frame being prepared for that call instead of 
+	# into the current frame. 
+	class Argument(Assign): 
+		def __init__(self, assign, site, layout, slot): 
+			self.var_name = assign.var_name 
+			self.value = assign.value 
+			self.type = assign.type 
+			self.site = site # the PC of the FUNC this is an argument of 
+			self.layout = layout # the layout of the function being called 
+			self.slot = slot # the slot of the variable in the function being called 
+
 
-			#print(var_name, "=", value)
-			#print(variables)
+		def execute(self): 
+			frame = stack.frame 
+			if frame.pending_site != self.site: 
+				frame.pending = self.layout.new_frame() 
+				frame.pending_site = self.site 
+			frame.pending.values[self.slot] = self.value.value() 
+			if self.type is not None: 
+				frame.pending.types[self.slot] = self.type 
+
+
+		def thread(self, engine, pc): 
+			program_stack = stack 
+			site = self.site 
+			layout = self.layout 
+			slot = self.slot 
+			value = self.value.value 
+			var_type = self.type 
+			nxt = engine.next(pc) 
+			def op(): 
+				frame = program_stack.frame 
+				if frame.pending_site != site: 
+					frame.pending = layout.new_frame() 
+					frame.pending_site = site 
+				frame.pending.values[slot] = value() 
+				if var_type is not None: 
+					frame.pending.types[slot] = var_type 
+				return nxt if nxt is not None else engine.advance(pc) 
+			return op 
 
 
 	class Input: 
-		def __init__(self, args, var_type):
-			self.var_name = args  
+		def __init__(self, parts, var_type):
+			self.var_name = Code.variable(parts[0]) 
 			self.type = var_type
 
 
@@ -183,18 +869,21 @@ class Code:
 
 
 		def execute(self):
-			value = input() 
+			value = source.read() 
 			if self.type == 'I':
 				value = int(value) 
-			variables[self.var_name].value = value
+			self.var_name.set(value)
+
+
+		def thread(self, engine, pc): 
+			return engine.straight(pc, self.execute) 
 
 
 	class Add: 
-		def __init__(self, args):	
-			parts = args.split(', ')
-			self.result = parts[0]
-			self.arg1 = parts[1] 
-			self.arg2 = parts[2] 
+		def __init__(self, parts):	
+			self.result = Code.variable(parts[0])
+			self.arg1 = Code.int_operand(parts[1]) 
+			self.arg2 = Code.int_operand(parts[2]) 
 
 
 		def __str__(self): 
@@ -206,18 +895,20 @@ class Code:
 
 
 		def execute(self):
-			arg1 = Code.int_value_of(self.arg1) 
-			arg2 = Code.int_value_of(self.arg2)  
-			result = Code.var_at(self.result) 
-			variables[result].value = arg1 + arg2 
+			arg1 = self.arg1.int_value() 
+			arg2 = self.arg2.int_value() 
+			self.result.set(arg1 + arg2) 
+
+
+		def thread(self, engine, pc): 
+			return Code.thread_arithmetic(self, engine, pc, operator.add) 
 
 
 	class Sub: 
-		def __init__(self, args):	
-			parts = args.split(', ')
-			self.result = parts[0]
-			self.arg1 = parts[1] 
-			self.arg2 = parts[2] 
+		def __init__(self, parts):	
+			self.result = Code.variable(parts[0])
+			self.arg1 = Code.int_operand(parts[1]) 
+			self.arg2 = Code.int_operand(parts[2]) 
 
 
 		def __str__(self): 
@@ -229,16 +920,19 @@ class Code:
 
 
 		def execute(self):
-			arg1 = Code.int_value_of(self.arg1) 
-			arg2 = Code.int_value_of(self.arg2)  
-			result = Code.var_at(self.result) 
-			variables[result].value = arg1 - arg2 
+			arg1 = self.arg1.int_value() 
+			arg2 = self.arg2.int_value() 
+			self.result.set(arg1 - arg2) 
+
+
+		def thread(self, engine, pc): 
+			return Code.thread_arithmetic(self, engine, pc, operator.sub) 
 
 
 
 	class Print: 
-		def __init__(self, args): 
-			self.var_name = args 
+		def __init__(self, parts): 
+			self.var_name = Code.operand(parts[0]) 
 
 
 		def __str__(self):
@@ -250,15 +944,22 @@ class Code:
 
 
 		def execute(self):
-			value = Code.var_at(self.var_name) 
-			if isinstance(value, str) and '\\n' in value: 
-				value = value.replace('\\n', '\n')
-			print(value, end="")
+			output.write(self.var_name.value())
+
+
+		def thread(self, engine, pc): 
+			value = self.var_name.value 
+			write = output.write 
+			nxt = engine.next(pc) 
+			def op(): 
+				write(value()) 
+				return nxt if nxt is not None else engine.advance(pc) 
+			return op 
 
 
 	class ExecuteContentsCondition: 
-		def __init__(self, args, cond): 
-			self.var_name = args
+		def __init__(self, parts, cond): 
+			self.var_name = parts[0] if len(parts) > 0 else ""
 			self.cond = cond 
 
 
@@ -278,7 +979,7 @@ class Code:
 
 
 	class ExecuteContents: 
-		def __init__(self, args): 
+		def __init__(self, parts): 
 			pass
 
 
@@ -294,35 +995,33 @@ class Code:
 			global pc
 			global progress_program_counter 
 			
-			#blocks.append((program[stack[-1][0]].contents_end, pc))
-			top_statement = program[stack.last_pc()] # FUNC call
-			
-			# This statement must be a block, so block_start will be defined
-			old_pc = pc 
-			pc = top_statement.contents_start + 1
-
-			bottom_statement = program[top_statement.contents_end] # last statement in block
-			bottom_statement.block_end_branch_to = old_pc # when done with block, branch here 
-			bottom_statement.block_end_func_name = stack.current_function() 
-			bottom_statement.block_end_add_stack = stack.pop() # when done with block, add this back to the stack 
-
-			#pc = program[stack[-1][0]].contents_start
+			# The FUNC that called us must head a block, so it's in the table of blocks 
+			contents_start, contents_end = blocks[stack.last_pc()] 
+			stack.enter_block(contents_end, pc) # when done with the block, come back here 
+			pc = contents_start + 1
 			progress_program_counter = False 
 
 			#print("Changing PC from", old_pc, "to", pc) 
 
 
+		def thread(self, engine, pc): 
+			program_stack = stack 
+			block_table = blocks 
+			def op(): 
+				contents_start, contents_end = block_table[program_stack.last_pc()] 
+				program_stack.enter_block(contents_end, pc) 
+				return contents_start + 1 
+			return op 
+
+
 	class Copy: 
-		def __init__(self, args):	
-			parts = args.split(', ')
-			self.dest_var_indirect = parts[0][0] == '@' 
-			self.dest_var = parts[0][1:] if self.dest_var_indirect else parts[0] 
-			self.source_var_indirect = parts[1][0] == '@' 
-			self.source_var = parts[1][1:] if self.source_var_indirect else parts[1]
+		def __init__(self, parts):	
+			self.dest_var = Code.variable(parts[0]) 
+			self.source_var = Code.variable(parts[1]) 
 
 
 		def __str__(self): 
-			return "COPY " + ('@' if self.dest_var_indirect else '') + self.dest_var + ", " + ('@' if self.source_var_indirect else '') + self.source_var
+			return f"COPY {self.dest_var}, {self.source_var}"
 
 
 		def __repr__(self): 
@@ -330,14 +1029,17 @@ class Code:
 
 
 		def execute(self):
-			dest_var = variables[self.dest_var].value if self.dest_var_indirect else self.dest_var 
-			source_var = variables[self.source_var].value if self.source_var_indirect else self.source_var
-			variables[dest_var].value = variables[source_var].value
+			self.dest_var.set(self.source_var.get())
+
+
+		def thread(self, engine, pc): 
+			return engine.straight(pc, self.execute) 
 
 	
 	class Branch: 
-		def __init__(self, args): 
-			self.label = args
+		def __init__(self, parts): 
+			self.label = parts[0]
+			self.target = None # the PC of the label 
 
 
 		def __str__(self): 
@@ -350,17 +1052,25 @@ class Code:
 
 		def execute(self): 
 			global pc 
-			#print("Branch from", pc, "to", labels[stack[-1][1]][self.label])
-			pc = labels[stack.current_function()][self.label]
+			#print("Branch from", pc, "to", self.target)
+			pc = self.target 
+
+
+		def thread(self, engine, pc): 
+			target = self.target 
+			advance = engine.advance 
+			def op(): 
+				return advance(target) 
+			return op 
 
 
 	class BranchConditional:
-		def __init__(self, args, cond): 
-			parts = args.split(', ') 
-			self.arg1 = parts[0] 
-			self.arg2 = parts[1] 
+		def __init__(self, parts, cond): 
+			self.arg1 = Code.int_operand(parts[0]) 
+			self.arg2 = Code.int_operand(parts[1]) 
 			self.label = parts[2]
 			self.cond = cond 
+			self.target = None # the PC of the label 
 
 
 		def __str__(self): 
@@ -373,20 +1083,33 @@ class Code:
 
 		def execute(self): 
 			global pc 
-			arg1 = Code.int_value_of(self.arg1) 
-			arg2 = Code.int_value_of(self.arg2) 
+			arg1 = self.arg1.int_value() 
+			arg2 = self.arg2.int_value() 
 			#print(self.arg1, self.arg2, arg1, arg2, self.cond, Code.condition(arg1, arg2, self.cond)) 
 			if Code.condition(arg1, arg2, self.cond): 
-				#print("Branch taken:", pc, labels[stack[-1][1]][self.label])
-				pc = labels[stack.current_function()][self.label] 
+				#print("Branch taken:", pc, self.target)
+				pc = self.target 
+
+
+		def thread(self, engine, pc): 
+			target = self.target 
+			compare = Code.operators[self.cond] 
+			arg1 = Code.int_reader(self.arg1) 
+			arg2 = Code.int_reader(self.arg2) 
+			advance = engine.advance 
+			nxt = engine.next(pc) 
+			def op(): 
+				if compare(arg1(), arg2()): 
+					return advance(target) 
+				return nxt if nxt is not None else advance(pc) 
+			return op 
 
 
 	class Compare: 
-		def __init__(self, args, sign): 
-			parts = args.split(', ') 
-			self.result = parts[0] 
-			self.arg1 = parts[1] 
-			self.arg2 = parts[2]
+		def __init__(self, parts, sign): 
+			self.result = Code.variable(parts[0]) 
+			self.arg1 = Code.int_operand(parts[1]) 
+			self.arg2 = Code.int_operand(parts[2])
 			self.sign = sign 
 
 
@@ -399,20 +1122,33 @@ class Code:
 
 
 		def execute(self):
-			result = Code.var_at(self.result) 
-			arg1 = Code.int_value_of(self.arg1) 
-			arg2 = Code.int_value_of(self.arg2) 
+			arg1 = self.arg1.int_value() 
+			arg2 = self.arg2.int_value() 
 			boolean = Code.condition(arg1, arg2, self.sign) 
-			variables[result].value = 1 if boolean else 0
-			variables[result].type = "bool"
+			frame, slot = self.result.locate() 
+			frame.values[slot] = 1 if boolean else 0
+			frame.types[slot] = "bool"
 			#print("Compare:", self.arg1, self.arg2, arg1, arg2, self.result, result, boolean, self.sign) 
 
 
-	class Object: 
-		counter = 0 
+		def thread(self, engine, pc): 
+			compare = Code.operators[self.sign] 
+			arg1 = Code.int_reader(self.arg1) 
+			arg2 = Code.int_reader(self.arg2) 
+			locate = self.result.locate 
+			nxt = engine.next(pc) 
+			def op(): 
+				boolean = compare(arg1(), arg2()) 
+				frame, slot = locate() 
+				frame.values[slot] = 1 if boolean else 0 
+				frame.types[slot] = "bool" 
+				return nxt if nxt is not None else engine.advance(pc) 
+			return op 
+
 
-		def __init__(self, args): 
-			self.result = args
+	class Object: 
+		def __init__(self, parts): 
+			self.result = Code.variable(parts[0])
 
 
 		def __str__(self): 
@@ -424,20 +1160,29 @@ class Code:
 
 
 		def execute(self): 
-			result = Code.var_at(self.result) 
-			name = variables[result].type + '_' + str(Code.Object.counter) 
-			variables[name].value = {}
-			variables[result].value = name
-			Code.Object.counter += 1
-			#print("Object:", name, result, variables[name])
+			frame, slot = self.result.locate() 
+			name = frame.types[slot] + '_' + str(heap.created) 
+			heap.new_object(name, Instance(heap.shapes)) 
+			frame.values[slot] = name
+			#print("Object:", name, frame, heap)
 
 
+		def thread(self, engine, pc): 
+			return engine.straight(pc, self.execute) 
+
+
+	# Sets an attribute of an object. Each ATTRIBUTE caches the shape of the last object it set and 
+	# the attribute it set, with the slot it went in and the shape the object has after, so setting 
+	# it again on an object of the same shape is a shape check and a store. 
 	class Attribute: 
-		def __init__(self, args):
-			parts = args.split(', ')
-			self.obj = parts[0] 
-			self.var_name = parts[1] 
-			self.value = parts[2] 
+		def __init__(self, parts):
+			self.obj = Code.variable(parts[0]) 
+			self.var_name = Code.operand(parts[1]) 
+			self.value = Code.operand(parts[2]) 
+			self.shape = None # the shape the cache is for 
+			self.name = None 
+			self.after = None # the shape of the object after it's set 
+			self.slot = -1 
 
 
 		def __str__(self): 
@@ -449,20 +1194,38 @@ class Code:
 
 
 		def execute(self): 
-			obj = variables[Code.var_at(self.obj)].value 
-			var_name = Code.var_at(self.var_name) 
-			value = Code.var_at(self.value)
+			obj = stack.read(self.obj.get()) 
+			var_name = self.var_name.value() 
+			value = self.value.value()
 			#print("Attribute test:", obj, var_name, value) 
-			variables[obj].value[var_name] = value 	
-			#print(obj, variables[obj].value)
-
-
+			if obj.shape is self.shape and var_name == self.name: 
+				if self.after is self.shape: 
+					obj[self.slot] = value 
+				else: 
+					obj.shape = self.after 
+					obj.append(value) 
+				return 
+			self.shape = obj.shape 
+			self.name = var_name 
+			obj.set(var_name, value) 
+			self.after = obj.shape 
+			self.slot = obj.shape.slots[var_name] 
+
+
+		def thread(self, engine, pc): 
+			return engine.straight(pc, self.execute) 
+
+
+	# Gets an attribute of an object, caching the shape and attribute of the last one it got with 
+	# the slot it was in, like ATTRIBUTE. 
 	class Retrieve: 
-		def __init__(self, args): 
-			parts = args.split(', ') 
-			self.result = parts[0] 
-			self.obj = parts[1] 
-			self.var_name = parts[2] 
+		def __init__(self, parts): 
+			self.result = Code.variable(parts[0]) 
+			self.obj = Code.variable(parts[1]) 
+			self.var_name = Code.operand(parts[2]) 
+			self.shape = None # the shape the cache is for 
+			self.name = None 
+			self.slot = -1 
 
 
 		def __str__(self): 
@@ -474,44 +1237,299 @@ class Code:
 
 
 		def execute(self): 
-			result = Code.var_at(self.result) 
-			obj = variables[Code.var_at(self.obj)].value
-			var_name = Code.var_at(self.var_name) 
-			#print("Retrieve:", result, obj, var_name, variables[obj].value)
-			#print("All variables:", variables)
-			#print(result, obj, var_name) 
-			if not isinstance(obj, dict): # TODO fix this 
-				variables[result].value = variables[obj].value[var_name]
-			else: 
-				variables[result].value = obj[var_name]
-			#print(obj, variables[obj].value) 
+			obj = self.obj.get()
+			var_name = self.var_name.value() 
+			#print("Retrieve:", obj, var_name)
+			if type(obj) is not Instance: # the name of the object, rather than the object 
+				obj = stack.read(obj) 
+			if obj.shape is not self.shape or var_name != self.name: 
+				self.slot = obj.shape.slots[var_name] 
+				self.shape = obj.shape 
+				self.name = var_name 
+			self.result.set(obj[self.slot])
 
 
-	# Returns the argument interpreted as an int. Leading @s represent indirection. 
-	def int_value_of(arg): 
-		#print("int_value_of(",arg,")")
-		if isinstance(arg, int): 
-			return arg 
-		
-		arg = Code.var_at(arg) 
-		#print("var_at(",arg,")")
-
-		if isinstance(arg, str) and not arg.isnumeric():
-			arg = variables[arg].value 
-		#print("int(",arg,")")
-		return int(arg) 
-
-
-	# Returns the variable pointed to by the argument. If the argument has no indirection, returns itself. 
-	def var_at(arg):
-		if isinstance(arg, str): 
-			while arg[0] == '@':
-				next_arg = variables[arg.replace('@', '')].value
-				if not isinstance(next_arg, str): 
-					arg = next_arg
-					break 
-				arg = '@' * (arg.count('@') - 1) + next_arg
-		return arg
+		def thread(self, engine, pc): 
+			return engine.straight(pc, self.execute) 
+
+
+	# Returns the List the operand refers to, either directly or by the name it has on the heap. 
+	def list(operand): 
+		value = operand.get() 
+		return value if type(value) is List else stack.read(value) 
+
+
+	# Puts the List on the heap, like OBJECT does with objects, and its name in the variable. 
+	def new_list(operand, obj): 
+		frame, slot = operand.locate() 
+		name = frame.types[slot] + '_' + str(heap.created) 
+		heap.new_object(name, obj) 
+		frame.values[slot] = name 
+
+
+	# Returns the List or the int the operand refers to, following the names of variables and lists 
+	# (eg: a value argument holding the name of a variable that holds a list). 
+	def list_or_int(operand): 
+		value = operand.value() 
+		while type(value) is str and not value.lstrip('-').isnumeric(): 
+			value = stack.read(value) 
+		return value if type(value) is List else int(value) 
+
+
+	# LIST l[, size]: makes a List on the heap, like OBJECT, and puts its name in l. 
+	class ListCreate: 
+		def __init__(self, parts): 
+			self.result = Code.variable(parts[0]) 
+			self.size = Code.int_operand(parts[1]) if len(parts) > 1 else None 
+
+
+		def __str__(self): 
+			return f"LIST {self.result}" + (f", {self.size}" if self.size is not None else "") 
+
+
+		def __repr__(self): 
+			return str(self) 
+
+
+		def execute(self): 
+			Code.new_list(self.result, List(self.size.int_value() if self.size is not None else 0)) 
+
+
+		def thread(self, engine, pc): 
+			return engine.straight(pc, self.execute) 
+
+
+	# LGET result, l, index: gets the item at the index of the list. 
+	class ListGet: 
+		def __init__(self, parts): 
+			self.result = Code.variable(parts[0]) 
+			self.obj = Code.variable(parts[1]) 
+			self.index = Code.int_operand(parts[2]) 
+
+
+		def __str__(self): 
+			return f"LGET {self.result}, {self.obj}, {self.index}" 
+
+
+		def __repr__(self): 
+			return str(self) 
+
+
+		def execute(self): 
+			self.result.set(Code.list(self.obj).get(self.index.int_value())) 
+
+
+		def thread(self, engine, pc): 
+			return engine.straight(pc, self.execute) 
+
+
+	# LSET l, index, value: sets the item at the index of the list. 
+	class ListSet: 
+		def __init__(self, parts): 
+			self.obj = Code.variable(parts[0]) 
+			self.index = Code.int_operand(parts[1]) 
+			self.value = Code.operand(parts[2]) 
+
+
+		def __str__(self): 
+			return f"LSET {self.obj}, {self.index}, {self.value}" 
+
+
+		def __repr__(self): 
+			return str(self) 
+
+
+		def execute(self): 
+			Code.list(self.obj).set(self.index.int_value(), self.value.value()) 
+
+
+		def thread(self, engine, pc): 
+			return engine.straight(pc, self.execute) 
+
+
+	# LAPPEND l, value: adds the value to the end of the list. 
+	class ListAppend: 
+		def __init__(self, parts): 
+			self.obj = Code.variable(parts[0]) 
+			self.value = Code.operand(parts[1]) 
+
+
+		def __str__(self): 
+			return f"LAPPEND {self.obj}, {self.value}" 
+
+
+		def __repr__(self): 
+			return str(self) 
+
+
+		def execute(self): 
+			Code.list(self.obj).append(self.value.value()) 
+
+
+		def thread(self, engine, pc): 
+			return engine.straight(pc, self.execute) 
+
+
+	# LSIZE result, l: gets the number of items in the list. 
+	class ListSize: 
+		def __init__(self, parts): 
+			self.result = Code.variable(parts[0]) 
+			self.obj = Code.variable(parts[1]) 
+
+
+		def __str__(self): 
+			return f"LSIZE {self.result}, {self.obj}" 
+
+
+		def __repr__(self): 
+			return str(self) 
+
+
+		def execute(self): 
+			self.result.set(len(Code.list(self.obj).items)) 
+
+
+		def thread(self, engine, pc): 
+			return engine.straight(pc, self.execute) 
+
+
+	# The bulk list operations, which each do in one instruction what would take a loop over the 
+	# items. They're worked out by bulk.py, with NumPy if it's installed. 
+	# LADD/LSUB result, l, other: makes the list of the items of l plus (or minus) the items of the 
+	# other list, or an int. 
+	class ListArithmetic: 
+		def __init__(self, parts, operation): 
+			self.result = Code.variable(parts[0]) 
+			self.obj = Code.variable(parts[1]) 
+			self.other = Code.operand(parts[2]) 
+			self.operation = operation 
+
+
+		def __str__(self): 
+			return f"L{self.operation.upper()} {self.result}, {self.obj}, {self.other}" 
+
+
+		def __repr__(self): 
+			return str(self) 
+
+
+		def execute(self): 
+			other = Code.list_or_int(self.other) 
+			items = bulk.elementwise(self.operation, Code.list(self.obj).items, other.items if type(other) is List else other) 
+			Code.new_list(self.result, List.holding(items)) 
+
+
+		def thread(self, engine, pc): 
+			return engine.straight(pc, self.execute) 
+
+
+	# LSUM/LMIN/LMAX result, l: gets the sum, the smallest or the largest of the items of l. 
+	class ListReduce: 
+		functions = {"SUM": bulk.total, "MIN": bulk.smallest, "MAX": bulk.largest} 
+
+		def __init__(self, parts, kind): 
+			self.result = Code.variable(parts[0]) 
+			self.obj = Code.variable(parts[1]) 
+			self.kind = kind 
+			self.function = Code.ListReduce.functions[kind] 
+
+
+		def __str__(self): 
+			return f"L{self.kind} {self.result}, {self.obj}" 
+
+
+		def __repr__(self): 
+			return str(self) 
+
+
+		def execute(self): 
+			self.result.set(self.function(Code.list(self.obj).items)) 
+
+
+		def thread(self, engine, pc): 
+			return engine.straight(pc, self.execute) 
+
+
+	# LFILL l, value: sets every item of l to the value. 
+	class ListFill: 
+		def __init__(self, parts): 
+			self.obj = Code.variable(parts[0]) 
+			self.value = Code.operand(parts[1]) 
+
+
+		def __str__(self): 
+			return f"LFILL {self.obj}, {self.value}" 
+
+
+		def __repr__(self): 
+			return str(self) 
+
+
+		def execute(self): 
+			obj = Code.list(self.obj) 
+			obj.items = bulk.fill(len(obj.items), self.value.value()) 
+
+
+		def thread(self, engine, pc): 
+			return engine.straight(pc, self.execute) 
+
+
+	# LRANGE result, start, end: makes the list of the ints from start up to end. 
+	class ListRange: 
+		def __init__(self, parts): 
+			self.result = Code.variable(parts[0]) 
+			self.start = Code.int_operand(parts[1]) 
+			self.end = Code.int_operand(parts[2]) 
+
+
+		def __str__(self): 
+			return f"LRANGE {self.result}, {self.start}, {self.end}" 
+
+
+		def __repr__(self): 
+			return str(self) 
+
+
+		def execute(self): 
+			Code.new_list(self.result, List.holding(bulk.span(self.start.int_value(), self.end.int_value()))) 
+
+
+		def thread(self, engine, pc): 
+			return engine.straight(pc, self.execute) 
+
+
+	# LFILTER result, l, condition, value: makes the list of the items of l that compare to the 
+	# value by the condition (gt, lt, eq, ge, le or ne). 
+	class ListFilter: 
+		def __init__(self, parts): 
+			self.result = Code.variable(parts[0]) 
+			self.obj = Code.variable(parts[1]) 
+			self.condition = parts[2] 
+			self.value = Code.int_operand(parts[3]) 
+
+
+		def __str__(self): 
+			return f"LFILTER {self.result}, {self.obj}, {self.condition}, {self.value}" 
+
+
+		def __repr__(self): 
+			return str(self) 
+
+
+		def execute(self): 
+			items = bulk.keep(Code.list(self.obj).items, self.condition, self.value.int_value()) 
+			Code.new_list(self.result, List.holding(items)) 
+
+
+		def thread(self, engine, pc): 
+			return engine.straight(pc, self.execute) 
+
+
+	# Returns the PC to carry on from after moving to pc. That's pc, unless it's the head of a block, 
+	# whose body is skipped since it only runs when the function it's passed to invokes it. 
+	def land(pc): 
+		block = blocks.get(pc) 
+		return block[1] if block is not None else pc 
 
 
 	def condition(arg1, arg2, sign):
@@ -523,136 +1541,1841 @@ class Code:
 		elif sign == 'le': return arg1 <= arg2 
 		elif sign == 'ne': return arg1 != arg2 
 		else: print("UNKNOWN OPERATION:", sign) 
+
+
+	operators = {'gt': operator.gt, 'lt': operator.lt, 'eq': operator.eq, 'ge': operator.ge, 'le': operator.le, 'ne': operator.ne} 
+
+
+	# Returns a function without arguments that reads the operand as an int, with the common cases 
+	# (a literal or a variable of the current frame) bound directly instead of through int_value. 
+	def int_reader(operand): 
+		if isinstance(operand, Code.Number): 
+			number = operand.number 
+			return lambda: number 
+		if isinstance(operand, Code.Local): 
+			program_stack = stack 
+			slot = operand.slot 
+			name = operand.name 
+			def read(): 
+				value = program_stack.frame.values[slot] 
+				return int(value if value is not UNSET else program_stack.read(name)) 
+			return read 
+		return operand.int_value 
+
+
+	# Returns the closure for an IADD or ISUB, with the variable set directly when it's a local one. 
+	def thread_arithmetic(instruction, engine, pc, function): 
+		arg1 = Code.int_reader(instruction.arg1) 
+		arg2 = Code.int_reader(instruction.arg2) 
+		nxt = engine.next(pc) 
+		if isinstance(instruction.result, Code.Local): 
+			program_stack = stack 
+			slot = instruction.result.slot 
+			def op(): 
+				program_stack.frame.values[slot] = function(arg1(), arg2()) 
+				return nxt if nxt is not None else engine.advance(pc) 
+		else: 
+			result = instruction.result.set 
+			def op(): 
+				result(function(arg1(), arg2())) 
+				return nxt if nxt is not None else engine.advance(pc) 
+		return op 
 	
 
 	# Given a list of string objects, returns an associated list of Code objects 
 	def parse(lines): 
+		return Code.build(bytecode.assemble(lines)) 
+
+
+	# Given an Assembly, fills in the functions, labels and blocks and returns the list of Code objects. 
+	def build(assembly): 
 		program = [] 
-		block = [] 
-		label_created = False 
-		label_name = "" 
-		for line in lines: 
-			if Code.is_label(line):
-				label_created = True
-				label_name = line[:-1]
-			else: 
-				space = line.find(' ')
-				if space == -1: space = len(line)
-
-				command = line[0:space]
-				arguments = line[space+1:] 
-				
-				if command == "FUNC": 
-					program.append(Code.Func(arguments))
-				elif command == "RETURN": 
-					program.append(Code.Return(arguments)) 
-				elif command == "INSERT":
-					program.append(Code.Insert(arguments)) 
-				elif command == "ASSIGN": 
-					program.append(Code.Assign(arguments))
-				elif command == "COPY":
-					program.append(Code.Copy(arguments))
-				elif command == "BR":
-					program.append(Code.Branch(arguments)) 
-				elif command.startswith("BR"): 
-					program.append(Code.BranchConditional(arguments, command[2:].lower())) 
-				elif command == "IINPUT" or command == "SINPUT":
-					program.append(Code.Input(arguments, command[0]))
-				elif command == "IADD": 
-					program.append(Code.Add(arguments))
-				elif command == "ISUB":
-					program.append(Code.Sub(arguments)) 
-				elif command == "PRINT":
-					program.append(Code.Print(arguments))
-				elif command == "EXCON":
-					program.append(Code.ExecuteContents(arguments))
-				elif command[:5] == "EXCON":
-					program.append(Code.ExecuteContentsCondition(arguments, command[5:].lower())) 
-				elif command == 'OBJECT': 
-					program.append(Code.Object(arguments))
-				elif command == 'RETRIEVE':
-					program.append(Code.Retrieve(arguments)) 
-				elif command == 'ATTRIBUTE': 
-					program.append(Code.Attribute(arguments)) 
-				elif command in ['GT', 'LT', 'EQ', 'GE', 'LE', 'NE']:
-					program.append(Code.Compare(arguments, command.lower()))
-				elif command == "ENTERBLOCK":
-					block.append(len(program) - 1) # the index of the head of the block
-				elif command == "EXITBLOCK": 
-					program[block[-1]].contents_start = block[-1] 
-					program[block[-1]].contents_end = len(program) - 1
-					block.pop()
-				elif command == "LABEL": 
-					labels[label_name][arguments] = len(program) - 1
-					#print(labels)
-					#print("Label created:", label_name, len(program)-1)
-				elif len(command) > 0: 
-					print(f"ERROR: Command '{command}' not recognized")
-
-				if label_created and command != 'LABEL':
-					functions[label_name] = len(program) - 1
-					label_created = False
+		owners = [] # the layout of the function each instruction belongs to 
+		starts = {pc: name for name, pc in assembly.functions.items()} 
+		Code.layout = Layout("") 
+		for command, parts in assembly.instructions: 
+			if len(program) in starts: 
+				Code.layout = Layout(starts[len(program)]) 
+				layouts[Code.layout.name] = Code.layout 
+			owners.append(Code.layout) 
+
+			if command == "FUNC": 
+				program.append(Code.Func(parts))
+			elif command == "RETURN": 
+				program.append(Code.Return(parts)) 
+			elif command == "INSERT":
+				program.append(Code.Insert(parts)) 
+			elif command == "ASSIGN": 
+				program.append(Code.Assign(parts))
+			elif command == "COPY":
+				program.append(Code.Copy(parts))
+			elif command == "BR":
+				program.append(Code.Branch(parts)) 
+			elif command.startswith("BR"): 
+				program.append(Code.BranchConditional(parts, command[2:].lower())) 
+			elif command == "IINPUT" or command == "SINPUT":
+				program.append(Code.Input(parts, command[0]))
+			elif command == "IADD": 
+				program.append(Code.Add(parts))
+			elif command == "ISUB":
+				program.append(Code.Sub(parts)) 
+			elif command == "PRINT":
+				program.append(Code.Print(parts))
+			elif command == "EXCON":
+				program.append(Code.ExecuteContents(parts))
+			elif command[:5] == "EXCON":
+				program.append(Code.ExecuteContentsCondition(parts, command[5:].lower())) 
+			elif command == 'OBJECT': 
+				program.append(Code.Object(parts))
+			elif command == 'RETRIEVE':
+				program.append(Code.Retrieve(parts)) 
+			elif command == 'ATTRIBUTE': 
+				program.append(Code.Attribute(parts)) 
+			elif command == 'LIST': 
+				program.append(Code.ListCreate(parts)) 
+			elif command == 'LGET': 
+				program.append(Code.ListGet(parts)) 
+			elif command == 'LSET': 
+				program.append(Code.ListSet(parts)) 
+			elif command == 'LAPPEND': 
+				program.append(Code.ListAppend(parts)) 
+			elif command == 'LSIZE': 
+				program.append(Code.ListSize(parts)) 
+			elif command in ['LADD', 'LSUB']: 
+				program.append(Code.ListArithmetic(parts, command[1:].lower())) 
+			elif command in ['LSUM', 'LMIN', 'LMAX']: 
+				program.append(Code.ListReduce(parts, command[1:])) 
+			elif command == 'LFILL': 
+				program.append(Code.ListFill(parts)) 
+			elif command == 'LRANGE': 
+				program.append(Code.ListRange(parts)) 
+			elif command == 'LFILTER': 
+				program.append(Code.ListFilter(parts)) 
+			elif command in ['GT', 'LT', 'EQ', 'GE', 'LE', 'NE']:
+				program.append(Code.Compare(parts, command.lower()))
+
+		for head, end in assembly.blocks: 
+			blocks[head] = (head, end) 
+		for function, function_labels in assembly.labels.items(): 
+			labels[function].update(function_labels) 
+		functions.update(assembly.functions) 
+		for name in functions: 
+			if name not in layouts: 
+				layouts[name] = Layout(name) 
+
+		# Calls can't pass arguments across a branch target or the end of a block. 
+		stops = {end for head, end in assembly.blocks} 
+		for function_labels in assembly.labels.values(): 
+			stops.update(function_labels.values()) 
+		for site in range(len(program)): 
+			if isinstance(program[site], Code.Func): 
+				Code.link_call(program, owners, site, stops) 
+		Code.link(program, owners) 
+		Code.layout = None # only used while building 
 		return program 
 
 
+	# Resolves the functions and labels named by the calls and branches to the PCs they continue at 
+	# (past the block, if that's the head of one), so nothing is looked up by name while the program 
+	# runs. The ones that can't be resolved are reported as errors. 
+	def link(program, owners): 
+		for pc, instruction in enumerate(program): 
+			if isinstance(instruction, Code.Func): 
+				instruction.resume = Code.land(pc) 
+				if instruction.label in functions: 
+					instruction.target = Code.land(functions[instruction.label] - 1) 
+				else: 
+					Code.error(f"'{instruction}' at {pc} calls an unknown function") 
+			elif isinstance(instruction, Code.Branch) or isinstance(instruction, Code.BranchConditional): 
+				function = owners[pc].name 
+				if instruction.label in labels.get(function, {}): 
+					instruction.target = Code.land(labels[function][instruction.label]) 
+				else: 
+					Code.error(f"'{instruction}' at {pc} branches to a label that isn't in {function}") 
+
+
+	def error(*message): 
+		errors.append(" ".join(str(part) for part in message)) 
+		print("ERROR:", *message) 
+
+
+	# Links the FUNC at site to the function it calls. The ASSIGNs directly before a FUNC that store 
+	# into a variable of the callee pass its arguments, so they're replaced with Arguments that store 
+	# straight into the callee's new frame, leaving the caller's variables untouched (which is what 
+	# lets a function call itself). 
+	def link_call(program, owners, site, stops): 
+		func = program[site] 
+		func.site = site 
+		func.layout = layouts.get(func.label) 
+		if func.layout is None: 
+			return 
+
+		caller = owners[site] 
+		i = site - 1 
+		while i >= 0 and i not in stops and type(program[i]) is Code.Assign and owners[i] is caller: 
+			target = program[i].var_name 
+			if isinstance(target, Code.Local) and target.name in func.layout.slots: 
+				program[i] = Code.Argument(program[i], site, func.layout, func.layout.slots[target.name]) 
+			i -= 1 
+
+
 	def is_label(line): 
-		return len(line) > 1 and line[-1] == ':'
+		return bytecode.is_label(line) 
 
 
 	def __init__(line):
 		pass 
 
 
-if __name__ == "__main__":
-	if len(sys.argv) < 2 or len(sys.argv) > 3:
-		print("Usage: python3 int.py <file.jgc> <display_mode>") 
-	else: 
-		display_mode = sys.argv[2] if len(sys.argv) == 3 else '-none'
-		display_modes = ['-none', '-lines', '-code'] 
-		if display_mode not in display_modes: 
-			print('Unknown display_mode. Options are', display_modes) 
-
-		f = open(sys.argv[1], 'r')
-		lines = f.read().split('\n') 
-		f.close()
-		
-		functions = {}
-		variables = defaultdict(Code.Variable) 
-		stack = ProgramStack() 
-		labels = defaultdict(dict) # key is the name of the function, value is the PC 
-		blocks = [] 
-		progress_program_counter = True 
-
-		program = Code.parse(lines)
-		#print(functions)
-		if display_mode == '-code':
-			counter = 0
-			while counter < len(program): 
-				print(counter, '\t', program[counter])
-				counter += 1
-
+# Sets up the interpreter state for the program described by the assembly and returns the 
+# list of Code objects. 
+def load(assembly): 
+	global functions, layouts, heap, stack, labels, blocks, progress_program_counter, program, errors, pc, quickener, fuser, threaded 
+	functions = {}
+	layouts = {} # key is the name of the function, value is its Layout 
+	heap = Heap(gc_threshold) # holds the objects created by OBJECT 
+	labels = defaultdict(dict) # key is the name of the function, value is the PC 
+	blocks = {} # key is the PC of the FUNC heading a block, value is the (contents_start, contents_end) of its body 
+	progress_program_counter = True 
+	errors = [] # the problems found while linking, which stop the program from running 
+	quickener = None # the Quickener of the last run on the main loop 
+	fuser = None # the Fuser of the last run on the main loop 
+	threaded = None # the ThreadedEngine or JitEngine of the last run or step on one 
+	pc = -1 
+
+	program = Code.build(assembly)
+	stack = ProgramStack(layouts["main"].new_frame() if "main" in layouts else Frame(Layout("main"))) 
+	return program 
+
+
+# Sets where PRINT writes to and INPUT reads from, closing the ones used before. The defaults are 
+# stdout and stdin; see streams.py for the flush policies. 
+def open_streams(input_file = None, output_file = None, policy = None, size = streams.DEFAULT_SIZE, words = False): 
+	global output, source 
+	if output is not None: 
+		output.close() 
+		source.close() 
+	output = streams.Output(output_file, policy, size) 
+	source = streams.Input(input_file, output, words) 
+
+
+output = None 
+source = None 
+open_streams()
+
+# The settings of the program being run: the heap's collection threshold, and whether quickened 
+# instructions and superinstructions count their runs (for Quickener.report() and Fuser.report()). 
+gc_threshold = Heap.threshold 
+quicken_stats = False 
+fuse_stats = False 
+
+
+# Runs a program by calling a closure per instruction that was made for it when the program was 
+# loaded, with its operands already bound. Each closure returns the PC of the next instruction 
+# to run, so the loop doesn't look at the instructions or the globals at all. 
+class ThreadedEngine: 
+	def __init__(self, program): 
+		self.program = program 
+		self.heads = {head: end for head, (start, end) in blocks.items()} # key is the PC of the FUNC heading a block, value is the PC of the end of the block 
+		self.ends = set(self.heads.values()) 
+		self.ops = [] 
+		for pc, instruction in enumerate(program): 
+			self.ops.append(instruction.thread(self, pc) if hasattr(instruction, "thread") else self.fallback(pc)) 
+
+
+	# Returns the PC to run after an instruction that left the PC at pc, which is pc + 1 unless pc 
+	# is the end of the block being run (go back to its EXCON). 
+	def advance(self, pc): 
+		if pc == stack.block_end: 
+			return stack.end_block() + 1 
+		return pc + 1 
+
+
+	# Returns the PC after the instruction at pc if it's always pc + 1, otherwise None. 
+	def next(self, pc): 
+		if pc in self.heads or pc in self.ends: 
+			return None 
+		return pc + 1 
+
+
+	# Returns the closure for an instruction that doesn't change the PC, which runs execute(). 
+	def straight(self, pc, execute): 
+		nxt = self.next(pc) 
+		if nxt is None: 
+			advance = self.advance 
+			def op(): 
+				execute() 
+				return advance(pc) 
+		else: 
+			def op(): 
+				execute() 
+				return nxt 
+		return op 
+
+
+	# Returns a closure that runs the instruction through the main loop's globals. 
+	def fallback(self, position): 
+		instruction = self.program[position] 
+		def op(): 
+			global pc, progress_program_counter 
+			pc = position 
+			instruction.execute() 
+			if not progress_program_counter: 
+				progress_program_counter = True 
+				return pc 
+			return self.advance(pc) 
+		return op 
+
+
+	def run(self, display_mode = '-none', trace = None, start = None):
+		ops = self.ops
+		program = self.program
+		pc = functions['main'] if start is None else start 
+		if trace is not None:
+			record = trace.record
+			while pc < len(ops):
+				if display_mode == '-lines': print(program[pc])
+				record(pc)
+				pc = ops[pc]()
+		elif display_mode == '-lines':
+			while pc < len(ops): 
+				print(program[pc]) 
+				pc = ops[pc]() 
+		else: 
+			while pc < len(ops): 
+				pc = ops[pc]() 
+
+
+	# Runs up to n instructions from pc, like the main loop's step(), and returns the PC to go on 
+	# from. An INPUT that has nothing to read yet (see streams.Input.deferred) stops it there. 
+	def step(self, pc, n, display_mode = '-none'): 
+		ops = self.ops 
+		lines = display_mode == '-lines' 
+		try: 
+			while n > 0 and pc < len(ops): 
+				if lines: print(self.program[pc]) 
+				pc = ops[pc]() 
+				n -= 1 
+		except streams.Blocked: 
+			pass 
+		return pc 
+
+
+# Raised by the FunctionCompiler for code it can't translate, which is left to the interpreter. 
+class Unsupported(Exception): 
+	pass 
+
+
+# Translates the code of one function into the source of a Python function, with the variables of 
+# its frame read and written by slot and its branches turned into a while loop over its basic 
+# blocks. The compiled function takes the PC to start at (the start of any basic block), runs until 
+# the code leaves the function (a FUNC, EXCON or RETURN) and returns the PC the engine continues at. 
+# The bodies of the blocks in the function are its code too, run in its frame: a body is entered 
+# at the instruction after its head, and its last instruction runs through its tier-1 closure, 
+# which leaves the block (see ThreadedEngine.advance). Instructions it has no translation for are 
+# run through their tier-1 closures too. The variables aren't copied into Python locals: the code 
+# leaves the function every few instructions (at each call), and copying them in on the way in and 
+# back out on the way out cost more than it saved. 
+class FunctionCompiler: 
+	symbols = {'gt': '>', 'lt': '<', 'eq': '==', 'ge': '>=', 'le': '<=', 'ne': '!='} 
+
+	def __init__(self, engine, name): 
+		self.engine = engine 
+		self.name = name 
+		self.start = functions[name] 
+		self.end = min([pc for pc in functions.values() if pc > self.start] + [len(engine.program)]) 
+		self.lines = [] 
+		self.namespace = {"UNSET": UNSET, "program_stack": stack, "read": stack.read, "program": engine.program, 
+			"advance": engine.advance, "isinstance": isinstance, "int": int, "str": str, "write": output.write} 
+		self.temps = 0 
+
+
+	# Returns the name the value is known by in the generated code. 
+	def constant(self, value): 
+		name = "K" + str(len(self.namespace)) 
+		self.namespace[name] = value 
+		return name 
+
+
+	def emit(self, depth, line): 
+		self.lines.append('\t' * depth + line) 
+
+
+	def read(self, slot, name): 
+		return f"(x if (x := values[{slot}]) is not UNSET else read({name!r}))" 
+
+
+	def write(self, slot): 
+		return f"values[{slot}]" 
+
+
+	# Returns the expression for the operand's value(), or None if it can't be read from the frame. 
+	def value(self, operand): 
+		if isinstance(operand, Code.Number): 
+			return repr(operand.literal) 
+		if isinstance(operand, Code.Name): 
+			return repr(operand.name) 
+		if isinstance(operand, Code.Reference) or isinstance(operand, Code.Local): 
+			return self.read(operand.slot, operand.name) 
+		return None 
+
+
+	# Returns the expression for the operand's int_value(), emitting any lines it needs first. 
+	def int_value(self, operand, depth): 
+		if isinstance(operand, Code.Number): 
+			return repr(operand.number) 
+		if isinstance(operand, Code.Local): 
+			return f"int({self.read(operand.slot, operand.name)})" 
+		if isinstance(operand, Code.Reference): 
+			temp = "t" + str(self.temps) 
+			self.temps += 1 
+			self.emit(depth, f"{temp} = {self.read(operand.slot, operand.name)}") 
+			self.emit(depth, f"if isinstance({temp}, str) and not {temp}.isnumeric():") 
+			self.emit(depth + 1, f"{temp} = read({temp})") 
+			return f"int({temp})" 
+		return None 
+
+
+	# Emits the lines continuing at the instruction after the one at target (a branch target). 
+	def jump(self, target, depth): 
+		if target in self.engine.heads: 
+			raise Unsupported(f"branch to the block at {target}") 
+		if target in self.engine.ends: # the end of a block, which may be the one being run 
+			self.emit(depth, f"return advance({target})") 
+		elif self.start <= target + 1 < self.end: 
+			self.emit(depth, f"at = {target + 1}") 
+			self.emit(depth, "continue") 
+		elif target + 1 == self.end: 
+			self.emit(depth, f"return {self.end}") 
+		else: 
+			raise Unsupported(f"branch out of the function to {target}") 
+
+
+	# Emits the lines running the instruction at pc through its tier-1 closure. 
+	def call_out(self, pc, depth): 
+		self.emit(depth, f"{self.constant(self.engine.threaded[pc])}()") 
+
+
+	def target(self, instruction, pc): 
+		if instruction.target is None: 
+			raise Unsupported(f"unknown label {instruction.label} at {pc}") 
+		return instruction.target 
+
+
+	# Emits the lines for the instruction at pc. Returns True if it ends its basic block. 
+	def instruction(self, pc, depth): 
+		instruction = self.engine.program[pc] 
+		kind = type(instruction) 
+		if kind is Code.Input: 
+			# Left to the engine, which runs it on its tier-1 closure, so a read that has nothing to 
+			# read yet (see streams.Input.deferred) stops at it and can be made again. 
+			self.emit(depth, f"return {pc}") 
+			return True 
+		if pc in self.engine.ends: 
+			self.emit(depth, f"return {self.constant(self.engine.threaded[pc])}()") 
+			return True 
+		if kind is Code.Argument: 
+			value = self.value(instruction.value) 
+			if value is None: 
+				self.call_out(pc, depth) 
+				return False 
+			self.emit(depth, f"if frame.pending_site != {instruction.site}:") 
+			self.emit(depth + 1, f"frame.pending = {self.constant(instruction.layout)}.new_frame()") 
+			self.emit(depth + 1, f"frame.pending_site = {instruction.site}") 
+			self.emit(depth, f"frame.pending.values[{instruction.slot}] = {value}") 
+			if instruction.type is not None: 
+				self.emit(depth, f"frame.pending.types[{instruction.slot}] = {instruction.type!r}") 
+		elif kind is Code.Assign: 
+			value = self.value(instruction.value) 
+			if value is None or not isinstance(instruction.var_name, Code.Local): 
+				self.call_out(pc, depth) 
+				return False 
+			self.emit(depth, f"{self.write(instruction.var_name.slot)} = {value}") 
+			if instruction.type is not None: 
+				self.emit(depth, f"types[{instruction.var_name.slot}] = {instruction.type!r}") 
+		elif kind is Code.Insert: 
+			var_type = self.value(instruction.type) 
+			if var_type is None or not isinstance(instruction.var_name, Code.Local): 
+				self.call_out(pc, depth) 
+				return False 
+			self.emit(depth, f"types[{instruction.var_name.slot}] = {var_type}") 
+			self.emit(depth, f"{self.write(instruction.var_name.slot)} = None") 
+		elif kind is Code.Add or kind is Code.Sub or kind is Code.Compare: 
+			if not isinstance(instruction.result, Code.Local) or isinstance(instruction.arg1, Code.Indirect) or isinstance(instruction.arg2, Code.Indirect): 
+				self.call_out(pc, depth) 
+				return False 
+			arg1 = self.int_value(instruction.arg1, depth) 
+			arg2 = self.int_value(instruction.arg2, depth) 
+			result = self.write(instruction.result.slot) 
+			if kind is Code.Compare: 
+				self.emit(depth, f"{result} = 1 if {arg1} {self.symbols[instruction.sign]} {arg2} else 0") 
+				self.emit(depth, f"types[{instruction.result.slot}] = 'bool'") 
+			else: 
+				self.emit(depth, f"{result} = {arg1} {'+' if kind is Code.Add else '-'} {arg2}") 
+		elif kind is Code.Print: 
+			value = self.value(instruction.var_name) 
+			if value is None: 
+				self.call_out(pc, depth) 
+				return False 
+			self.emit(depth, f"write({value})") 
+		elif kind is Code.Copy: 
+			if not isinstance(instruction.dest_var, Code.Local) or not isinstance(instruction.source_var, Code.Local): 
+				self.call_out(pc, depth) 
+				return False 
+			value = self.read(instruction.source_var.slot, instruction.source_var.name) 
+			self.emit(depth, f"{self.write(instruction.dest_var.slot)} = {value}") 
+		elif kind is Code.Branch: 
+			self.jump(self.target(instruction, pc), depth) 
+			return True 
+		elif kind is Code.BranchConditional: 
+			if isinstance(instruction.arg1, Code.Indirect) or isinstance(instruction.arg2, Code.Indirect): 
+				raise Unsupported(f"indirect operand at {pc}") 
+			target = self.target(instruction, pc) 
+			arg1 = self.int_value(instruction.arg1, depth) 
+			arg2 = self.int_value(instruction.arg2, depth) 
+			self.emit(depth, f"if {arg1} {self.symbols[instruction.cond]} {arg2}:") 
+			self.jump(target, depth + 1) 
+			self.jump(pc, depth) 
+			return True 
+		elif kind is Code.Func or kind is Code.ExecuteContents: 
+			# Leave for the engine. The call returns (or the block ends) at pc + 1, which enters 
+			# the compiled code again. 
+			self.emit(depth, f"return {self.constant(self.engine.calls.get(pc, self.engine.threaded[pc]))}()") 
+			return True 
+		elif kind is Code.Return: 
+			if instruction.source is not None and not isinstance(instruction.source, Code.Local): 
+				self.emit(depth, f"return {self.constant(self.engine.threaded[pc])}()") 
+				return True 
+			if instruction.source is not None: 
+				self.emit(depth, f"value = {self.read(instruction.source.slot, instruction.source.name)}") 
+				self.emit(depth, f"var_type = types[{instruction.source.slot}]") 
+			self.emit(depth, "call = program[program_stack.pop()]") 
+			if instruction.source is not None: 
+				self.emit(depth, "if call.result is not None:") 
+				self.emit(depth + 1, "result_frame, result_slot = call.result.locate()") 
+				self.emit(depth + 1, "result_frame.values[result_slot] = value") 
+				self.emit(depth + 1, "result_frame.types[result_slot] = var_type") 
+			self.emit(depth, "frame.layout.release(frame)") 
+			self.emit(depth, "return advance(call.resume)") 
+			return True 
+		elif kind in [Code.Object, Code.Attribute, Code.Retrieve, Code.ListCreate, Code.ListGet, Code.ListSet, Code.ListAppend, Code.ListSize, 
+				Code.ListArithmetic, Code.ListReduce, Code.ListFill, Code.ListRange, Code.ListFilter]: 
+			self.call_out(pc, depth) 
+		else: 
+			raise Unsupported(f"{instruction} at {pc}") 
+		return False 
+
+
+	# Returns the PCs that start a basic block: the start, branch targets and the instructions 
+	# after anything ending a block, which include the starts of the bodies of blocks and the 
+	# instructions after them. 
+	def leaders(self): 
+		leaders = {self.start} 
+		for pc in range(self.start, self.end): 
+			instruction = self.engine.program[pc] 
+			if type(instruction) in [Code.Branch, Code.BranchConditional]: 
+				leaders.add(self.target(instruction, pc) + 1) 
+			if type(instruction) in [Code.Branch, Code.BranchConditional, Code.Func, Code.ExecuteContents, Code.Return, Code.Input] or pc in self.engine.ends: 
+				leaders.add(pc + 1) 
+		return sorted(pc for pc in leaders if self.start <= pc < self.end) 
+
+
+	# Emits the basic blocks starting at leaders[low:high], finding the one starting at at by 
+	# bisecting them, so a function with many of them (eg: main, entered again after each call it 
+	# makes) doesn't compare at with every one before it. 
+	def dispatch(self, leaders, low, high, depth): 
+		if high - low == 1: 
+			stop = leaders[high] if high < len(leaders) else self.end 
+			ended = False 
+			for pc in range(leaders[low], stop): 
+				ended = self.instruction(pc, depth) 
+			if not ended: 
+				self.jump(stop - 1, depth) 
+			return 
+		middle = (low + high) // 2 
+		self.emit(depth, f"if at < {leaders[middle]}:") 
+		self.dispatch(leaders, low, middle, depth + 1) 
+		self.emit(depth, "else:") 
+		self.dispatch(leaders, middle, high, depth + 1) 
+
+
+	# Returns the source of the function, and the PCs it can be entered at: the starts of its basic 
+	# blocks, except for INPUTs, which are left to the engine. 
+	def translate(self): 
+		if [name for name, pc in functions.items() if pc == self.start] != [self.name]: 
+			raise Unsupported("not a function with its own code") 
+
+		leaders = self.leaders() 
+		self.emit(1, "while True:") 
+		self.dispatch(leaders, 0, len(leaders), 2) 
+
+		header = [f"def {self.name}(at):", "\tframe = program_stack.frame", "\tvalues = frame.values", "\ttypes = frame.types"] 
+		return "\n".join(header + self.lines) + "\n", [leader for leader in leaders if type(self.engine.program[leader]) is not Code.Input] 
+
+
+	# Returns the compiled function, its source and the PCs it can be entered at. 
+	def compile(self): 
+		source, leaders = self.translate() 
+		exec(compile(source, f"<jit {self.name}>", "exec"), self.namespace) 
+		return self.namespace[self.name], source, leaders 
+
+
+# The threaded engine, with functions compiled to Python once they're hot. Calls to a function, 
+# branches back within it and runs of the bodies of its blocks (whose loops are in the functions 
+# heading them, eg: increase) all count towards it, and once it reaches the threshold it's compiled 
+# and the closures at the starts of its basic blocks are replaced with ones entering the compiled 
+# function, so it's used from then on, even by a loop that is already running. 
+class JitEngine(ThreadedEngine): 
+	threshold = 1000 
+
+	def __init__(self, program, threshold = None): 
+		super().__init__(program) 
+		if threshold is not None: 
+			self.threshold = threshold 
+		self.threaded = list(self.ops) # the tier-1 closures 
+		self.counts = defaultdict(int) # key is the name of a function, value is its calls and back-edges 
+		self.compiled = {} # key is the name of a function, value is its Python source 
+		self.unsupported = {} # key is the name of a function, value is why it couldn't be compiled 
+		self.calls = {} # key is the PC of a FUNC, value is its counting closure 
+
+		owners = function_owners(len(program)) 
+		for pc, instruction in enumerate(program): 
+			if type(instruction) is Code.Func and instruction.target is not None and pc not in self.heads: 
+				self.calls[pc] = self.counter(instruction.label, self.ops[pc]) 
+				self.ops[pc] = self.calls[pc] 
+			elif type(instruction) in [Code.Branch, Code.BranchConditional] and owners[pc] is not None: 
+				if instruction.target is not None and instruction.target < pc: 
+					self.ops[pc] = self.counter(owners[pc], self.ops[pc]) 
+		for head in self.heads: 
+			if owners[head] is not None and head + 1 < len(program): 
+				self.ops[head + 1] = self.counter(owners[head], self.ops[head + 1]) 
+
+
+	# Returns a closure that counts towards the function before running op. 
+	def counter(self, name, op): 
+		counts = self.counts 
+		threshold = self.threshold 
+		def count(): 
+			counts[name] += 1 
+			if counts[name] == threshold: 
+				self.tier_up(name) 
+			return op() 
+		return count 
+
+
+	def tier_up(self, name): 
+		compiler = FunctionCompiler(self, name) 
+		try: 
+			function, source, leaders = compiler.compile() 
+		except Unsupported as e: 
+			self.unsupported[name] = str(e) 
+			return 
+		self.compiled[name] = source 
+		for leader in leaders: 
+			self.ops[leader] = self.entry(function, leader) 
+
+
+	def entry(self, function, pc): 
+		return lambda: function(pc) 
+
+
+	# Prints the functions that were compiled, and why the others that got hot weren't, with the 
+	# productions they came from if there's a source map. 
+	def report(self, source_map = None, out = sys.stderr): 
+		def describe(label): 
+			if source_map is None or label not in source_map.functions: 
+				return label 
+			return label + " (" + source_map.production(label) + ")" 
+		print("\nJIT:", file=out) 
+		for name in sorted(self.compiled): 
+			print(f"compiled into {len(self.compiled[name].splitlines()):>4} lines of Python: {describe(name)}", file=out) 
+		for name, reason in sorted(self.unsupported.items()): 
+			print(f"not compiled ({reason}): {describe(name)}", file=out) 
+
+
+# Specializes the int instructions of the main loop (IADD, ISUB, the comparisons and the conditional 
+# branches) in place, the way CPython 3.11 quickens its bytecode. Each starts out wrapped in an 
+# Adaptive instruction, which runs it as it is. After warmup runs, if its operands are all ints, 
+# it's swapped for a quick version that reads them straight from the frame and skips int_value and 
+# int(). The quick version checks it was given ints, and if it wasn't it puts the Adaptive 
+# instruction back and waits twice as long before trying again. The threaded and JIT engines bind 
+# their operands when they're built, so this is only used by the main loop. 
+class Quickener: 
+	warmup = 8 # the runs before an instruction is first specialized 
+	kinds = {} # key is the class of a generic instruction, value is the class of its quick version (filled in below) 
+
+	def __init__(self, program): 
+		self.program = program 
+		self.stats = quicken_stats # whether the quick versions count their runs, for report() 
+		self.adaptive = [] # the Adaptive instructions, one per instruction that can be specialized 
+		self.supers = {} # key is a PC, value is the (Superinstruction, index) running the instruction there 
+		for pc, instruction in enumerate(program): 
+			if type(instruction) in Quickener.kinds and Quickener.quickens(instruction): 
+				self.adaptive.append(Adaptive(self, pc, instruction)) 
+				program[pc] = self.adaptive[-1] 
+
+
+	# Returns whether the operands of the instruction can be read by a quick version. 
+	def quickens(instruction): 
+		return all(type(operand) in [Code.Number, Code.Local, Code.Reference] for operand in [instruction.arg1, instruction.arg2]) 
+
+
+	# Returns a function returning the value of the operand, following a reference to the name of 
+	# a variable the way int_value does but without making it an int. 
+	def reader(operand): 
+		program_stack = stack 
+		if type(operand) is Code.Number: 
+			number = operand.number 
+			return lambda: number 
+		slot = operand.slot 
+		name = operand.name 
+		if type(operand) is Code.Local: 
+			def read(): 
+				value = program_stack.frame.values[slot] 
+				return value if value is not UNSET else program_stack.read(name) 
+			return read 
+		def read(): 
+			value = program_stack.frame.values[slot] 
+			if value is UNSET: 
+				value = program_stack.read(name) 
+			return program_stack.read(value) if type(value) is str else value 
+		return read 
+
+
+	def specialize(self, adaptive): 
+		instruction = adaptive.generic 
+		if type(Quickener.reader(instruction.arg1)()) is int and type(Quickener.reader(instruction.arg2)()) is int: 
+			adaptive.specializations += 1 
+			self.install(adaptive.pc, adaptive.quick) 
+		else: 
+			adaptive.failures += 1 
+			adaptive.backoff() 
+
+
+	# Makes the instruction the one run at pc. 
+	def install(self, pc, instruction): 
+		if pc in self.supers: 
+			superinstruction, i = self.supers[pc] 
+			superinstruction.set(i, instruction) 
+			if i == 0: # the superinstruction stays in the program 
+				return 
+		self.program[pc] = instruction 
+
+
+	# Puts the generic instructions back. 
+	def restore(self): 
+		for adaptive in self.adaptive: 
+			self.program[adaptive.pc] = adaptive.generic 
+
+
+	# Prints, per opcode, how many sites there are and how often they ran specialized. 
+	def report(self, out = sys.stderr): 
+		totals = defaultdict(lambda: [0, 0, 0, 0, 0, 0]) # sites, specialized runs, generic runs, specializations, failed attempts, despecializations 
+		for adaptive in self.adaptive: 
+			total = totals[str(adaptive.generic).split(' ')[0]] 
+			for i, count in enumerate([1, adaptive.quick.hits - adaptive.quick.misses, adaptive.runs, adaptive.specializations, adaptive.failures, adaptive.quick.misses]): 
+				total[i] += count 
+		print("\nQuickening:", file=out) 
+		print(f"{'opcode':<8} {'sites':>6} {'quick runs':>12} {'generic runs':>13} {'hit rate':>9} {'specialized':>12} {'failed':>7} {'despecialized':>14}", file=out) 
+		for opcode, (sites, hits, runs, specializations, failures, misses) in sorted(totals.items()): 
+			rate = 100 * hits / (hits + runs) if hits + runs > 0 else 0 
+			print(f"{opcode:<8} {sites:>6} {hits:>12} {runs:>13} {rate:>8.1f}% {specializations:>12} {failures:>7} {misses:>14}", file=out) 
+
+
+# Stands in for an instruction the Quickener can specialize, running it as it is until it's time 
+# to try. 
+class Adaptive: 
+	def __init__(self, quickener, pc, generic): 
+		self.quickener = quickener 
+		self.pc = pc 
+		self.generic = generic 
+		self.quick = Quickener.kinds[type(generic)](self) 
+		self.delay = Quickener.warmup # the runs left before the next try 
+		self.wait = Quickener.warmup # the runs to wait after a failed try 
+		self.runs = 0 # the runs that weren't specialized 
+		self.specializations = 0 
+		self.failures = 0 
+
+
+	def execute(self): 
+		self.runs += 1 
+		self.delay -= 1 
+		if self.delay <= 0: 
+			self.quickener.specialize(self) 
+		self.generic.execute() 
+
+
+	def backoff(self): 
+		self.wait = min(self.wait * 2, 1 << 16) 
+		self.delay = self.wait 
+
+
+	# The quick version gave up: go back to running the instruction as it is. 
+	def despecialize(self): 
+		self.quickener.install(self.pc, self) 
+		self.backoff() 
+		self.generic.execute() 
+
+
+	def __getattr__(self, name): # everything else is the instruction's 
+		return getattr(self.generic, name) 
+
+
+	def __str__(self): 
+		return str(self.generic) 
+
+
+# IADD and ISUB on ints. 
+class QuickArithmetic: 
+	def __init__(self, adaptive): 
+		self.adaptive = adaptive 
+		generic = adaptive.generic 
+		self.function = operator.add if type(generic) is Code.Add else operator.sub 
+		self.arg1 = Quickener.reader(generic.arg1) 
+		self.arg2 = Quickener.reader(generic.arg2) 
+		self.result = generic.result.set 
+		self.hits = 0 # the runs, including the ones that gave up (only counted with the quickener's stats) 
+		self.misses = 0 
+		if adaptive.quickener.stats: 
+			self.execute = self.count 
+
+
+	def execute(self): 
+		arg1 = self.arg1() 
+		arg2 = self.arg2() 
+		if type(arg1) is int and type(arg2) is int: 
+			self.result(self.function(arg1, arg2)) 
+		else: 
+			self.misses += 1 
+			self.adaptive.despecialize() 
+
+
+	def count(self): 
+		self.hits += 1 
+		type(self).execute(self) 
+
+
+	def __str__(self): 
+		return str(self.adaptive.generic) 
+
+
+# The comparisons on ints. 
+class QuickCompare(QuickArithmetic): 
+	def __init__(self, adaptive): 
+		super().__init__(adaptive) 
+		self.function = Code.operators[adaptive.generic.sign] 
+		self.locate = adaptive.generic.result.locate 
+
+
+	def execute(self): 
+		arg1 = self.arg1() 
+		arg2 = self.arg2() 
+		if type(arg1) is int and type(arg2) is int: 
+			frame, slot = self.locate() 
+			frame.values[slot] = 1 if self.function(arg1, arg2) else 0 
+			frame.types[slot] = "bool" 
+		else: 
+			self.misses += 1 
+			self.adaptive.despecialize() 
+
+
+# The conditional branches on ints. 
+class QuickBranch(QuickArithmetic): 
+	def __init__(self, adaptive): 
+		self.adaptive = adaptive 
+		generic = adaptive.generic 
+		self.function = Code.operators[generic.cond] 
+		self.arg1 = Quickener.reader(generic.arg1) 
+		self.arg2 = Quickener.reader(generic.arg2) 
+		self.target = generic.target 
+		self.hits = 0 
+		self.misses = 0 
+		if adaptive.quickener.stats: 
+			self.execute = self.count 
+
+
+	def execute(self): 
+		global pc 
+		arg1 = self.arg1() 
+		arg2 = self.arg2() 
+		if type(arg1) is int and type(arg2) is int: 
+			if self.function(arg1, arg2): 
+				pc = self.target 
+		else: 
+			self.misses += 1 
+			self.adaptive.despecialize() 
+
+
+Quickener.kinds = {Code.Add: QuickArithmetic, Code.Sub: QuickArithmetic, Code.Compare: QuickCompare, Code.BranchConditional: QuickBranch} 
+
+
+# Fuses runs of instructions into superinstructions for the main loop, so a run is dispatched once. 
+# A run is up to three instructions: any that just work on variables and carry on to the next (eg: 
+# the ASSIGNs passing arguments, an IADD), then one more of any kind (eg: the FUNC they're for, the 
+# BR back to the start of a loop). A superinstruction takes the place of the first instruction and 
+# the others stay where they are, so code that jumps or returns into the middle of a run runs them 
+# one at a time as before. None but the last can be the end of a block, where the main loop would 
+# go back to the EXCON. With counts (the runs of each instruction, eg: Profiler.counts from an 
+# earlier run), only runs starting at instructions that ran at least min_count times are fused. 
+class Fuser: 
+	length = 3 # the most instructions fused (run2 and run3 of Superinstruction) 
+	control = (Code.Func, Code.Return, Code.Branch, Code.BranchConditional, Code.ExecuteContents, Code.ExecuteContentsCondition) 
+	stops = (Code.Input,) # can stop a step before running (see streams.Pending), so they only end runs, where the PC is theirs 
+
+	def __init__(self, program, quickener = None, counts = None, min_count = 1): 
+		self.program = program 
+		self.quickener = quickener 
+		self.stats = fuse_stats # whether superinstructions count their runs, for report() 
+		self.supers = [] 
+		ends = {end for head, end in blocks.values()} 
+		pc = 0 
+		while pc < len(program): 
+			length = 1 
+			while length < Fuser.length and pc + length < len(program) and Fuser.straight(program[pc + length - 1]) and pc + length - 1 not in ends: 
+				length += 1 
+			if length < 2 or (counts is not None and counts[pc] < min_count): 
+				pc += 1 
+				continue 
+			superinstruction = Superinstruction(pc, length, program[pc:pc + length], self.stats) 
+			self.supers.append(superinstruction) 
+			program[pc] = superinstruction 
+			if quickener is not None: 
+				for i in range(length): 
+					quickener.supers[pc + i] = (superinstruction, i) 
+			pc += length 
+
+
+	# Returns whether the instruction carries on to the next one without changing the PC. 
+	def straight(instruction): 
+		if type(instruction) is Adaptive: 
+			instruction = instruction.generic 
+		return not isinstance(instruction, Fuser.control) and not isinstance(instruction, Fuser.stops) 
+
+
+	# Puts the first instructions of the runs back. 
+	def restore(self): 
+		for superinstruction in self.supers: 
+			if self.quickener is not None: 
+				for i in range(superinstruction.pc, superinstruction.last + 1): 
+					del self.quickener.supers[i] 
+			self.program[superinstruction.pc] = superinstruction.instructions[0] 
+
+
+	# Prints the superinstructions made, and, given the dispatches of a run, the instructions they 
+	# stood for. 
+	def report(self, dispatches = None, out = sys.stderr): 
+		fused = sum(superinstruction.last - superinstruction.pc + 1 for superinstruction in self.supers) 
+		patterns = defaultdict(int) # key is a tuple of opcodes, value is the superinstructions made for it 
+		for superinstruction in self.supers: 
+			patterns[tuple(str(instruction).split(' ')[0] for instruction in superinstruction.instructions)] += 1 
+		print(f"\nSuperinstructions: {len(self.supers)}, covering {fused} of {len(self.program)} instructions", file=out) 
+		for pattern, count in sorted(patterns.items(), key=lambda item: -item[1]): 
+			print(f"{count:>8}  {' + '.join(pattern)}", file=out) 
+		if dispatches is not None: 
+			saved = sum(superinstruction.runs * (superinstruction.last - superinstruction.pc) for superinstruction in self.supers) 
+			instructions = dispatches + saved 
+			reduction = 100 * saved / instructions if instructions > 0 else 0 
+			print(f"Dispatches: {dispatches} for {instructions} instructions ({reduction:.1f}% fewer)", file=out) 
+
+
+# Runs the instructions from pc to last as one. It holds their execute methods, which the 
+# Quickener updates through install() when it swaps one of them. 
+class Superinstruction: 
+	def __init__(self, pc, length, instructions, stats = False): 
+		self.pc = pc 
+		self.last = pc + length - 1 
+		self.instructions = list(instructions) 
+		self.parts = [instruction.execute for instruction in instructions] 
+		self.execute = self.run2 if length == 2 else self.run3 
+		self.runs = 0 # only counted with stats 
+		if stats: 
+			self.execute = self.count 
+
+
+	# Makes the instruction the one run as the ith of the run. 
+	def set(self, i, instruction): 
+		self.instructions[i] = instruction 
+		self.parts[i] = instruction.execute 
+
+
+	def run2(self): 
+		global pc 
+		self.parts[0]() 
+		pc = self.last # for instructions that use it (eg: FUNC, which returns to it) 
+		self.parts[1]() 
+
+
+	def run3(self): 
+		global pc 
+		parts = self.parts 
+		parts[0]() 
+		parts[1]() 
+		pc = self.last 
+		parts[2]() 
+
+
+	def count(self): 
+		self.runs += 1 
+		if self.last - self.pc == 1: 
+			self.run2() 
+		else: 
+			self.run3() 
+
+
+	def __str__(self): 
+		return " | ".join(str(instruction) for instruction in self.instructions) 
+
+
+# Counts the instructions dispatched by the main loop, for Fuser.report(). It's given to run() as 
+# the trace. 
+class DispatchCounter: 
+	def __init__(self): 
+		self.count = 0 
+
+
+	def record(self, pc): 
+		self.count += 1 
+
+
+# Counts how often each instruction runs and how long it takes, and adds those up per function 
+# (so per production, through the source map) and per line of the .jg source. The program runs 
+# on the main loop. With an interval, the running instruction is sampled on a timer instead of 
+# every instruction being timed, which keeps the overhead low on long runs. 
+class Profiler: 
+	def __init__(self, program, source_map = None, interval = None): 
+		self.program = program 
+		self.source_map = source_map 
+		self.interval = interval # the seconds between samples, or None to time every instruction 
+		self.owners = function_owners(len(program)) 
+		self.counts = [0] * len(program) # the executions (or samples) of each instruction 
+		self.times = [0.0] * len(program) # the seconds spent in each instruction 
+		self.stacks = defaultdict(float) # key is a tuple of the functions on the stack, value is the seconds spent there 
+
+
+	def run(self, display_mode = '-none'): 
+		if self.interval is None: 
+			self.run_timed(display_mode) 
+		else: 
+			signal.signal(signal.SIGPROF, self.sample) 
+			signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval) 
+			try: 
+				run(display_mode) 
+			finally: 
+				signal.setitimer(signal.ITIMER_PROF, 0) 
+				signal.signal(signal.SIGPROF, signal.SIG_DFL) 
+
+
+	# The main loop of run(), timing every instruction. 
+	def run_timed(self, display_mode): 
+		global pc, progress_program_counter 
+		counts = self.counts 
+		times = self.times 
+		stacks = self.stacks 
+		clock = time.perf_counter 
 		pc = functions['main'] 
-		while pc < len(program):
+		last = clock() 
+		while pc < len(program): 
+			current = pc 
+			key = tuple(entry[1] for entry in stack.stack) 
 			if display_mode == '-lines': print(program[pc]) 
 			program[pc].execute() 
-			
-			if progress_program_counter: 
-				if hasattr(program[pc], "block_end_branch_to"):
-					# This command marks the end of a branch. 
-					command = program[pc] 
-					pc = command.block_end_branch_to 
-					stack.push(command.block_end_add_stack, command.block_end_func_name) 					
 
-					delattr(command, "block_end_branch_to") 
-					delattr(command, "block_end_add_stack")
-					delattr(command, "block_end_func_name")
+			if progress_program_counter: 
+				if pc == stack.block_end: 
+					pc = stack.end_block() 
+				pc += 1 
+			else: 
+				progress_program_counter = True 
 
+			now = clock() 
+			counts[current] += 1 
+			times[current] += now - last 
+			stacks[key] += now - last 
+			last = now 
+
+
+	# Called by the profiling timer: charges the interval to the instruction that's running. 
+	def sample(self, signum, frame): 
+		if 0 <= pc < len(self.program): 
+			self.counts[pc] += 1 
+			self.times[pc] += self.interval 
+			self.stacks[tuple(entry[1] for entry in stack.stack)] += self.interval 
+
+
+	def location(self, pc): 
+		return self.source_map.location(pc) if self.source_map is not None else "?" 
+
+
+	# The name of a function in reports: its label and the production it was compiled from. 
+	def describe(self, label): 
+		if self.source_map is None or label not in self.source_map.functions: 
+			return label 
+		return label + " (" + self.source_map.production(label) + ")" 
+
+
+	# Prints the hot spots: the top instructions, functions and source lines by time. 
+	def report(self, top = 10, out = sys.stderr): 
+		total = sum(self.times) 
+		percent = lambda seconds: 100 * seconds / total if total > 0 else 0 
+		unit = "samples" if self.interval is not None else "runs" 
+		mode = f"sampled every {self.interval * 1000:g} ms" if self.interval is not None else "every instruction timed" 
+		print(f"\nProfile ({mode}): {sum(self.counts)} {unit}, {total:.4f} s", file=out) 
+
+		print("\nHot instructions:", file=out) 
+		print(f"{unit:>10} {'seconds':>10} {'%':>6}  {'pc':>5}  instruction", file=out) 
+		for pc in sorted(range(len(self.program)), key=lambda pc: -self.times[pc])[:top]: 
+			if self.counts[pc] == 0: 
+				break 
+			print(f"{self.counts[pc]:>10} {self.times[pc]:>10.4f} {percent(self.times[pc]):>5.1f}%  {pc:>5}  {self.program[pc]}  [{self.owners[pc]} {self.location(pc)}]", file=out) 
+
+		calls = defaultdict(int) # key is the label of a function, value is the number of calls to it 
+		spent = defaultdict(float) # key is the label of a function, value is the seconds spent in its own code 
+		for pc, instruction in enumerate(self.program): 
+			if isinstance(instruction, Code.Func): 
+				calls[instruction.label] += self.counts[pc] 
+			spent[self.owners[pc]] += self.times[pc] 
+		print("\nHot functions:", file=out) 
+		print(f"{'calls':>10} {'seconds':>10} {'%':>6}  function", file=out) 
+		for label in sorted(spent, key=lambda label: -spent[label])[:top]: 
+			if spent[label] == 0: 
+				break 
+			print(f"{calls[label] if self.interval is None else '-':>10} {spent[label]:>10.4f} {percent(spent[label]):>5.1f}%  {self.describe(label)}", file=out) 
+
+		if self.source_map is not None: 
+			line_counts = defaultdict(int) 
+			line_times = defaultdict(float) 
+			for pc in range(min(len(self.program), len(self.source_map.lines))): 
+				line_counts[self.source_map.lines[pc]] += self.counts[pc] 
+				line_times[self.source_map.lines[pc]] += self.times[pc] 
+			print("\nHot source lines:", file=out) 
+			print(f"{unit:>10} {'seconds':>10} {'%':>6}  line", file=out) 
+			for filename, line in sorted(line_times, key=lambda source: -line_times[source])[:top]: 
+				seconds = line_times[(filename, line)] 
+				if seconds == 0: 
+					break 
+				print(f"{line_counts[(filename, line)]:>10} {seconds:>10.4f} {percent(seconds):>5.1f}%  {filename}:{line}  {self.source_map.source(filename, line)}", file=out) 
+
+
+	# Writes the time spent under each stack of functions in the folded format flamegraph tools 
+	# read: the frames from main outwards separated by semicolons, then the microseconds spent. 
+	def export(self, filename): 
+		with open(filename, "w") as f: 
+			for key, seconds in sorted(self.stacks.items()): 
+				frames = ["main"] + [self.describe(label).replace(';', ',') for label in key] 
+				f.write(";".join(frames) + " " + str(round(seconds * 1000000)) + "\n") 
+
+
+# Keeps the last instructions run, with the values of their operands, in a ring buffer of a fixed 
+# size. Nothing is written until the buffer is dumped: when the program fails, when the process 
+# gets SIGUSR1, or when the program exits. Records go into lists allocated up front, and the 
+# functions reading each instruction's operands are built once, so recording costs a few stores per 
+# instruction. The JIT engine records the entries into compiled code, not what runs inside it. 
+class Trace: 
+	# The operands recorded for each kind of instruction, by attribute. 
+	fields = { 
+		Code.Func: ["label", "result"], Code.Return: ["source"], Code.Insert: ["var_name", "type"], 
+		Code.Assign: ["var_name", "value"], Code.Argument: ["var_name", "value"], Code.Input: ["var_name"], 
+		Code.Add: ["result", "arg1", "arg2"], Code.Sub: ["result", "arg1", "arg2"], Code.Print: ["var_name"], 
+		Code.Copy: ["dest_var", "source_var"], Code.Branch: ["label"], Code.BranchConditional: ["arg1", "arg2", "label"], 
+		Code.Compare: ["result", "arg1", "arg2"], Code.Object: ["result"], 
+		Code.Attribute: ["obj", "var_name", "value"], Code.Retrieve: ["result", "obj", "var_name"], 
+		Code.ListCreate: ["result", "size"], Code.ListGet: ["result", "obj", "index"], Code.ListSet: ["obj", "index", "value"], 
+		Code.ListAppend: ["obj", "value"], Code.ListSize: ["result", "obj"], 
+		Code.ListArithmetic: ["result", "obj", "other"], Code.ListReduce: ["result", "obj"], Code.ListFill: ["obj", "value"], 
+		Code.ListRange: ["result", "start", "end"], Code.ListFilter: ["result", "obj", "value"], 
+	} 
+	width = 3 # the most operands an instruction has recorded 
+
+	def __init__(self, program, size = 1024, out = None): 
+		self.program = program 
+		self.size = size 
+		self.out = out # the file the trace is appended to, or None for stderr 
+		self.count = 0 # the instructions recorded so far 
+		self.pcs = [-1] * size 
+		self.values = [[None] * size for i in range(self.width)] # the value of each operand, per record 
+		self.opcodes = [str(instruction).split(' ')[0] for instruction in program] 
+		self.operands = [] # the operands of each instruction 
+		self.readers = [] # the functions returning the values of the operands of each instruction 
+		for instruction in program: 
+			fields = [field for field in Trace.fields.get(type(instruction), []) if getattr(instruction, field) is not None] 
+			operands = [getattr(instruction, field) for field in fields] 
+			self.operands.append(operands) 
+			self.readers.append(tuple(Trace.reader(operand, field) for field, operand in zip(fields, operands))) 
+
+
+	# Returns a function returning the value of the operand, as the instruction would see it. A 
+	# variable named at runtime (eg: @id) is recorded as the name it resolves to. 
+	def reader(operand, field): 
+		if isinstance(operand, str): 
+			return lambda: operand 
+		if field in ["arg1", "arg2"]: # read as ints 
+			return operand.int_value 
+		if isinstance(operand, Code.Dynamic): 
+			return operand.source.value 
+		return operand.get if hasattr(operand, "get") else operand.value 
+
+
+	def record(self, pc): 
+		i = self.count % self.size 
+		self.pcs[i] = pc 
+		values = self.values 
+		readers = self.readers[pc] 
+		k = 0 
+		try: 
+			for read in readers: 
+				values[k][i] = read() 
+				k += 1 
+		except Exception: # eg: a name that's a dict, which can't name a variable, and those after it 
+			for k in range(k, len(readers)): 
+				values[k][i] = UNSET 
+		self.count += 1 
+
+
+	# Writes the records in the buffer out, oldest first, saying why. 
+	def dump(self, reason): 
+		kept = min(self.count, self.size) 
+		lines = [f"Trace ({reason}): the last {kept} of {self.count} instructions"] 
+		for seq in range(self.count - kept, self.count): 
+			i = seq % self.size 
+			pc = self.pcs[i] 
+			operands = ", ".join(operand if isinstance(operand, str) else f"{operand}={self.values[k][i]!r}" for k, operand in enumerate(self.operands[pc])) 
+			lines.append(f"{seq:>10} {pc:>6}  {self.opcodes[pc]:<10} {operands}") 
+		text = "\n".join(lines) + "\n" 
+		if self.out is None: 
+			sys.stderr.write(text) 
+			sys.stderr.flush() 
+		else: 
+			with open(self.out, "a") as f: 
+				f.write(text) 
+
+
+	# Runs the program, dumping the trace if it fails, on SIGUSR1 (and carrying on), and at the end. 
+	def run(self, display_mode = '-none', engine = '-loop'): 
+		if hasattr(signal, "SIGUSR1"): 
+			signal.signal(signal.SIGUSR1, lambda signum, frame: self.dump("SIGUSR1")) 
+		try: 
+			run(display_mode, engine, self, fuse = False) # so every instruction is recorded 
+		except BaseException as e: 
+			self.dump(f"{type(e).__name__}: {e}" if str(e) != "" else type(e).__name__) 
+			raise 
+		self.dump("exit") 
+
+
+# Returns the name of the function each instruction belongs to.
+def function_owners(length): 
+	owners = [None] * length 
+	starts = sorted(functions.items(), key=lambda function: function[1]) 
+	for i, (name, start) in enumerate(starts): 
+		end = starts[i + 1][1] if i + 1 < len(starts) else length 
+		owners[max(start, 0):max(end, 0)] = [name] * (max(end, 0) - max(start, 0)) 
+	return owners 
+
+
+# Runs the loaded program from the start of main (or the PC start), recording each instruction in
+# the trace if there is one. The main loop quickens the program as it runs and fuses it into
+# superinstructions, unless told not to.
+def run(display_mode = '-none', engine = '-loop', trace = None, quicken = True, fuse = True, start = None):
+	global pc, progress_program_counter, quickener, fuser, threaded 
+	#print(functions)
+	if display_mode == '-code':
+		counter = 0
+		while counter < len(program): 
+			print(counter, '\t', program[counter])
+			counter += 1
+
+	try: 
+		if engine == '-threaded' or engine == '-jit':
+			threaded = JitEngine(program) if engine == '-jit' else ThreadedEngine(program)
+			threaded.run(display_mode, trace, start)
+			return
+
+		tracing = trace is not None
+		quickener = Quickener(program) if quicken else None
+		fuser = Fuser(program, quickener) if fuse else None
+		pc = functions['main'] if start is None else start 
+		while pc < len(program):
+			if display_mode == '-lines': print(program[pc])
+			if tracing: trace.record(pc)
+			program[pc].execute()
+		
+			if progress_program_counter: 
+				if pc == stack.block_end: 
+					# This is the end of the block being run, so go back to the EXCON that ran it. 
+					pc = stack.end_block() 
 					#print("   Reached the end of a branch. Going to", pc, "with stack", stack.stack) 
-				elif hasattr(program[pc], "contents_start"): 
-					# This is the start of a block. We shouldn't run this here, this should be invoked somewhere else. 
-					pc = program[pc].contents_end 
-					#print("   Skipped the start of a branch") 
 
 				pc += 1 
 			else: 
-				progress_program_counter = True 
+				progress_program_counter = True
+
+	finally: 
+		output.flush() # the program's output is written out by the time it's done 
+		if fuser is not None: 
+			fuser.restore() 
+		if quickener is not None: 
+			quickener.restore() 
+
+
+# Runs up to n instructions of the loaded program on the main loop (a superinstruction counting as 
+# one), or on the threaded or JIT engine, from the start of main the first time (while pc is still 
+# -1) and from where the last step stopped after that. The engine is the one the first step was 
+# given. An INPUT that has nothing to read yet (see streams.Input.deferred) stops the step before 
+# it, to run again in the next. Returns whether the program has any left to run; once it hasn't, 
+# or it raises, its output is flushed and its instructions are put back the way they were loaded. 
+def step(n = 1, quicken = True, fuse = True, engine = '-loop', display_mode = '-none'): 
+	global pc, progress_program_counter, quickener, fuser, threaded 
+	if pc == -1: 
+		pc = functions['main'] 
+		if engine == '-threaded' or engine == '-jit': 
+			threaded = JitEngine(program) if engine == '-jit' else ThreadedEngine(program) 
+		else: 
+			threaded = None 
+			quickener = Quickener(program) if quicken else None 
+			fuser = Fuser(program, quickener) if fuse else None 
+
+	done = True 
+	lines = display_mode == '-lines' 
+	try: 
+		if threaded is not None: 
+			pc = threaded.step(pc, n, display_mode) 
+		else: 
+			while n > 0 and pc < len(program): 
+				if lines: print(program[pc]) 
+				program[pc].execute() 
+				if progress_program_counter: 
+					if pc == stack.block_end: 
+						pc = stack.end_block() 
+					pc += 1 
+				else: 
+					progress_program_counter = True 
+				n -= 1 
+		done = pc >= len(program) 
+	except streams.Blocked: 
+		done = False 
+	finally: 
+		if done: 
+			output.flush() 
+			if fuser is not None: 
+				fuser.restore() 
+			if quickener is not None: 
+				quickener.restore() 
+	return not done 
+
+
+# Returns the state of the loaded program for a snapshot (see snapshot.py): everything load() sets 
+# up, and what the program has done so far if it's part way through, starting at the PC start with 
+# the output it has written. 
+def capture(start = None, text = ""): 
+	return {"program": program, "functions": functions, "layouts": layouts, "labels": labels, "blocks": blocks, 
+		"heap": heap, "stack": stack, 
+		"start": start, "output": text} 
+
+
+# Sets up the interpreter state a snapshot holds, as load() does, and returns the PC to start at 
+# (None for the start of main) and the output written before it. 
+def restore(state): 
+	global functions, layouts, heap, stack, labels, blocks, progress_program_counter, program, errors, pc, quickener, fuser, threaded 
+	program = state["program"] 
+	functions = state["functions"] 
+	layouts = state["layouts"] 
+	labels = state["labels"] 
+	blocks = state["blocks"] 
+	heap = state["heap"] 
+	stack = state["stack"] 
+	progress_program_counter = True 
+	errors = [] 
+	quickener = None 
+	fuser = None 
+	threaded = None 
+	pc = -1 
+	return state["start"], state["output"] 
+
+
+# Raised by a Checkpoint to stop the run where a snapshot is taken. 
+class CheckpointReached(Exception): 
+	def __init__(self, pc): 
+		super().__init__(pc) 
+		self.pc = pc 
+
+
+# Stands in for the instruction at a point a snapshot is taken at, stopping the run before it. 
+class Checkpoint: 
+	def __init__(self, pc, instruction): 
+		self.pc = pc 
+		self.instruction = instruction 
+
+
+	def execute(self): 
+		raise CheckpointReached(self.pc) 
+
+
+	def __str__(self): 
+		return str(self.instruction) 
+
+
+# Runs the loaded program until it first gets to one of the PCs, saves a snapshot of it there to 
+# the file, and runs the rest. The snapshot keeps the output written before that point, so runs 
+# started from it write it out again. Returns whether the program got to the point. 
+def run_to_snapshot(filename, key, pcs, display_mode = '-none', engine = '-loop', trace = None, quicken = True, fuse = True): 
+	global output 
+	originals = {pc: program[pc] for pc in pcs} 
+	for pc in pcs: 
+		program[pc] = Checkpoint(pc, program[pc]) 
+	output = streams.Recording(output) 
+	reached = None 
+	try: 
+		run(display_mode, engine, trace, quicken, fuse) 
+	except CheckpointReached as e: 
+		reached = e.pc 
+	finally: 
+		text = output.text() 
+		output = output.output 
+		for pc, instruction in originals.items(): 
+			program[pc] = instruction 
+
+	if reached is None: 
+		return False 
+	snapshot.save(filename, key, capture(reached, text)) 
+	run('-none' if display_mode == '-code' else display_mode, engine, trace, quicken, fuse, start = reached) 
+	return True 
+
+
+# Returns the PCs a snapshot is taken before: those of the INPUTs for "input", otherwise the PC 
+# given. 
+def snapshot_points(point): 
+	if point == "input": 
+		return [pc for pc, instruction in enumerate(program) if isinstance(instruction, Code.Input)] 
+	return [int(point)] if int(point) < len(program) else [] 
+
+
+# A program and everything running it needs: its instructions, functions, labels and blocks, its 
+# variables, heap and stack, how far it has got, and where it reads and writes. Any number can be 
+# loaded and run in one process (eg: by workers that run many programs, or an application running 
+# them for its users). The interpreter's code works on the globals at the top of this file, so an 
+# Interpreter puts its state in them while it loads or runs its program and takes it back after, 
+# holding the lock so no other Interpreter can at the same time. Interpreters in different threads 
+# don't run side by side but take turns: step() holds the lock for its n instructions, and run() 
+# steps a slice at a time, letting go of it between slices and while it waits for input, so one 
+# waiting on its input doesn't hold up the others. Nothing one Interpreter does changes another's: 
+# the shapes of its objects belong to its heap, and its settings are swapped in with its state. 
+class Interpreter: 
+	lock = threading.RLock() 
+	slice = 4096 # the instructions run() runs between letting go of the lock 
+	state = ["functions", "layouts", "heap", "stack", "program", "labels", "pc", "blocks", "errors", 
+		"progress_program_counter", "output", "source", "quickener", "fuser", "threaded", "gc_threshold", "quicken_stats", "fuse_stats"] 
+
+	# The input and output are the names of files or objects to read and write (see streams.py), 
+	# by default stdin and stdout. The threshold is the heap's (see Heap), and quicken_stats and 
+	# fuse_stats can be set before running to count the runs of quickened instructions and 
+	# superinstructions. 
+	def __init__(self, input_file = None, output_file = None, policy = None, size = streams.DEFAULT_SIZE, words = False, threshold = Heap.threshold): 
+		self.functions = {} 
+		self.layouts = {} 
+		self.heap = Heap() 
+		self.stack = ProgramStack() 
+		self.program = [] 
+		self.labels = defaultdict(dict) 
+		self.pc = -1 
+		self.blocks = {} 
+		self.errors = [] 
+		self.progress_program_counter = True 
+		self.output = streams.Output(output_file, policy, size) 
+		self.source = streams.Input(input_file, self.output, words) 
+		self.quickener = None 
+		self.fuser = None 
+		self.threaded = None 
+		self.gc_threshold = threshold 
+		self.quicken_stats = False 
+		self.fuse_stats = False 
+
+
+	# Puts this interpreter's state in the globals for the code in the with block. 
+	@contextlib.contextmanager 
+	def active(self): 
+		with Interpreter.lock: 
+			module = globals() 
+			saved = {name: module.get(name) for name in Interpreter.state} # whoever had them before, eg: an Interpreter running this one 
+			module.update({name: getattr(self, name) for name in Interpreter.state}) 
+			try: 
+				yield 
+			finally: 
+				for name in Interpreter.state: 
+					setattr(self, name, module[name]) 
+				module.update(saved) 
+
+
+	# Loads the program, an Assembly or the name of a .jgc/.jgb file. Returns the problems found 
+	# linking it, which stop it from running. 
+	def load(self, assembly): 
+		if isinstance(assembly, str): 
+			assembly = bytecode.load(assembly) 
+		with self.active(): 
+			load(assembly) 
+		return self.errors 
+
+
+	# Runs the program to the end, or the rest of it if step() has started it (on the engine that 
+	# started it), a slice at a time. The lock is only held while a slice runs: when an INPUT has 
+	# nothing to read, the slice stops before it and the input is waited for with the lock let go, 
+	# so Interpreters in other threads run while this one waits. 
+	def run(self, display_mode = '-none', engine = '-loop', quicken = True, fuse = True): 
+		if display_mode == '-code' and self.pc == -1: 
+			for counter, instruction in enumerate(self.program): 
+				print(counter, '\t', instruction) 
+		deferred = self.source.deferred 
+		self.source.deferred = True 
+		try: 
+			while self.step(Interpreter.slice, quicken, fuse, engine, display_mode): 
+				if self.source.waiting: 
+					self.source.receive() 
+		finally: 
+			self.source.deferred = deferred 
+
+
+	# Runs up to n more instructions. Returns whether the program has any left to run. 
+	def step(self, n = 1, quicken = True, fuse = True, engine = '-loop', display_mode = '-none'): 
+		with self.active(): 
+			return step(n, quicken, fuse, engine, display_mode) 
+
+
+	# Runs the program in an event loop, a slice of instructions at a time, letting the other tasks 
+	# run between slices. Its INPUTs await the next text from read (an async function returning a 
+	# str, or None at the end of the input) once they've used what they were given, and what it 
+	# PRINTs is passed to write (an async function taking a str) after each slice. 
+	async def run_async(self, read, write, slice = 4096, quicken = True, fuse = True): 
+		text = io.StringIO() 
+		self.output.close() 
+		self.source.close() 
+		self.output = streams.Output(text, "exit") 
+		self.source = streams.Pending(self.output, self.source.words) 
+		while True: 
+			running = self.step(slice, quicken, fuse) 
+			self.output.flush() 
+			if text.tell() > 0: 
+				await write(text.getvalue()) 
+				text.seek(0) 
+				text.truncate() 
+			if not running: 
+				return 
+			if self.source.waiting: 
+				chunk = await read() 
+				if chunk is None: 
+					self.source.end() 
+				else: 
+					self.source.give(chunk) 
+			else: 
+				await asyncio.sleep(0) 
+
+
+	def close(self): 
+		self.output.close() 
+		self.source.close() 
+
+
+# Runs the program over many inputs, each on its own Interpreter with its output kept apart, in a 
+# pool of worker processes. The program is read and decoded once, and each worker is given it 
+# once, when it starts. Runs are stepped a slice at a time so they can be stopped after timeout 
+# seconds. Each run ends with an exit status: 0 when the program finishes, 1 when it fails (eg: 
+# it reads past the end of its input) and 124 when it times out, like the timeout command's. 
+class Batch: 
+	slice = 4096 # the instructions run between looks at the clock 
+	orders = ["input", "completion"] 
+	TIMED_OUT = 124 
+
+	def __init__(self, assembly, inputs, workers = None, timeout = None, order = "input", quicken = True, fuse = True, threshold = Heap.threshold): 
+		if order not in Batch.orders: 
+			raise ValueError(f"unknown order '{order}' (the options are {Batch.orders})") 
+		self.assembly = assembly 
+		self.inputs = inputs 
+		self.workers = workers if workers is not None else os.cpu_count() 
+		self.timeout = timeout 
+		self.order = order 
+		self.quicken = quicken 
+		self.fuse = fuse 
+		self.threshold = threshold 
+		self.results = [] # (input, status, output, message, seconds) tuples, in the order they were reported 
+
+
+	# Returns the input files listed by the manifest, one to a line (relative to the manifest, 
+	# skipping blank lines and # comments), or the files in it if it's a directory, by name. 
+	def inputs_of(manifest): 
+		if os.path.isdir(manifest): 
+			return [os.path.join(manifest, name) for name in sorted(os.listdir(manifest)) if os.path.isfile(os.path.join(manifest, name))] 
+		directory = os.path.dirname(manifest) 
+		with open(manifest) as f: 
+			lines = [line.strip() for line in f] 
+		return [os.path.join(directory, line) for line in lines if line != "" and not line.startswith("#")] 
+
+
+	# Runs every input, calling report with each result as it's ready to be reported (in the 
+	# order of the inputs, or as they finish), and returns the results. 
+	def run(self, report = None): 
+		start = time.perf_counter() 
+		options = (self.assembly, self.timeout, self.quicken, self.fuse, self.threshold) 
+		with concurrent.futures.ProcessPoolExecutor(self.workers, initializer=Batch.start_worker, initargs=options) as pool: 
+			futures = [pool.submit(Batch.job, filename) for filename in self.inputs] 
+			for future in (futures if self.order == "input" else concurrent.futures.as_completed(futures)): 
+				result = future.result() 
+				self.results.append(result) 
+				if report is not None: 
+					report(result) 
+		self.seconds = time.perf_counter() - start 
+		return self.results 
+
+
+	def start_worker(assembly, timeout, quicken, fuse, threshold): 
+		Batch.options = (assembly, timeout, quicken, fuse, threshold) 
+
+
+	# Runs the program in a worker with the input file. Returns its result. 
+	def job(filename): 
+		assembly, timeout, quicken, fuse, threshold = Batch.options 
+		start = time.perf_counter() 
+		text = io.StringIO() 
+		status = 0 
+		message = None 
+		interpreter = Interpreter(filename, text, "exit", threshold = threshold) 
+		try: 
+			interpreter.load(assembly) 
+			while interpreter.step(Batch.slice, quicken, fuse): 
+				if timeout is not None and time.perf_counter() - start > timeout: 
+					status = Batch.TIMED_OUT 
+					message = f"timed out after {timeout} s" 
+					break 
+		except Exception as e: 
+			status = 1 
+			message = f"{type(e).__name__}: {e}" 
+		finally: 
+			interpreter.close() 
+		return (filename, status, text.getvalue(), message, time.perf_counter() - start) 
+
+
+	def summary(self): 
+		runs = len(self.results) 
+		ok = sum(1 for result in self.results if result[1] == 0) 
+		timed_out = sum(1 for result in self.results if result[1] == Batch.TIMED_OUT) 
+		seconds = [result[4] for result in self.results] 
+		mean = sum(seconds) / runs if runs > 0 else 0 
+		rate = runs / self.seconds if self.seconds > 0 else 0 
+		return (f"Batch: {runs} runs ({ok} ok, {runs - ok - timed_out} failed, {timed_out} timed out) in {self.seconds:.3f} s " 
+			f"on {self.workers} worker{'s' if self.workers != 1 else ''}: {rate:.1f} runs/s, {mean * 1000:.1f} ms a run on average, {max(seconds, default=0) * 1000:.1f} ms at most") 
+
+
+# Serves the program over TCP: each connection gets its own Interpreter, whose INPUTs read what the 
+# client sends and whose PRINTs are sent back, all run in one event loop (see run_async()). 
+async def serve(assembly, host, port, slice = 4096, quicken = True, fuse = True, threshold = Heap.threshold): 
+	async def session(reader, writer): 
+		decoder = codecs.getincrementaldecoder("utf-8")() 
+		async def read(): 
+			data = await reader.read(streams.CHUNK) 
+			text = decoder.decode(data, final=len(data) == 0) 
+			return text if len(data) > 0 or len(text) > 0 else None 
+		async def write(text): 
+			writer.write(text.encode()) 
+			await writer.drain() 
+
+		interpreter = Interpreter(threshold = threshold) 
+		try: 
+			interpreter.load(assembly) 
+			await interpreter.run_async(read, write, slice, quicken, fuse) 
+		except (EOFError, ValueError, ConnectionError) as e: # eg: the client left, or sent a word for an int 
+			print(f"Session {writer.get_extra_info('peername')} stopped: {type(e).__name__}: {e}", file=sys.stderr) 
+		finally: 
+			interpreter.close() 
+			writer.close() 
+
+	server = await asyncio.start_server(session, host, port) 
+	print("Serving on", ", ".join(str(s.getsockname()) for s in server.sockets), file=sys.stderr) 
+	async with server: 
+		await server.serve_forever() 
+
+
+if __name__ == "__main__":
+	engines = ['-loop', '-threaded', '-jit'] 
+	profile_options = ["-profile", "-profile=", "-profile-top=", "-folded="] 
+	profile_flags = [arg for arg in sys.argv[2:] if arg == "-profile" or any(arg.startswith(option) for option in profile_options[1:])] 
+	trace_flags = [arg for arg in sys.argv[2:] if arg == "-trace" or arg.startswith("-trace=") or arg.startswith("-trace-file=")] 
+	io_options = ["-in=", "-out=", "-flush=", "-flush-size="] 
+	io_flags = [arg for arg in sys.argv[2:] if arg == "-words" or any(arg.startswith(option) for option in io_options)] 
+	gc_flags = [arg for arg in sys.argv[2:] if arg == "-gc-stats" or arg.startswith("-gc-threshold=")] 
+	quicken_flags = [arg for arg in sys.argv[2:] if arg in ["-quicken-stats", "-no-quicken", "-fuse-stats", "-no-fuse"]] 
+	jit_flags = [arg for arg in sys.argv[2:] if arg == "-jit-stats"] 
+	snapshot_flags = [arg for arg in sys.argv[2:] if arg.startswith("-snapshot=") or arg.startswith("-snapshot-at=")] 
+	batch_options = ["-batch=", "-batch-out=", "-batch-workers=", "-batch-timeout=", "-batch-order="] 
+	batch_flags = [arg for arg in sys.argv[2:] if any(arg.startswith(option) for option in batch_options)] 
+	serve_flags = [arg for arg in sys.argv[2:] if arg.startswith("-serve=") or arg.startswith("-slice=")] 
+	flags = [arg for arg in sys.argv[2:] if arg not in engines and arg not in profile_flags and arg not in trace_flags and arg not in io_flags and arg not in gc_flags and arg not in quicken_flags and arg not in jit_flags and arg not in snapshot_flags and arg not in batch_flags and arg not in serve_flags] 
+	if len(sys.argv) < 2 or len(flags) > 1:
+		print("Usage: python3 int.py <file.jgc/.jgb> <display_mode> <optional: engine> <optional: profile options>") 
+		print("Engines:", engines) 
+		print("Profile options: -profile (time every instruction), -profile=<ms> (sample every ms), -profile-top=<n>, -folded=<file>") 
+		print("Trace options: -trace (keep the last 1024 instructions), -trace=<n>, -trace-file=<file> (instead of stderr)") 
+		print("I/O options: -in=<file>, -out=<file>, -flush=<line|size|exit>, -flush-size=<characters>, -words (INPUT reads words instead of lines)") 
+		print("Heap options: -gc-stats (show the objects made and collected), -gc-threshold=<objects> (the fewest made between collections)") 
+		print("Main loop options: -quicken-stats (show how often instructions ran specialized), -no-quicken, -fuse-stats (show the superinstructions and dispatches saved), -no-fuse") 
+		print("JIT options: -jit-stats (show the functions -jit compiled, and why the others it tried weren't)") 
+		print("Snapshot options: -snapshot=<file> (start from the snapshot if it was made from this program, otherwise make it), -snapshot-at=<input|pc> (take it just before the first INPUT, or the instruction at pc, runs)") 
+		print("Batch options: -batch=<directory|manifest> (run the program once per input file, in worker processes), -batch-out=<directory> (write the outputs there instead of stdout), -batch-workers=<n>, -batch-timeout=<seconds>, -batch-order=<input|completion>") 
+		print("Serve options: -serve=<[host:]port> (run the program for each TCP connection, in one event loop), -slice=<n> (the instructions each runs before letting the others)") 
+	else: 
+		display_mode = flags[0] if len(flags) == 1 else '-none'
+		display_modes = ['-none', '-lines', '-code'] 
+		if display_mode not in display_modes: 
+			print('Unknown display_mode. Options are', display_modes) 
+		engine = ([arg for arg in sys.argv[2:] if arg in engines] + ['-loop'])[0] 
+
+		streams_options = {"input_file": None, "output_file": None, "policy": None, "size": streams.DEFAULT_SIZE, "words": False} 
+		for flag in io_flags: 
+			if flag.startswith("-in="): streams_options["input_file"] = flag[len("-in="):] 
+			elif flag.startswith("-out="): streams_options["output_file"] = flag[len("-out="):] 
+			elif flag.startswith("-flush="): streams_options["policy"] = flag[len("-flush="):] 
+			elif flag.startswith("-flush-size="): streams_options["size"] = int(flag[len("-flush-size="):]) 
+			elif flag == "-words": streams_options["words"] = True 
+		if display_mode == '-lines' and streams_options["policy"] is None: 
+			streams_options["policy"] = "size" 
+			streams_options["size"] = 0 # so the output comes out between the lines shown 
+		try: 
+			open_streams(**streams_options) 
+		except (OSError, ValueError) as e: 
+			print("ERROR:", e) 
+			sys.exit(1) 
+
+		for flag in gc_flags: 
+			if flag.startswith("-gc-threshold="): gc_threshold = int(flag[len("-gc-threshold="):]) 
+		if "-gc-stats" in gc_flags: 
+			atexit.register(lambda: print(heap.summary(), file=sys.stderr)) 
+		if "-quicken-stats" in quicken_flags: 
+			quicken_stats = True 
+			atexit.register(lambda: quickener.report() if quickener is not None else None) 
+		if "-jit-stats" in jit_flags: 
+			atexit.register(lambda: threaded.report(sourcemap.load(sys.argv[1] + ".map")) if isinstance(threaded, JitEngine) else None) 
+
+		if len(batch_flags) > 0: 
+			manifest = None 
+			out = None 
+			batch_options = {} 
+			for flag in batch_flags: 
+				if flag.startswith("-batch="): manifest = flag[len("-batch="):] 
+				elif flag.startswith("-batch-out="): out = flag[len("-batch-out="):] 
+				elif flag.startswith("-batch-workers="): batch_options["workers"] = int(flag[len("-batch-workers="):]) 
+				elif flag.startswith("-batch-timeout="): batch_options["timeout"] = float(flag[len("-batch-timeout="):]) 
+				elif flag.startswith("-batch-order="): batch_options["order"] = flag[len("-batch-order="):] 
+			if manifest is None: 
+				print("ERROR: The batch options need -batch=<directory|manifest>") 
+				sys.exit(1) 
+			assembly = bytecode.load(sys.argv[1]) 
+			if len(Interpreter().load(assembly)) > 0: # so the link errors are shown once, not by every run 
+				sys.exit(1) 
+			try: 
+				batch = Batch(assembly, Batch.inputs_of(manifest), quicken = "-no-quicken" not in quicken_flags, fuse = "-no-fuse" not in quicken_flags, threshold = gc_threshold, **batch_options) 
+			except (OSError, ValueError) as e: 
+				print("ERROR:", e) 
+				sys.exit(1) 
+			if out is not None: 
+				os.makedirs(out, exist_ok=True) 
+
+			def report(result): 
+				filename, status, text, message, seconds = result 
+				line = f"{filename}: exit {status} in {seconds:.3f} s" + (f" ({message})" if message is not None else "") 
+				if out is None: 
+					print("==", line) 
+					sys.stdout.write(text) 
+				else: 
+					with open(os.path.join(out, os.path.basename(filename) + ".out"), "w") as f: 
+						f.write(text) 
+					print(line) 
+			batch.run(report) 
+			print(batch.summary(), file=sys.stderr) 
+			sys.exit(0 if all(result[1] == 0 for result in batch.results) else 1) 
+
+		if len(serve_flags) > 0: 
+			address = None 
+			slice = 4096 
+			for flag in serve_flags: 
+				if flag.startswith("-serve="): address = flag[len("-serve="):] 
+				elif flag.startswith("-slice="): slice = int(flag[len("-slice="):]) 
+			if address is None or slice < 1: 
+				print("ERROR: Serving needs -serve=<[host:]port>, and slices of at least one instruction") 
+				sys.exit(1) 
+			host, _, port = address.rpartition(":") 
+			assembly = bytecode.load(sys.argv[1]) 
+			if len(Interpreter().load(assembly)) > 0: 
+				sys.exit(1) 
+			try: 
+				asyncio.run(serve(assembly, host or None, int(port), slice, "-no-quicken" not in quicken_flags, "-no-fuse" not in quicken_flags, gc_threshold)) 
+			except KeyboardInterrupt: 
+				pass 
+			sys.exit(0) 
+
+		image = None 
+		point = None 
+		for flag in snapshot_flags: 
+			if flag.startswith("-snapshot="): image = flag[len("-snapshot="):] 
+			elif flag.startswith("-snapshot-at="): point = flag[len("-snapshot-at="):] 
+		state = None 
+		start = None 
+		if image is not None: 
+			if len(trace_flags) > 0 or len(profile_flags) > 0: 
+				print("ERROR: Snapshots can't be used with -trace or -profile") 
+				sys.exit(1) 
+			if point is not None and point != "input" and not point.isdigit(): 
+				print("ERROR: The snapshot point must be input or a PC") 
+				sys.exit(1) 
+			key = snapshot.key(sys.argv[1], point) 
+			try: 
+				state = snapshot.load(image, key, globals()) 
+			except snapshot.Stale as e: 
+				print(f"Snapshot {e}, so it's being made again", file=sys.stderr) 
+
+		if state is not None: 
+			start, text = restore(state) 
+			output.write(text) 
+		else: 
+			load(bytecode.load(sys.argv[1])) 
+			if len(errors) > 0: 
+				sys.exit(1) 
+			if image is not None and point is None: 
+				snapshot.save(image, key, capture()) 
+		try: 
+			if len(trace_flags) > 0: 
+				size = 1024 
+				out = None 
+				for flag in trace_flags: 
+					if flag.startswith("-trace="): size = int(flag[len("-trace="):]) 
+					elif flag.startswith("-trace-file="): out = flag[len("-trace-file="):] 
+				if size < 1: 
+					print("ERROR: The trace must hold at least one instruction") 
+					sys.exit(1) 
+				Trace(program, size, out).run(display_mode, engine) 
+			elif len(profile_flags) == 0: 
+				counter = None 
+				if "-fuse-stats" in quicken_flags: 
+					fuse_stats = True 
+					counter = DispatchCounter() 
+					atexit.register(lambda: fuser.report(counter.count) if fuser is not None else None) 
+				quicken = "-no-quicken" not in quicken_flags 
+				fuse = "-no-fuse" not in quicken_flags 
+				if image is not None and state is None and point is not None: 
+					if not run_to_snapshot(image, key, snapshot_points(point), display_mode, engine, counter, quicken, fuse): 
+						print(f"The program ended before getting to the snapshot point, so {image} wasn't made", file=sys.stderr) 
+				else: 
+					run(display_mode, engine, counter, quicken, fuse, start) 
+			else: 
+				interval = None 
+				top = 10 
+				folded = None 
+				for flag in profile_flags: 
+					if flag.startswith("-profile="): interval = float(flag[len("-profile="):]) / 1000 
+					elif flag.startswith("-profile-top="): top = int(flag[len("-profile-top="):]) 
+					elif flag.startswith("-folded="): folded = flag[len("-folded="):] 
+
+				# The map syn wrote next to the code, if it's there 
+				profiler = Profiler(program, sourcemap.load(sys.argv[1] + ".map"), interval) 
+				profiler.run(display_mode) 
+				profiler.report(top) 
+				if folded is not None: 
+					profiler.export(folded) 
+		except bulk.ListError as e: # a mistake in the program, not in the interpreter 
+			output.flush() 
+			print("ERROR:", e) 
+			sys.exit(1) 
@@ -0,0 +1,42 @@
+import os
+import sys
+import bulk
+import int as interpreter
+from lex import lex
+from syn import compile_tokens
+
+
+# Lexes, compiles and runs the files in this process, handing the instructions straight from the
+# compiler to the interpreter instead of going through out.jgc. The program isn't run if it didn't
+# compile or link. Returns the compiled Library.
+def run(files, display_mode = "-none"):
+	library = compile_tokens(lex(files))
+	if len(library.errors) > 0:
+		return library
+	interpreter.load(library.assembly())
+	if len(interpreter.errors) == 0:
+		interpreter.run(display_mode)
+	return library
+
+
+if __name__ == "__main__":
+	args = [arg for arg in sys.argv[1:] if not arg.startswith("-")]
+	flags = [arg for arg in sys.argv[1:] if arg.startswith("-")]
+	display_modes = ['-none', '-lines', '-code']
+	missing = [arg for arg in args if not os.path.isfile(arg)]
+	if len(args) < 1:
+		print("Usage: python3 jgpl.py <lib.jg> <file.jg> <optional: file.jg> <...> <display_mode>")
+	elif len(flags) > 1 or (len(flags) == 1 and flags[0] not in display_modes):
+		print('Unknown display_mode. Options are', display_modes)
+	elif len(missing) > 0:
+		print("ERROR: No such file:", missing[0])
+		sys.exit(1)
+	else:
+		try:
+			library = run(args, flags[0] if len(flags) > 0 else "-none")
+		except bulk.ListError as e: # a mistake in the program, not in the interpreter
+			interpreter.output.flush()
+			print("ERROR:", e)
+			sys.exit(1)
+		if len(library.errors) > 0 or len(interpreter.errors) > 0:
+			sys.exit(1)
@@ -29,10 +29,12 @@ class NodeIterator:
 
 
 class Lex: 
-	def __init__(self, token = None, lexeme = None, indent = 0):
+	def __init__(self, token = None, lexeme = None, indent = 0, line = 0, filename = None):
 		self.token = token
 		self.lexeme = lexeme
 		self.indent = indent
+		self.line = line # the line of the file the token is on, starting at 1 
+		self.filename = filename 
 		self.next = None
 
 
@@ -66,6 +68,9 @@ def lex(filenames):
 	current = head
 	for filename in filenames: 
 		with open(filename) as f: 
+			line = 1 
+			current.line = line 
+			current.filename = filename 
 			ch = f.read(1)
 			lexeme = ""
 			isLetter = False 
@@ -80,7 +85,7 @@ def lex(filenames):
 						current.token = Token.STRING
 						current.indent = indent 
 						current.lexeme = lexeme 
-						current.next = Lex() 
+						current.next = Lex(line=line, filename=filename) 
 						current = current.next
 						lexeme = ""
 					else: 
@@ -97,7 +102,7 @@ def lex(filenames):
 							isIndent = False 
 						current.lexeme = lexeme 
 						current.indent = indent
-						current.next = Lex() 
+						current.next = Lex(line=line, filename=filename) 
 						current = current.next
 						isLetter = True 
 						lexeme = "" 
@@ -112,7 +117,7 @@ def lex(filenames):
 						indent = len(indent) 
 						current.indent = indent 
 						current.lexeme = lexeme 
-						current.next = Lex() 
+						current.next = Lex(line=line, filename=filename) 
 						current = current.next 
 						isIndent = False 
 						isNumber = True 
@@ -137,13 +142,15 @@ def lex(filenames):
 							isLetter = False 
 						current.lexeme = lexeme 
 						current.indent = indent 
-						current.next = Lex()
+						current.next = Lex(line=line, filename=filename)
 						current = current.next
 					current.token = Token.NEWLINE
 					current.lexeme = "\n"
 					indent = 0 
 					current.indent = indent 
-					current.next = Lex() 
+					if ch == "\n": 
+						line += 1 
+					current.next = Lex(line=line, filename=filename) 
 					current = current.next 
 					lexeme = ""
 				elif ch == '"': 
@@ -163,13 +170,13 @@ def lex(filenames):
 							isLetter = False 
 						current.lexeme = lexeme 
 						current.indent = indent 
-						current.next = Lex() 
+						current.next = Lex(line=line, filename=filename) 
 						current = current.next 
 					# Symbols can only be a single character long
 					current.token = Token.TERMINAL
 					current.lexeme = ch 
 					current.indent = indent 
-					current.next = Lex() 
+					current.next = Lex(line=line, filename=filename) 
 					current = current.next
 					lexeme = ""
 				else: 
@@ -187,7 +194,7 @@ def lex(filenames):
 							isIndent = False 
 						current.lexeme = lexeme 
 						current.indent = indent 
-						current.next = Lex() 
+						current.next = Lex(line=line, filename=filename) 
 						current = current.next 
 						lexeme = "" 
 				ch = f.read(1)
@@ -201,9 +208,9 @@ def lex(filenames):
 		current.lexeme = lexeme 
 		current.indent = indent 
 
-		current.next = Lex(token=Token.NEWLINE, lexeme='\n', indent=indent)
+		current.next = Lex(token=Token.NEWLINE, lexeme='\n', indent=indent, line=current.line, filename=current.filename) # where the last token is 
 		current = current.next
-		current.next = Lex()
+		current.next = Lex(line=line, filename=filename)
 		current = current.next
 			
 		#if filename == filenames[-1]: current.next = None 
@@ -0,0 +1,86 @@
+import os
+import sys
+import json
+import threading
+import socketserver
+from lex import lex
+from syn import compile_tokens
+
+
+DEFAULT_SOCKET = "/tmp/jgpl.sock"
+
+
+# Keeps the compiled library in memory, recompiling it whenever one of its files changes.
+class WarmLibrary:
+	def __init__(self, filenames):
+		self.filenames = [os.path.abspath(filename) for filename in filenames]
+		self.lock = threading.Lock()
+		self.library = None
+		self.stamps = None
+		self.reloads = 0
+
+
+	# Returns a (mtime, size) tuple per library file, used to tell if any of them changed.
+	def stat(self):
+		stamps = []
+		for filename in self.filenames:
+			info = os.stat(filename)
+			stamps.append((info.st_mtime_ns, info.st_size))
+		return stamps
+
+
+	# Returns the compiled library, reloading it first if the files on disk are newer.
+	def get(self):
+		stamps = self.stat()
+		with self.lock:
+			if stamps != self.stamps:
+				self.library = compile_tokens(lex(self.filenames))
+				self.stamps = stamps
+				self.reloads += 1
+				print("Loaded library", self.filenames, "(reload " + str(self.reloads) + ")")
+			return self.library
+
+
+class CompileHandler(socketserver.StreamRequestHandler):
+	# Each request is one JSON line: {"files": [...]}. The reply is one JSON line holding either
+	# the compiled code and any compile errors, or an error message.
+	def handle(self):
+		line = self.rfile.readline()
+		try:
+			request = json.loads(line)
+			library = self.server.library.get().copy()
+			library = compile_tokens(lex(request["files"]), library)
+			reply = {"code": library.code, "map": str(library.source_map()), "errors": library.errors}
+		except Exception as e:
+			reply = {"error": f"{type(e).__name__}: {e}"}
+		self.wfile.write((json.dumps(reply) + "\n").encode())
+
+
+class CompileServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+	daemon_threads = True
+
+	def __init__(self, socket_path, library):
+		self.library = library
+		if os.path.exists(socket_path):
+			os.remove(socket_path)
+		super().__init__(socket_path, CompileHandler)
+
+
+if __name__ == "__main__":
+	args = [arg for arg in sys.argv[1:] if not arg.startswith("-socket=")]
+	sockets = [arg[len("-socket="):] for arg in sys.argv[1:] if arg.startswith("-socket=")]
+	if len(args) < 1:
+		print("Usage: python3 server.py <lib.jg> <optional: lib2.jg> <...> <optional: -socket=path>")
+	else:
+		socket_path = sockets[-1] if len(sockets) > 0 else DEFAULT_SOCKET
+		library = WarmLibrary(args)
+		library.get()
+		server = CompileServer(socket_path, library)
+		print("Serving on", socket_path)
+		try:
+			server.serve_forever()
+		except KeyboardInterrupt:
+			pass
+		finally:
+			server.server_close()
+			os.remove(socket_path)
@@ -0,0 +1,93 @@
+import os
+import gc
+import pickle
+import hashlib
+
+
+MAGIC = b"JGS1"
+
+# Bump whenever what a snapshot holds changes in a way the interpreter sources alone would not show.
+VERSION = "1"
+INTERPRETER = ["int.py", "bytecode.py", "streams.py", "bulk.py"]
+
+
+# Raised when a snapshot was made from a different program, point or interpreter than the one
+# it's being loaded for.
+class Stale(Exception):
+	pass
+
+
+# Snapshots are images of the interpreter once it has loaded a program (see capture() in int.py):
+# the Code objects, already linked, the functions, labels and blocks, and when they were taken
+# at a point of the run, the variables, heap and stack there too. Starting from one skips reading
+# and linking the program. Each starts with a line holding the key of what it was made from, so
+# one made from anything else is rejected without reading the rest.
+
+
+# Returns the hash of the interpreter sources, the program file's contents and the point.
+def key(program_file, point = None):
+	digest = hashlib.sha256()
+	digest.update(VERSION.encode())
+	source_directory = os.path.dirname(os.path.abspath(__file__))
+	for filename in [os.path.join(source_directory, name) for name in INTERPRETER] + [program_file]:
+		with open(filename, "rb") as f:
+			contents = f.read()
+		digest.update(str(len(contents)).encode() + b"\0")
+		digest.update(contents)
+	digest.update(str(point).encode())
+	return digest.hexdigest()
+
+
+def save(filename, key, state):
+	temp = filename + ".tmp" + str(os.getpid())
+	with open(temp, "wb") as f:
+		f.write(MAGIC + b" " + key.encode() + b"\n")
+		pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+	os.replace(temp, filename)
+
+
+# Returns the state saved in the snapshot, or None if there isn't one. Raises Stale if it was made
+# with a different key. The interpreter's classes it holds are looked up in namespace (the globals
+# of int.py, which may be __main__ or imported) instead of the module they were saved from.
+def load(filename, key, namespace):
+	try:
+		f = open(filename, "rb")
+	except FileNotFoundError:
+		return None
+	with f:
+		header = f.readline().split()
+		if len(header) != 2 or header[0] != MAGIC:
+			raise Stale(f"{filename} isn't a snapshot")
+		if header[1].decode() != key:
+			raise Stale(f"{filename} was made from a different program or interpreter")
+
+		unpickler = Unpickler(f, namespace)
+		collecting = gc.isenabled()
+		gc.disable() # the collector would keep walking the objects as they're made, for nothing
+		try:
+			state = unpickler.load()
+		except (pickle.UnpicklingError, EOFError, AttributeError) as e:
+			raise Stale(f"{filename} can't be read ({e})")
+		finally:
+			if collecting:
+				gc.enable()
+	# Otherwise the objects would all be in the youngest generation, and the collections the run
+	# starts with would walk every one of them. These stay for the run anyway.
+	gc.freeze()
+	return state
+
+
+class Unpickler(pickle.Unpickler):
+	def __init__(self, f, namespace):
+		super().__init__(f)
+		self.namespace = namespace
+
+
+	def find_class(self, module, name):
+		if module not in ["__main__", "int"]:
+			return super().find_class(module, name)
+		path = name.split(".") # eg: Code.Func
+		value = self.namespace[path[0]]
+		for part in path[1:]:
+			value = getattr(value, part)
+		return value
@@ -0,0 +1,88 @@
+import os
+import bytecode
+
+
+# Where the code of a compiled program came from. syn writes it next to the code it emits (eg:
+# out.jgc.map for out.jgc). Instructions are mapped by PC, which is the same in the text and binary
+# formats, to the file and line of the statement that produced them. Function labels are mapped
+# to the production they were compiled from. The file has one entry per line, with the fields
+# separated by tabs:
+#   function <label> <file> <line> <production>
+#   pc <pc> <file> <line>
+class SourceMap:
+	def __init__(self):
+		self.functions = {} # key is the label of the function, value is a (file, line, production) tuple
+		self.lines = [] # the (file, line) of the statement each instruction came from, by PC
+		self.text = {} # key is a file, value is its lines (read when first needed)
+
+
+	# Returns "file:line" for the instruction at pc.
+	def location(self, pc):
+		if pc < 0 or pc >= len(self.lines) or self.lines[pc][0] is None:
+			return "?"
+		return f"{self.lines[pc][0]}:{self.lines[pc][1]}"
+
+
+	# Returns the text of the line of the file, or "" if the file can't be read.
+	def source(self, filename, line):
+		if filename not in self.text:
+			try:
+				with open(filename) as f:
+					self.text[filename] = f.read().split('\n')
+			except OSError:
+				self.text[filename] = []
+		lines = self.text[filename]
+		return lines[line - 1].strip() if 0 < line <= len(lines) else ""
+
+
+	# Returns the production the function was compiled from.
+	def production(self, label):
+		return self.functions[label][2] if label in self.functions else ""
+
+
+	def __str__(self):
+		out = ""
+		for label, (filename, line, production) in self.functions.items():
+			out += f"function\t{label}\t{filename}\t{line}\t{production}\n"
+		for pc, (filename, line) in enumerate(self.lines):
+			out += f"pc\t{pc}\t{filename}\t{line}\n"
+		return out
+
+
+	def save(self, filename):
+		with open(filename, "w") as f:
+			f.write(str(self))
+
+
+# Returns the SourceMap held in the text.
+def parse(text):
+	source_map = SourceMap()
+	for entry in text.split('\n'):
+		fields = entry.split('\t')
+		if fields[0] == "function" and len(fields) == 5:
+			source_map.functions[fields[1]] = (fields[2], int(fields[3]), fields[4])
+		elif fields[0] == "pc" and len(fields) == 4:
+			source_map.lines.append((fields[2] if fields[2] != "None" else None, int(fields[3])))
+	return source_map
+
+
+# Returns the SourceMap stored in the file, or None if there isn't one.
+def load(filename):
+	if not os.path.exists(filename):
+		return None
+	with open(filename) as f:
+		return parse(f.read())
+
+
+# Returns the SourceMap of the code, given the (file, line) each line of the code came from and
+# the (file, line, production) each function came from.
+def build(code, sources, functions):
+	source_map = SourceMap()
+	source_map.functions.update(functions)
+	for i, line in enumerate(code.split('\n')):
+		if bytecode.is_label(line):
+			continue
+		command, operands = bytecode.split(line)
+		if command in bytecode.OPCODE_NUMBERS: # the lines assemble() turns into instructions
+			source_map.lines.append(sources[i] if i < len(sources) else (None, 0))
+	return source_map
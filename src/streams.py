@@ -0,0 +1,190 @@
+import io
+import re
+import sys
+import atexit
+import codecs
+
+
+FLUSH_POLICIES = ["line", "size", "exit"]
+DEFAULT_SIZE = 8192
+CHUNK = 65536
+
+WORD = re.compile(r"\S+")
+
+
+# Where PRINT writes to: stdout, a file, or an object with write() (eg: an io.StringIO). Writes are collected and written out together, when
+# the flush policy says so:
+#   line: when a newline is written, or size characters are waiting
+#   size: when size characters are waiting (a size of 0 writes every PRINT straight away)
+#   exit: only when flushed (eg: at exit, or before waiting on interactive input)
+# The default is line on a terminal and size otherwise, the way stdout is buffered in C.
+class Output:
+	def __init__(self, filename = None, policy = None, size = DEFAULT_SIZE):
+		self.owned = isinstance(filename, str)
+		self.file = open(filename, "w") if self.owned else filename # None for whatever sys.stdout is
+		if policy is None:
+			policy = "line" if (self.file or sys.stdout).isatty() else "size"
+		if policy not in FLUSH_POLICIES:
+			raise ValueError(f"unknown flush policy '{policy}' (the options are {FLUSH_POLICIES})")
+		self.policy = policy
+		self.line = policy == "line"
+		self.size = size if policy != "exit" else sys.maxsize
+		self.parts = [] # the text waiting to be written
+		self.pending = 0 # the characters waiting to be written
+		atexit.register(self.close)
+
+
+	def write(self, value):
+		text = value if type(value) is str else str(value)
+		self.parts.append(text)
+		self.pending += len(text)
+		if self.pending >= self.size or (self.line and "\n" in text):
+			self.flush()
+
+
+	def flush(self):
+		if len(self.parts) == 0:
+			return
+		text = "".join(self.parts)
+		self.parts = []
+		self.pending = 0
+		file = self.file if self.file is not None else sys.stdout
+		file.write(text)
+		file.flush()
+
+
+	def close(self):
+		self.flush()
+		if self.owned and not self.file.closed:
+			self.file.close()
+		atexit.unregister(self.close)
+
+
+# Passes what's written on to an Output, keeping a copy (eg: to write it out again later).
+class Recording:
+	def __init__(self, output):
+		self.output = output
+		self.parts = []
+
+
+	def write(self, value):
+		text = value if type(value) is str else str(value)
+		self.parts.append(text)
+		self.output.write(text)
+
+
+	def text(self):
+		return "".join(self.parts)
+
+
+	def flush(self):
+		self.output.flush()
+
+
+	def close(self):
+		self.output.close()
+
+
+# Where INPUT reads from: stdin, a file, or an object with read() (eg: an io.StringIO). The input is read in chunks as large as are
+# available into a buffer, and each INPUT takes the next token from it: the next line, or with
+# words, the next run of characters that aren't whitespace. Before waiting on a terminal for more
+# input, the output is flushed so prompts are seen.
+class Input:
+	def __init__(self, filename = None, output = None, words = False):
+		self.owned = isinstance(filename, str)
+		self.file = open(filename, "rb") if self.owned else filename # None for whatever sys.stdin is
+		self.output = output
+		self.words = words
+		self.interactive = (self.file or sys.stdin).isatty()
+		encoding = getattr(sys.stdin, "encoding", None) if filename is None else None
+		self.decoder = codecs.getincrementaldecoder(encoding or "utf-8")()
+		self.data = "" # the input read but not used yet, from position on
+		self.position = 0
+		self.eof = False
+		self.deferred = False # whether a read that runs out raises Blocked instead of waiting
+		self.waiting = False # whether the last read was blocked
+
+
+	# Returns the next token, like input() does for lines. Raises EOFError if there isn't one.
+	def read(self):
+		if self.words:
+			return self.read_word()
+		while True:
+			end = self.data.find("\n", self.position)
+			if end != -1:
+				line = self.data[self.position:end]
+				self.position = end + 1
+				return line[:-1] if line.endswith("\r") else line
+			if self.eof:
+				if self.position < len(self.data): # the last line, without a newline
+					line = self.data[self.position:]
+					self.position = len(self.data)
+					return line
+				raise EOFError("EOF when reading a line")
+			self.fill()
+
+
+	def read_word(self):
+		while True:
+			match = WORD.search(self.data, self.position)
+			if match is not None and (match.end() < len(self.data) or self.eof):
+				self.position = match.end()
+				return match.group()
+			if self.eof:
+				self.position = len(self.data)
+				raise EOFError("EOF when reading a word")
+			self.fill()
+
+
+	# Gets more input when a read runs out. If the input is deferred, the read is stopped with
+	# Blocked instead, without having used anything, so it can be made again after receive().
+	def fill(self):
+		if self.deferred:
+			self.waiting = True
+			raise Blocked()
+		self.receive()
+
+
+	# Reads the next chunk into the buffer, dropping the part that has been used. This is where
+	# reading waits for the input.
+	def receive(self):
+		self.waiting = False
+		if self.interactive and self.output is not None:
+			self.output.flush()
+		file = self.file if self.file is not None else getattr(sys.stdin, "buffer", sys.stdin)
+		chunk = file.read1(CHUNK) if hasattr(file, "read1") else file.read(CHUNK)
+		self.eof = len(chunk) == 0
+		if isinstance(chunk, bytes):
+			chunk = self.decoder.decode(chunk, final=self.eof)
+		self.data = self.data[self.position:] + chunk
+		self.position = 0
+
+
+	def close(self):
+		if self.owned:
+			self.file.close()
+
+
+# Raised by a Pending input that's read before it has been given anything to read.
+class Blocked(Exception):
+	pass
+
+
+# An Input that's given its text (eg: by an event loop, as it arrives) instead of reading it.
+# It's always deferred, so when it runs out the read can be made again once it has been given more.
+class Pending(Input):
+	def __init__(self, output = None, words = False):
+		super().__init__(io.StringIO(), output, words)
+		self.deferred = True
+
+
+	def give(self, text):
+		self.data = self.data[self.position:] + text
+		self.position = 0
+		self.waiting = False
+
+
+	# Marks the end of the input, after which reads that run out raise EOFError.
+	def end(self):
+		self.eof = True
+		self.waiting = False
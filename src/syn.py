@@ -1,5 +1,9 @@
+import os 
 import sys 
+import bytecode 
+import sourcemap 
 from lex import *
+from cache import BuildCache, DEFAULT_DIRECTORY, DEFAULT_MAX_SIZE
 from collections import defaultdict
 
 class Command: 
@@ -210,15 +214,11 @@ class Parameter:
 
 
 class Function: 
-	counter = 1
-
-	def __init__(self): 
+	def __init__(self, name): 
 		self.head = None 
 		self.tail = None
 		self.return_type = None
-		self.name = "F" + str(Function.counter)
-		Function.counter += 1
-		pass
+		self.name = name
 
 
 	def is_function(command): 
@@ -227,11 +227,11 @@ class Function:
 
 	# Interprets command as a function and returns the created function object. 
 	# Precondition: is_function must be True. 
-	def create_function(command): 
+	def create_function(command, name): 
 		# This is a function, so re-contextualize the parts of the function. 
 		# If there's <a b c ...>, that's a parameter, and all words outside
 		# those brackets are terminals.
-		func = Function() 
+		func = Function(name) 
 		current = command[1]
 		previous = None 
 		while current is not None: 
@@ -280,6 +280,18 @@ class Function:
 		return self.__str__()
 
 
+	# Returns what a statement has to look like to reduce by the function: its return type, keywords 
+	# and the types of its parameters (not their aliases). 
+	def signature(self): 
+		parts = [self.return_type] 
+		for node in self.head: 
+			if isinstance(node, Parameter): 
+				parts.append(("*" if node.indirect else "") + node.type) 
+			else: 
+				parts.append(node.lexeme) 
+		return tuple(parts) 
+
+
 class Reduction:
 	class PassedParameter: 
 		# Alias is the name of the variable inside the next function as a string. 
@@ -351,35 +363,104 @@ class Reduction:
 		return code 
 
 
-def syn(tokens, display_mode = "-none"): 
+# Everything a compilation has learned so far: the code emitted, the productions and casts 
+# declared, and the counter used to name the next function. Compiling the library once and 
+# handing a copy of the result to each program skips re-reducing the library every time. 
+class Library: 
+	def __init__(self): 
+		self.code = "" 
+		self.assembler = bytecode.Assembler() # the code, assembled as it is emitted 
+		self.sources = [] # the (file, line) of the statement each line of code came from 
+		self.functions = {} # key is the label of a function, value is the (file, line, production) it came from 
+		self.productions = defaultdict(list) # key is the type, value is the production
+		self.type_casts = defaultdict(list) # key is the type, value is the list of types it converts 1-1 to
+		self.function_counter = 1 
+		self.errors = [] 
+
+
+	# Returns a Library that can be extended without modifying this one. 
+	def copy(self): 
+		library = Library() 
+		library.code = self.code 
+		library.assembler = self.assembler.copy() 
+		library.sources = list(self.sources) 
+		library.functions = dict(self.functions) 
+		for return_type, return_list in self.productions.items(): 
+			library.productions[return_type] = list(return_list) 
+		for var_type, cast_list in self.type_casts.items(): 
+			library.type_casts[var_type] = list(cast_list) 
+		library.function_counter = self.function_counter 
+		library.errors = list(self.errors) 
+		return library 
+
+
+	def error(self, *message): 
+		self.errors.append(" ".join(str(part) for part in message))
+		print("ERROR:", *message) 
+
+
+	# Returns the Assembly of the code, without going through its text. 
+	def assembly(self): 
+		return self.assembler.assembly 
+
+
+	# Returns the SourceMap of the code. 
+	def source_map(self): 
+		return sourcemap.build(self.code, self.sources, self.functions) 
+
+
+# Compiles the tokens on top of the given library, returning the library holding the result. 
+def compile_tokens(tokens, library = None, display_mode = "-none"): 
 	commands = Command.group(tokens, display_mode)
+	library = Library() if library is None else library 
 	
 	code = "" 
-	productions = defaultdict(list) # key is the type, value is the production
-	type_casts = defaultdict(list) # key is the type, value is the list of types it converts 1-1 to
+	productions = library.productions 
+	type_casts = library.type_casts 
 	current_command = commands
 	stack = [] # read the data from top to bottom, turning it into code 
 	return_specified = False # Functions must have a return specified 
+
+	# Adds the code produced by the command, remembering where each line of it came from. 
+	def emit(text, command): 
+		nonlocal code 
+		code += text 
+		for line in text.split('\n')[:-1]: 
+			library.assembler.add(line) 
+		library.sources.extend([(command.head.filename, command.head.line)] * text.count('\n')) 
+
 	while current_command is not None: 
 		if Function.is_function(current_command): 
-			func = Function.create_function(current_command)
+			func = Function.create_function(current_command, "F" + str(library.function_counter))
+			library.function_counter += 1 
 			if func.head == func.tail and isinstance(func.head, Parameter) and func.head.type != func.return_type: 
 				#print("CAST FOUND:", func.head.type, "->", func.return_type) 
-				type_casts[func.head.type].append(func.return_type)
+				if func.return_type not in type_casts[func.head.type]: 
+					type_casts[func.head.type].append(func.return_type)
 			else: 
-				productions[func.return_type].append(func)
-			code += func.name + ":\n" 
+				# A function with the signature of one declared in an earlier file (eg: a program defining 
+				# its own list type over the one in lib.jg) takes its place. 
+				signature = func.signature() 
+				same = [i for i, production in enumerate(productions[func.return_type]) if production.signature() == signature 
+					and library.functions[production.name][0] != current_command.head.filename] 
+				if len(same) > 0: 
+					productions[func.return_type][same[0]] = func 
+				else: 
+					productions[func.return_type].append(func)
+			emit(func.name + ":\n", current_command) 
+			library.functions[func.name] = (current_command.head.filename, current_command.head.line, str(func)) 
 			return_specified = False 
 			#print("ADDED PRODUCTION:", productions) 
 		elif current_command[0].lexeme == "return": 
 			if current_command.next is not None: 
-				print("ERROR: command following return must be None") 
-			code += "RETURN " + current_command[1].lexeme + "\n"
+				library.error("command following return must be None") 
+			emit("RETURN " + current_command[1].lexeme + "\n", current_command)
 			return_specified = True 
 		elif current_command[0].lexeme == '~': # This is a terminal command, which can be translated directly.  
-			code += current_command.str(raw=True)[2:] + "\n"
+			emit(current_command.str(raw=True)[2:] + "\n", current_command)
 		elif current_command[0].lexeme == 'main': 
-			code += "main:\n" 
+			emit("main:\n", current_command) 
+			library.functions["main"] = (current_command.head.filename, current_command.head.line, "main") 
 		else: 
 			#print("Reducing:", current_command)
 			valid_reductions = reduce_statement(productions, type_casts, current_command.head) 
@@ -391,13 +472,13 @@ def syn(tokens, display_mode = "-none"):
 					if r.compare(reduction):
 						reduction = r # if True, then r is "more preferrable"  
 				#print("Reduction taken:", reduction)
-				code += reduction.code() 
+				emit(reduction.code(), current_command) 
 			else: 
-				print("ERROR: no valid reductions", current_command)
+				library.error("no valid reductions", current_command)
 
 		if current_command.contents is not None: 
 			if not Function.is_function(current_command) and current_command[0].lexeme != 'main': 
-				code += "ENTERBLOCK\n"	
+				emit("ENTERBLOCK\n", current_command)	
 			stack.append(current_command) 
 			current_command = current_command.contents
 		else: 
@@ -407,21 +488,33 @@ def syn(tokens, display_mode = "-none"):
 				current_command = stack.pop()
 				if Function.is_function(current_command): 
 					if not return_specified: 
-						code += "RETURN\n"
+						emit("RETURN\n", current_command)
 				elif current_command[0].lexeme != 'main': 
-					code += "EXITBLOCK\n"
+					emit("EXITBLOCK\n", current_command)
 			current_command = current_command.next
 
+	library.code += code 
+	return library 
+
+
+# Compiles the tokens and writes the resulting code to the output file (unless it is None), with 
+# its source map next to it. If a library is given, the tokens are compiled on top of a copy of it. 
+def syn(tokens, display_mode = "-none", library = None, output = "out.jgc"): 
+	library = compile_tokens(tokens, None if library is None else library.copy(), display_mode) 
+
 	if display_mode == "-productions":
-		for return_type, return_list in productions.items():
+		for return_type, return_list in library.productions.items():
 			for production in return_list: 
 				print(" ", production)
 	elif display_mode == "-code": 
-		print(code)
+		print(library.code)
 
-	f = open("out.jgc", "w") 
-	f.write(code) 
-	f.close() 
+	if output is not None: 
+		f = open(output, "w") 
+		f.write(library.code) 
+		f.close() 
+		library.source_map().save(output + ".map") 
+	return library 
 
 
 def reduce_statement(global_productions, type_casts, head_token): 
@@ -500,19 +593,74 @@ def try_reduce(head_token, production, statement, global_productions, type_casts
 
 if __name__ == "__main__": 
 	if len(sys.argv) < 3:
-		print("Usage: python syn.py lex.py <file.jg> <optional: file.jg> <...> <output mode>")
+		print("Usage: python syn.py lex.py <file.jg> <optional: file.jg> <...> <output mode> <cache options>")
 		print("Output modes: -commands, -blocks, -productions, -code")  
+		print("Output formats: -binary (writes out.jgb instead of out.jgc)") 
+		print("Cache options: -nocache, -cache=<directory>, -cache-size=<bytes>, -cache-stats")
 	else: 
-		display_mode = sys.argv[-1] 
-		if display_mode[0] != "-":
-			display_mode = "" 
+		files = [arg for arg in sys.argv[2:] if arg[0] != "-"] 
+		flags = [arg for arg in sys.argv[2:] if arg[0] == "-"] 
+		display_mode = "" 
+		cache_directory = os.environ.get("JGPL_CACHE", DEFAULT_DIRECTORY) 
+		cache_size = DEFAULT_MAX_SIZE 
+		use_cache = True 
+		show_stats = False 
+		binary = False 
 
 		display_modes = ["-commands", "-blocks", "-productions", "-code"] 
-		if len(display_mode) > 0 and display_mode not in display_modes:
-			print("Unrecognized display mode:", display_mode)
+		unknown = [] 
+		for flag in flags: 
+			if flag in display_modes: display_mode = flag 
+			elif flag == "-nocache": use_cache = False 
+			elif flag.startswith("-cache="): cache_directory = flag[len("-cache="):] 
+			elif flag.startswith("-cache-size="): cache_size = int(flag[len("-cache-size="):]) 
+			elif flag == "-cache-stats": show_stats = True 
+			elif flag == "-binary": binary = True 
+			else: unknown.append(flag) 
+
+		missing = [filename for filename in files if not os.path.isfile(filename)] 
+		if len(unknown) > 0:
+			print("Unrecognized display mode:", unknown[0])
 			print("Valid display modes:", display_modes) 
+		elif len(missing) > 0: 
+			print("ERROR: No such file:", missing[0]) 
+			sys.exit(1) 
 		else: 
-			if len(display_mode) == 0: files = sys.argv[2:]
-			else: files = sys.argv[2:-1]
-			tokens = lex(files)
-			syn(tokens, display_mode) 
+			# Display modes show the intermediate stages, so those always compile from scratch. 
+			cache = BuildCache(cache_directory, cache_size) if use_cache else None 
+			artifacts = None 
+			if cache is not None and len(display_mode) == 0: 
+				key = cache.key(files) 
+				artifacts = cache.get(key) 
+
+			output = "out.jgb" if binary else "out.jgc" 
+			if artifacts is not None and output in artifacts: 
+				for name in [output, output + ".map"]: 
+					f = open(name, "wb") 
+					f.write(artifacts[name]) 
+					f.close() 
+			else: 
+				if artifacts is not None: 
+					code = artifacts["out.jgc"].decode() 
+					source_map = artifacts["out.jgc.map"].decode() 
+					errors = [] 
+				else: 
+					tokens = lex(files)
+					library = syn(tokens, display_mode, output = None if binary else "out.jgc")
+					code = library.code 
+					source_map = str(library.source_map()) 
+					errors = library.errors 
+
+				artifacts = {"out.jgc": code, "out.jgc.map": source_map} 
+				if binary: 
+					artifacts["out.jgb"] = bytecode.encode(bytecode.assemble(code.split('\n'))) 
+					artifacts["out.jgb.map"] = source_map 
+					for name in ["out.jgb", "out.jgb.map"]: 
+						f = open(name, "wb") 
+						f.write(artifacts[name].encode() if isinstance(artifacts[name], str) else artifacts[name]) 
+						f.close() 
+				if cache is not None and len(display_mode) == 0 and len(errors) == 0: 
+					cache.put(key, artifacts) 
+
+			if show_stats and cache is not None: 
+				print(cache) 
@@ -0,0 +1,268 @@
+import io
+import os
+import sys
+import math
+import json
+import time
+import tempfile
+import contextlib
+import syn
+from lex import lex
+from syn import compile_tokens, Command
+
+
+LIBRARY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "lib.jg")
+PHASES = ["lex", "group", "reduce", "emit"]
+DEFAULT_REPEAT = 3
+DEFAULT_MARGIN = 0.15 # how far over 1 the fitted exponent of a phase has to be for it to be flagged
+MINIMUM_SECONDS = 0.002 # phases that never take this long are too fast to fit
+
+
+# The generators of the synthetic programs, one per axis. Each takes the size along its axis and
+# returns the files of the program, as a list of (name, text) with main in the last one.
+
+
+# n productions, each used once by main.
+def productions(n):
+	functions = "".join(f"func step{i} <int a> by <int b>: int \n\tint c = (a + b) \n\treturn c \n\n" for i in range(n))
+	calls = "".join(f"\tx = (step{i} x by 1) \n" for i in range(n))
+	return [("productions.jg", functions + "main: \n\tint x = 1 \n" + calls + "\tdisplay x \n")]
+
+
+# A function of n statements.
+def statements(n):
+	body = "".join(f"\ta = (a + {i}) \n" for i in range(n))
+	return [("statements.jg", "func work <int a>: int \n" + body + "\treturn a \n\nmain: \n\tint x = (work 1) \n\tdisplay x \n")]
+
+
+# Blocks nested n deep, with a statement in each.
+def depth(n):
+	lines = ["main: ", "\tint x = 1 "]
+	for i in range(n):
+		lines.append("\t" * (i + 1) + f"if (x gt {i}): ")
+		lines.append("\t" * (i + 2) + "x = (x + 1) ")
+	lines.append("\tdisplay x ")
+	return [("depth.jg", "\n".join(lines) + "\n")]
+
+
+# Statements with parentheses nested n deep. syn only reduces one level of them (see try_reduce),
+# so past that every statement is reported as an error; their reductions are still timed.
+def parentheses(n):
+	expression = "x"
+	for i in range(n):
+		expression = f"({expression} + 1)"
+	body = "".join(f"\tx = {expression} \n" for i in range(16))
+	return [("parentheses.jg", "main: \n\tint x = 1 \n" + body + "\tdisplay x \n")]
+
+
+# n productions with overlapping signatures (the same keywords, with int or value parameters),
+# all of which match the statements of main.
+def ambiguity(n):
+	types = ["int", "value"]
+	functions = "".join(f"func combine <{types[i % 2]} a> and <{types[i // 2 % 2]} b>: int \n\tint c = (a + b) \n\treturn c \n\n" for i in range(n))
+	calls = "".join("\tx = (combine x and 1) \n" for i in range(32))
+	return [("ambiguity.jg", functions + "main: \n\tint x = 1 \n" + calls + "\tdisplay x \n")]
+
+
+# The same 64 productions as productions(64), spread over n files.
+def files(n):
+	count = 64
+	program = []
+	for f in range(n):
+		functions = "".join(f"func step{i} <int a> by <int b>: int \n\tint c = (a + b) \n\treturn c \n\n" for i in range(f, count, n))
+		program.append((f"file{f}.jg", functions))
+	calls = "".join(f"\tx = (step{i} x by 1) \n" for i in range(count))
+	program.append(("main.jg", "main: \n\tint x = 1 \n" + calls + "\tdisplay x \n"))
+	return program
+
+
+AXES = {"productions": productions, "statements": statements, "depth": depth, "parentheses": parentheses, "ambiguity": ambiguity, "files": files}
+
+# The sizes each axis is measured at by default. Parentheses stop early: every level of them
+# multiplies the reductions tried by about ten.
+SIZES = {
+	"productions": [16, 32, 64, 128, 256],
+	"statements": [64, 128, 256, 512, 1024],
+	"depth": [8, 16, 32, 64, 128],
+	"parentheses": [1, 2, 3, 4],
+	"ambiguity": [4, 8, 16, 32, 64],
+	"files": [1, 2, 4, 8, 16],
+}
+
+
+# Compiles generated programs on top of lib.jg (compiled once, and copied for each, the way a
+# Library is meant to be reused), timing lex, Command.group, reduce_statement and the rest of
+# compile_tokens with writing the code and source map out, which is the emission. Command.group
+# and reduce_statement are timed by wrapping them while the program compiles, so syn itself
+# isn't changed for it.
+class ScaleBenchmark:
+	def __init__(self, directory, repeat = DEFAULT_REPEAT, margin = DEFAULT_MARGIN):
+		self.directory = directory
+		self.repeat = repeat
+		self.margin = margin
+		with contextlib.redirect_stdout(io.StringIO()):
+			self.library = compile_tokens(lex([LIBRARY]))
+		self.results = {} # key is an axis, value is a list of (size, {phase: seconds}, errors)
+
+
+	# Returns the seconds each phase took compiling the program (the least of repeat tries) and
+	# the errors syn reported.
+	def measure(self, program):
+		filenames = []
+		for name, text in program:
+			filenames.append(os.path.join(self.directory, name))
+			with open(filenames[-1], "w") as f:
+				f.write(text)
+
+		best = {phase: math.inf for phase in PHASES}
+		for i in range(self.repeat):
+			times = {phase: 0.0 for phase in PHASES}
+			group = Command.group
+			reduce_statement = syn.reduce_statement
+			def timed_group(*args):
+				start = time.perf_counter()
+				try:
+					return group(*args)
+				finally:
+					times["group"] += time.perf_counter() - start
+			def timed_reduce(*args):
+				start = time.perf_counter()
+				try:
+					return reduce_statement(*args)
+				finally:
+					times["reduce"] += time.perf_counter() - start
+
+			start = time.perf_counter()
+			tokens = lex(filenames)
+			times["lex"] = time.perf_counter() - start
+			library = self.library.copy()
+			Command.group = timed_group
+			syn.reduce_statement = timed_reduce
+			try:
+				start = time.perf_counter()
+				with contextlib.redirect_stdout(io.StringIO()): # the errors are counted instead
+					library = compile_tokens(tokens, library)
+				output = os.path.join(self.directory, "out.jgc")
+				with open(output, "w") as f:
+					f.write(library.code)
+				library.source_map().save(output + ".map")
+				times["emit"] = time.perf_counter() - start - times["group"] - times["reduce"]
+			finally:
+				Command.group = group
+				syn.reduce_statement = reduce_statement
+			for phase in PHASES:
+				best[phase] = min(best[phase], times[phase])
+		return best, len(library.errors)
+
+
+	def run(self, axes, sizes = None, report = None):
+		for axis in axes:
+			self.results[axis] = []
+			for size in (sizes if sizes is not None else SIZES[axis]):
+				seconds, errors = self.measure(AXES[axis](size))
+				self.results[axis].append((size, seconds, errors))
+				if report is not None:
+					report(axis, size, seconds, errors)
+		return self.results
+
+
+	# Fits seconds = a * size^k to each phase of the axis by least squares on the logarithms, and
+	# seconds = a * g^size as well. Returns a dictionary from phase to its (k, r^2 of that, g, r^2
+	# of that), or None if it never took long enough.
+	def fit(self, axis):
+		fits = {}
+		for phase in PHASES:
+			measured = [(size, seconds[phase]) for size, seconds, errors in self.results[axis] if seconds[phase] > 0]
+			if len(measured) < 2 or max(seconds for size, seconds in measured) < MINIMUM_SECONDS:
+				fits[phase] = None
+				continue
+			k, power_r2 = ScaleBenchmark.regression([(math.log(size), math.log(seconds)) for size, seconds in measured])
+			g, exponential_r2 = ScaleBenchmark.regression([(size, math.log(seconds)) for size, seconds in measured])
+			fits[phase] = (k, power_r2, math.exp(g), exponential_r2)
+		return fits
+
+
+	# Returns the slope of the least squares line through the points and its r^2.
+	def regression(points):
+		mean_x = sum(x for x, y in points) / len(points)
+		mean_y = sum(y for x, y in points) / len(points)
+		sxx = sum((x - mean_x) ** 2 for x, y in points)
+		sxy = sum((x - mean_x) * (y - mean_y) for x, y in points)
+		syy = sum((y - mean_y) ** 2 for x, y in points)
+		if sxx == 0:
+			return (0.0, 0.0)
+		return (sxy / sxx, (sxy * sxy) / (sxx * syy) if syy > 0 else 1.0)
+
+
+	# Returns the phases of the axis that grow faster than linearly.
+	def superlinear(self, axis):
+		return [phase for phase, fit in self.fit(axis).items() if fit is not None and fit[0] > 1 + self.margin]
+
+
+	def summary(self, axis):
+		parts = []
+		for phase, fit in self.fit(axis).items():
+			if fit is None:
+				parts.append(f"{phase} too fast to fit")
+				continue
+			k, power_r2, g, exponential_r2 = fit
+			part = f"{phase} n^{k:.2f} (r^2 {power_r2:.2f})"
+			if k > 1 + self.margin:
+				part += " SUPERLINEAR"
+				if exponential_r2 > power_r2:
+					part += f", exponential: x{g:.1f} per step (r^2 {exponential_r2:.2f})"
+			parts.append(part)
+		return f"{axis}: " + ", ".join(parts)
+
+
+if __name__ == "__main__":
+	options = ["-axes=", "-sizes=", "-repeat=", "-margin=", "-keep=", "-json="]
+	unknown = [arg for arg in sys.argv[1:] if not any(arg.startswith(option) for option in options)]
+	if len(unknown) > 0:
+		print("Usage: python3 synbench.py <optional: options>")
+		print("Options: -axes=<axis,...>, -sizes=<n,...> (of every axis, instead of its own), -repeat=<n> (the least time of n compilations is kept, default 3), "
+			"-margin=<exponent> (how far over n^1 is flagged as superlinear, default 0.15), -keep=<directory> (keep the generated programs there), "
+			"-json=<file> (save the times and fits)")
+		print("Axes:", list(AXES))
+		sys.exit(1)
+
+	axes = list(AXES)
+	sizes = None
+	repeat = DEFAULT_REPEAT
+	margin = DEFAULT_MARGIN
+	keep = None
+	out = None
+	for arg in sys.argv[1:]:
+		if arg.startswith("-axes="): axes = arg[len("-axes="):].split(",")
+		elif arg.startswith("-sizes="): sizes = [int(size) for size in arg[len("-sizes="):].split(",")]
+		elif arg.startswith("-repeat="): repeat = int(arg[len("-repeat="):])
+		elif arg.startswith("-margin="): margin = float(arg[len("-margin="):])
+		elif arg.startswith("-keep="): keep = arg[len("-keep="):]
+		elif arg.startswith("-json="): out = arg[len("-json="):]
+	if any(axis not in AXES for axis in axes):
+		print("Unknown axis. Options are", list(AXES))
+		sys.exit(1)
+
+	def report(axis, size, seconds, errors):
+		if size == (sizes if sizes is not None else SIZES[axis])[0]:
+			print(f"\n{axis:<12} {'lex':>9} {'group':>9} {'reduce':>9} {'emit':>9}  errors")
+		print(f"{size:<12} " + " ".join(f"{seconds[phase] * 1000:>7.2f}ms" for phase in PHASES) + f"  {errors}", flush=True)
+
+	with contextlib.ExitStack() as stack:
+		directory = keep if keep is not None else stack.enter_context(tempfile.TemporaryDirectory())
+		os.makedirs(directory, exist_ok=True)
+		benchmark = ScaleBenchmark(directory, repeat, margin)
+		for axis in axes:
+			axis_directory = os.path.join(directory, axis)
+			os.makedirs(axis_directory, exist_ok=True)
+			benchmark.directory = axis_directory
+			benchmark.run([axis], sizes, report)
+			print(benchmark.summary(axis))
+
+	flagged = {axis: benchmark.superlinear(axis) for axis in axes}
+	flagged = {axis: phases for axis, phases in flagged.items() if len(phases) > 0}
+	print("\nSuperlinear:", "; ".join(f"{axis} ({', '.join(phases)})" for axis, phases in flagged.items()) if len(flagged) > 0 else "none")
+	if out is not None:
+		with open(out, "w") as f:
+			json.dump({axis: {"sizes": [{"size": size, "seconds": seconds, "errors": errors} for size, seconds, errors in results],
+				"fits": benchmark.fit(axis)} for axis, results in benchmark.results.items()}, f, indent="\t")
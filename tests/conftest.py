@@ -0,0 +1,47 @@
+import os
+import sys
+import subprocess
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, "src")
+DATA = os.path.join(ROOT, "data")
+LIBRARY = os.path.join(DATA, "lib.jg")
+sys.path.insert(0, SRC)
+
+# The programs of data/ and what they're given on stdin. addition.jg sketches a library of its own
+# that syn can't compile yet, so it isn't run.
+PROGRAMS = {
+	"addition2": "3\n",
+	"condition": "-4\n",
+	"loop": "1\n20\n3\n",
+	"list": "3\na\nb\nc\n",
+	"objects": "al\n30\nbo\n40\n",
+	"while": "5\n",
+	"names": "",
+}
+
+
+def source(name):
+	return os.path.join(DATA, name + ".jg")
+
+
+# Compiles the file on top of lib.jg into the directory, returning the path of out.jgc (or of
+# out.jgb with -binary).
+def build(filename, directory, *flags):
+	subprocess.run([sys.executable, os.path.join(SRC, "syn.py"), os.path.join(SRC, "lex.py"), LIBRARY, str(filename), "-nocache", *flags],
+		cwd=directory, check=True, capture_output=True)
+	return os.path.join(directory, "out.jgb" if "-binary" in flags else "out.jgc")
+
+
+# Runs a script of src/ on the input, returning its (return code, stdout). Code given as setup is
+# run in the process first, eg: to change a module before the script imports it.
+def run(script, args, stdin = "", setup = None):
+	path = os.path.join(SRC, script)
+	if setup is None:
+		command = [sys.executable, path, *args]
+	else:
+		command = [sys.executable, "-c", f"import sys, runpy; sys.path.insert(0, {SRC!r}); {setup}; "
+			f"sys.argv = [{path!r}] + {list(args)!r}; runpy.run_path({path!r}, run_name='__main__')"]
+	process = subprocess.run(command, input=stdin, capture_output=True, text=True, timeout=120)
+	return process.returncode, process.stdout
@@ -0,0 +1,39 @@
+import pytest
+import bulk
+from array import array
+from conftest import PROGRAMS, source, build, run
+
+
+# The bulk opcodes give the same answers whether NumPy works them out or Python does.
+@pytest.mark.parametrize("name", sorted(PROGRAMS))
+def test_numpy_matches_python(name, tmp_path):
+	pytest.importorskip("numpy")
+	program = build(source(name), tmp_path)
+	with_numpy = run("int.py", [program], PROGRAMS[name])
+	without_numpy = run("int.py", [program], PROGRAMS[name], setup="import bulk; bulk.numpy = None")
+	assert with_numpy == without_numpy
+
+
+def test_names_without_numpy(tmp_path):
+	program = build(source("names"), tmp_path)
+	assert run("int.py", [program], setup="import bulk; bulk.numpy = None") == (0, "7\n2\n3\n3000\n6\n0\n2\n10\n")
+
+
+def test_overflow():
+	items = array('q', [bulk.INT64_MAX] * bulk.NUMPY_MINIMUM)
+	assert bulk.elementwise("add", items, 1) == [bulk.INT64_MAX + 1] * bulk.NUMPY_MINIMUM
+	assert bulk.total(items) == bulk.INT64_MAX * bulk.NUMPY_MINIMUM
+
+
+def test_empty_list_has_no_smallest():
+	with pytest.raises(bulk.ListError):
+		bulk.smallest(array('q'))
+
+
+# Indexing past the end is the same ListError whether the list holds an array or a Python list.
+@pytest.mark.parametrize("value", ["4", "\"x\""])
+@pytest.mark.parametrize("engine", ["-loop", "-threaded", "-jit"])
+def test_index_out_of_range(value, engine, tmp_path):
+	program = tmp_path / "range.jg"
+	program.write_text(f"main: \n\tlist l = (create list) \n\tappend {value} to l \n\tint i = 3 \n\tdisplay (l [ i ]) \n")
+	assert run("int.py", [build(program, tmp_path), engine]) == (1, "ERROR: index 3 is out of range for a list of 1 items\n")
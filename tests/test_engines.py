@@ -0,0 +1,47 @@
+import io
+import pytest
+import int as interpreter
+from conftest import PROGRAMS, LIBRARY, source, build, run
+from test_interpreter import assemble
+
+
+# The ways int.py can run a program, which all have to give the output the default one does.
+FLAGS = [["-threaded"], ["-jit"], ["-no-quicken"], ["-no-fuse"], ["-no-quicken", "-no-fuse"], ["-gc-threshold=0"]]
+
+
+@pytest.fixture(scope="module")
+def default(tmp_path_factory):
+	outputs = {}
+	for name, text in PROGRAMS.items():
+		outputs[name] = run("int.py", [build(source(name), tmp_path_factory.mktemp(name))], text)
+	return outputs
+
+
+@pytest.mark.parametrize("flags", FLAGS, ids=" ".join)
+@pytest.mark.parametrize("name", sorted(PROGRAMS))
+def test_flags(name, flags, default, tmp_path):
+	assert run("int.py", [build(source(name), tmp_path), *flags], PROGRAMS[name]) == default[name]
+
+
+@pytest.mark.parametrize("engine", ["-loop", "-threaded", "-jit"])
+@pytest.mark.parametrize("name", sorted(PROGRAMS))
+def test_binary(name, engine, default, tmp_path):
+	assert run("int.py", [build(source(name), tmp_path, "-binary"), engine], PROGRAMS[name]) == default[name]
+
+
+@pytest.mark.parametrize("name", sorted(PROGRAMS))
+def test_jgpl(name, default):
+	assert run("jgpl.py", [LIBRARY, source(name)], PROGRAMS[name]) == default[name]
+
+
+# With a threshold of 1 the JIT compiles each function the first time it's called or loops, so the
+# program runs almost entirely compiled, and no function is turned down.
+@pytest.mark.parametrize("name", sorted(PROGRAMS))
+def test_jit_compiles_everything(name, default, monkeypatch):
+	monkeypatch.setattr(interpreter.JitEngine, "threshold", 1)
+	written = io.StringIO()
+	each = interpreter.Interpreter(io.BytesIO(PROGRAMS[name].encode()), written, "exit")
+	each.load(assemble(name))
+	each.run(engine = "-jit")
+	assert (0, written.getvalue()) == default[name]
+	assert each.threaded.compiled and not each.threaded.unsupported
@@ -0,0 +1,69 @@
+import io
+import os
+import threading
+import contextlib
+import pytest
+import int as interpreter
+from lex import lex
+from syn import compile_tokens
+from conftest import LIBRARY, source
+
+
+def assemble(name):
+	with contextlib.redirect_stdout(io.StringIO()):
+		return compile_tokens(lex([LIBRARY, source(name)])).assembly()
+
+
+# Returns what the program writes given the input, run by itself.
+def output_of(name, text):
+	written = io.StringIO()
+	alone = interpreter.Interpreter(io.BytesIO(text), written, "exit")
+	alone.load(assemble(name))
+	alone.run()
+	return written.getvalue()
+
+
+# An Interpreter waiting for its input lets go of the lock, so one in another thread runs to the
+# end in the meantime.
+@pytest.mark.parametrize("engine", ["-loop", "-threaded", "-jit"])
+def test_waiting_for_input_doesnt_hold_up_others(engine):
+	read, write = os.pipe()
+	waiting_output = io.StringIO()
+	waiting = interpreter.Interpreter(os.fdopen(read, "rb"), waiting_output, "exit")
+	waiting.load(assemble("while"))
+	running_output = io.StringIO()
+	running = interpreter.Interpreter(io.BytesIO(b"1\n20\n3\n"), running_output, "exit")
+	running.load(assemble("loop"))
+
+	first = threading.Thread(target=waiting.run, kwargs={"engine": engine})
+	first.start()
+	second = threading.Thread(target=running.run, kwargs={"engine": engine})
+	second.start()
+	try:
+		second.join(timeout=30)
+		assert not second.is_alive()
+		assert first.is_alive()
+	finally:
+		os.write(write, b"5\n")
+		os.close(write)
+	first.join(timeout=30)
+	assert not first.is_alive()
+	assert running_output.getvalue() == output_of("loop", b"1\n20\n3\n")
+	assert waiting_output.getvalue() == output_of("while", b"5\n")
+
+
+# Interpreters run in threads side by side give the same output as they do one at a time.
+def test_threads_take_turns():
+	inputs = {"loop": b"1\n20\n3\n", "objects": b"al\n30\nbo\n40\n", "list": b"3\na\nb\nc\n", "names": b""}
+	outputs = {name: io.StringIO() for name in inputs}
+	threads = []
+	for name, text in inputs.items():
+		each = interpreter.Interpreter(io.BytesIO(text), outputs[name], "exit")
+		each.load(assemble(name))
+		threads.append(threading.Thread(target=each.run))
+	for thread in threads:
+		thread.start()
+	for thread in threads:
+		thread.join(timeout=30)
+	for name, text in inputs.items():
+		assert outputs[name].getvalue() == output_of(name, text)